@@ -0,0 +1,391 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+r"""Orchestration overhead of OWL societies.
+
+A stub model answers instantly (the assistant calls one stub tool, then
+replies) and never ends the task, so every run goes the full number of
+rounds and all measured time is OWL/CAMEL's own: message copies, prompt
+building, logging, tool-schema handling, memory/context assembly and the
+history bookkeeping in `run_society`.
+
+Each scenario is run twice: once for CPU/wall time and once under
+`tracemalloc` for allocated and retained memory, so that tracing does not
+distort the timings.
+
+Usage::
+
+    python benchmarks/bench_society.py --rounds 15 50 100 --output bench.json
+    python benchmarks/bench_society.py compare old.json new.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camel.logger import set_log_level
+from camel.models import BaseModelBackend
+from camel.toolkits import FunctionTool
+from camel.utils import BaseTokenCounter
+from openai.types.chat import ChatCompletion
+
+from owl.utils.enhanced_role_playing import (
+    OwlGAIARolePlaying,
+    OwlRolePlaying,
+    arun_society,
+    run_society,
+)
+from owl.utils.memory_policy import MemoryPolicy
+from owl.utils.replay_model import ApproxTokenCounter
+
+TASK = "Find the population of the three largest cities in the stub country and report their sum."
+
+
+class StubModel(BaseModelBackend):
+    r"""A model that answers instantly with fixed-size replies.
+
+    With tools offered and no tool result yet in the step, it calls the
+    first tool; otherwise it replies with text.
+
+    Args:
+        role (str): `"user"` or `"assistant"`, only used in the reply text.
+        reply_chars (int): The length of each text reply.
+            (default: :obj:`600`)
+    """
+
+    def __init__(self, role: str, reply_chars: int = 600):
+        super().__init__("stub", {}, token_counter=ApproxTokenCounter())
+        self.role = role
+        self.reply_chars = reply_chars
+        self.calls = 0
+
+    @property
+    def token_counter(self) -> BaseTokenCounter:
+        return self._token_counter
+
+    @property
+    def token_limit(self) -> int:
+        return 128000
+
+    def check_model_config(self):
+        pass
+
+    def _completion(self, messages, tools) -> ChatCompletion:
+        self.calls += 1
+        prompt_tokens = self._token_counter.count_tokens_from_messages(messages)
+        if tools and messages[-1].get("role") != "tool":
+            name = tools[0]["function"]["name"]
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{self.calls}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps({"query": f"item {self.calls}"})},
+                }],
+            }
+            finish_reason = "tool_calls"
+        else:
+            prefix = "Instruction: " if self.role == "user" else "Solution: "
+            body = f"step {self.calls} " * (self.reply_chars // 8)
+            message = {"role": "assistant", "content": prefix + body[: self.reply_chars]}
+            finish_reason = "stop"
+        completion_tokens = len(str(message.get("content") or "")) // 4 + 1
+        return ChatCompletion.model_validate({
+            "id": f"stub-{self.calls}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub",
+            "choices": [{"index": 0, "finish_reason": finish_reason, "message": message}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _run(self, messages, response_format=None, tools=None):
+        return self._completion(messages, tools)
+
+    async def _arun(self, messages, response_format=None, tools=None):
+        return self._completion(messages, tools)
+
+
+def make_stub_tools(output_chars: int) -> List[FunctionTool]:
+    def lookup(query: str) -> str:
+        r"""Look up facts about the stub country.
+
+        Args:
+            query (str): What to look up.
+
+        Returns:
+            str: The facts found.
+        """
+        return (f"{query}: " + "lorem ipsum dolor sit amet " * (output_chars // 27))[:output_chars]
+
+    def calculate(expression: str) -> str:
+        r"""Evaluate an arithmetic expression.
+
+        Args:
+            expression (str): The expression to evaluate.
+
+        Returns:
+            str: The result.
+        """
+        return "42"
+
+    return [FunctionTool(lookup), FunctionTool(calculate)]
+
+
+def build_society(
+    cls, reply_chars: int, tool_output_chars: int, memory_policy: Optional[MemoryPolicy] = None
+) -> OwlRolePlaying:
+    return cls(
+        memory_policy=memory_policy,
+        task_prompt=TASK,
+        with_task_specify=False,
+        user_role_name="user",
+        user_agent_kwargs={"model": StubModel("user", reply_chars)},
+        assistant_role_name="assistant",
+        assistant_agent_kwargs={
+            "model": StubModel("assistant", reply_chars),
+            "tools": make_stub_tools(tool_output_chars),
+        },
+    )
+
+
+class RoundProbe:
+    r"""Wraps `society.step`/`society.astep` on the instance and records
+    CPU time, wall time and memory per round."""
+
+    def __init__(self, society: OwlRolePlaying, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.rounds: List[Dict[str, float]] = []
+        step, astep = society.step, society.astep
+
+        def timed_step(*args, **kwargs):
+            self._start()
+            result = step(*args, **kwargs)
+            self._stop()
+            return result
+
+        async def timed_astep(*args, **kwargs):
+            self._start()
+            result = await astep(*args, **kwargs)
+            self._stop()
+            return result
+
+        society.step = timed_step
+        society.astep = timed_astep
+
+    def _start(self):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            self._mem0 = tracemalloc.get_traced_memory()[0]
+        self._cpu0 = time.process_time()
+        self._wall0 = time.perf_counter()
+
+    def _stop(self):
+        record = {
+            "cpu_s": time.process_time() - self._cpu0,
+            "wall_s": time.perf_counter() - self._wall0,
+        }
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            record["retained_bytes"] = current - self._mem0
+            record["peak_bytes"] = peak - self._mem0
+        self.rounds.append(record)
+
+
+def _run_once(cls, runner: str, rounds: int, args, trace_memory: bool) -> Dict[str, Any]:
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    base_mem = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    policy = MemoryPolicy(args.keep_rounds, args.max_memory_tokens) if args.keep_rounds else None
+    society = build_society(cls, args.reply_chars, args.tool_output_chars, policy)
+    probe = RoundProbe(society, trace_memory)
+    start = time.process_time()
+    if runner == "arun_society":
+        _, history, _ = asyncio.run(arun_society(society, round_limit=rounds))
+    else:
+        _, history, _ = run_society(society, round_limit=rounds)
+    total_cpu = time.process_time() - start
+    result: Dict[str, Any] = {"rounds_run": len(probe.rounds), "total_cpu_s": total_cpu, "per_round": probe.rounds}
+    if trace_memory:
+        result["total_retained_bytes"] = tracemalloc.get_traced_memory()[0] - base_mem
+        tracemalloc.stop()
+    result["history_bytes"] = len(json.dumps(history, default=str))
+    if society.memory_metrics:
+        result["memory_metrics"] = society.memory_metrics
+    return result
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "mean": statistics.fmean(values),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+SCENARIOS: Dict[str, Any] = {
+    "OwlRolePlaying/run_society": (OwlRolePlaying, "run_society"),
+    "OwlGAIARolePlaying/run_society": (OwlGAIARolePlaying, "run_society"),
+    "OwlRolePlaying/arun_society": (OwlRolePlaying, "arun_society"),
+}
+
+
+def bench(args) -> Dict[str, Any]:
+    results = []
+    for name, (cls, runner) in SCENARIOS.items():
+        if args.scenario and name not in args.scenario:
+            continue
+        for rounds in args.rounds:
+            timing = _run_once(cls, runner, rounds, args, trace_memory=False)
+            memory = _run_once(cls, runner, rounds, args, trace_memory=True)
+            per_round = timing["per_round"]
+            retained = [r["retained_bytes"] for r in memory["per_round"]]
+            entry = {
+                "scenario": name,
+                "rounds": rounds,
+                "rounds_run": timing["rounds_run"],
+                "total_cpu_s": timing["total_cpu_s"],
+                "cpu_s": _summarize([r["cpu_s"] for r in per_round]),
+                "wall_s": _summarize([r["wall_s"] for r in per_round]),
+                # 后 1/4 轮与前 1/4 轮的单轮 CPU 之比，>1 说明开销随历史增长
+                "cpu_growth": (
+                    statistics.fmean(r["cpu_s"] for r in per_round[-max(1, len(per_round) // 4):])
+                    / max(1e-9, statistics.fmean(r["cpu_s"] for r in per_round[: max(1, len(per_round) // 4)]))
+                ) if per_round else None,
+                "peak_bytes": _summarize([r["peak_bytes"] for r in memory["per_round"]]),
+                "retained_bytes_per_round": _summarize(retained),
+                "total_retained_bytes": memory["total_retained_bytes"],
+                "history_bytes": timing["history_bytes"],
+            }
+            if "memory_metrics" in timing:
+                final = [m for m in timing["memory_metrics"] if m["round"] == timing["memory_metrics"][-1]["round"]]
+                entry["final_prompt_tokens"] = {
+                    m["agent"]: {"before": m["tokens_before"], "after": m["tokens_after"]} for m in final
+                }
+            if args.per_round:
+                entry["per_round"] = per_round
+            results.append(entry)
+            print(
+                f"{name:32s} rounds={rounds:<4d} cpu/round={entry['cpu_s'].get('mean', 0) * 1e3:8.2f} ms "
+                f"growth={entry['cpu_growth'] or 0:5.2f}x retained={entry['total_retained_bytes'] / 1e6:7.2f} MB",
+                file=sys.stderr,
+            )
+    return {"meta": _meta(args), "results": results}
+
+
+def _meta(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        from importlib.metadata import version
+
+        camel_version = version("camel-ai")
+    except Exception:
+        camel_version = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "camel_version": camel_version,
+        "created_at": time.time(),
+        "log_level": args.log_level,
+        "reply_chars": args.reply_chars,
+        "tool_output_chars": args.tool_output_chars,
+        "keep_rounds": args.keep_rounds,
+        "max_memory_tokens": args.max_memory_tokens,
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {(r["scenario"], r["rounds"]): r for r in json.load(f)["results"]}
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = {(r["scenario"], r["rounds"]): r for r in json.load(f)["results"]}
+
+    def delta(a: Optional[float], b: Optional[float]) -> str:
+        if not a or b is None:
+            return "n/a"
+        return f"{(b - a) / a:+.1%}"
+
+    for key in sorted(old.keys() & new.keys()):
+        o, n = old[key], new[key]
+        print(
+            f"{key[0]:32s} rounds={key[1]:<4d} "
+            f"cpu/round {delta(o['cpu_s'].get('mean'), n['cpu_s'].get('mean')):>8s}  "
+            f"retained {delta(o['total_retained_bytes'], n['total_retained_bytes']):>8s}  "
+            f"peak/round {delta(o['peak_bytes'].get('mean'), n['peak_bytes'].get('mean')):>8s}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "compare":
+        parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        args = parser.parse_args(argv[1:])
+        compare(args.old, args.new)
+        return
+
+    parser = argparse.ArgumentParser(description="Measure OWL society orchestration overhead")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[15, 50, 100])
+    parser.add_argument("--scenario", nargs="+", default=None, choices=list(SCENARIOS))
+    parser.add_argument("--reply-chars", type=int, default=600, help="length of each stub model reply")
+    parser.add_argument("--tool-output-chars", type=int, default=4000, help="length of each stub tool result")
+    parser.add_argument("--log-level", default="WARNING", help="log level during the runs (INFO includes message logging)")
+    parser.add_argument("--keep-rounds", type=int, default=None, help="run with a MemoryPolicy keeping this many rounds verbatim")
+    parser.add_argument("--max-memory-tokens", type=int, default=None, help="hard token budget of the MemoryPolicy")
+    parser.add_argument("--per-round", action="store_true", help="include per-round samples in the report")
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    set_log_level(args.log_level)
+    logging.getLogger().setLevel(args.log_level)
+
+    report = bench(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+技术指标计算基准测试
+
+对比三种方式在随机行情上的耗时，并校验结果一致：
+1. 原实现：每个指标单独构造 pd.Series 计算后转为列表（逐只股票循环）
+2. 向量化引擎：compute_indicators 一次计算，二维输入时整个股票列表一次调用
+3. 增量模式：IncrementalIndicators.update 只处理最新一根 K 线
+
+用法::
+
+    python benchmarks/bench_indicators.py --tickers 1 50 500 --days 250 1000
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.indicators import IncrementalIndicators, compute_indicators
+
+
+def legacy_indicators(close_prices: np.ndarray) -> Dict[str, Any]:
+    """原 calculate_technical_indicators 的计算部分"""
+    indicators = {}
+    for window in [5, 10, 20, 50, 200]:
+        if len(close_prices) >= window:
+            indicators[f"ma_{window}"] = pd.Series(close_prices).rolling(window=window).mean().values.tolist()
+    if len(close_prices) >= 14:
+        delta = pd.Series(close_prices).diff()
+        avg_gain = delta.clip(lower=0).rolling(window=14).mean()
+        avg_loss = (-delta.clip(upper=0)).rolling(window=14).mean()
+        indicators["rsi"] = (100 - (100 / (1 + avg_gain / avg_loss))).values.tolist()
+    if len(close_prices) >= 26:
+        exp12 = pd.Series(close_prices).ewm(span=12, adjust=False).mean()
+        exp26 = pd.Series(close_prices).ewm(span=26, adjust=False).mean()
+        macd = exp12 - exp26
+        signal = macd.ewm(span=9, adjust=False).mean()
+        indicators["macd"] = macd.values.tolist()
+        indicators["macd_signal"] = signal.values.tolist()
+        indicators["macd_histogram"] = (macd - signal).values.tolist()
+    if len(close_prices) >= 20:
+        ma20 = pd.Series(close_prices).rolling(window=20).mean()
+        std20 = pd.Series(close_prices).rolling(window=20).std()
+        indicators["bollinger_ma"] = ma20.values.tolist()
+        indicators["bollinger_upper"] = (ma20 + std20 * 2).values.tolist()
+        indicators["bollinger_lower"] = (ma20 - std20 * 2).values.tolist()
+    return indicators
+
+
+def random_bars(tickers: int, days: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """几何布朗运动生成的 (股票数, 天数) 日线"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, (tickers, days)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (tickers, days))) * close
+    return {
+        "close": close,
+        "high": close + spread,
+        "low": close - spread,
+        "volume": rng.integers(1e5, 1e7, (tickers, days)).astype(float),
+    }
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def check(bars: Dict[str, np.ndarray]) -> float:
+    """新旧实现在共同指标上的最大绝对误差，以及增量结果与整批结果的误差"""
+    close = bars["close"][0]
+    old = legacy_indicators(close)
+    new = compute_indicators(close)
+    error = max(np.nanmax(np.abs(np.asarray(old[k]) - new[k])) for k in old)
+
+    inc = IncrementalIndicators(*(bars[k][0, :-1] for k in ["close", "high", "low", "volume"]))
+    latest = inc.update(*(bars[k][0, -1] for k in ["close", "high", "low", "volume"]))
+    full = compute_indicators(*(bars[k][0] for k in ["close", "high", "low", "volume"]))
+    error = max(error, max(abs(latest[k] - full[k][-1]) for k in latest if not np.isnan(latest[k])))
+    return float(error)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="技术指标计算基准测试")
+    parser.add_argument("--tickers", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--days", type=int, nargs="+", default=[250, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'股票数':>6} {'天数':>6} {'原实现(ms)':>12} {'向量化(ms)':>12} {'加速':>7} "
+          f"{'含OHLCV(ms)':>12} {'增量(us)':>10} {'最大误差':>10}")
+    for days in args.days:
+        for tickers in args.tickers:
+            bars = random_bars(tickers, days)
+            close = bars["close"]
+
+            legacy = best_of(lambda: [legacy_indicators(row) for row in close], args.repeat)
+            vector = best_of(lambda: compute_indicators(close), args.repeat)
+            full = best_of(lambda: compute_indicators(**bars), args.repeat)
+
+            inc = IncrementalIndicators(**bars)
+            last = {k: v[:, -1] for k, v in bars.items()}
+            incremental = best_of(lambda: inc.update(**last), args.repeat)
+
+            print(f"{tickers:>6} {days:>6} {legacy * 1e3:>12.2f} {vector * 1e3:>12.2f} "
+                  f"{legacy / vector:>6.1f}x {full * 1e3:>12.2f} {incremental * 1e6:>10.1f} "
+                  f"{check(bars):>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
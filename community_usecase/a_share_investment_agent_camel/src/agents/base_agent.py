@@ -3,13 +3,21 @@
 
 定义所有代理的共同基类和接口
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple, Type
 from abc import ABC, abstractmethod
 import json
 import logging
-import re
 from camel.agents import ChatAgent
 from camel.messages import BaseMessage
+from camel.responses import ChatAgentResponse
+from camel.types import OpenAIBackendRole
+from pydantic import BaseModel, ValidationError
+
+from src.tools.digest import digest_data
+from src.tools.json_extract import extract_json
+from src.tools.point_in_time import get_as_of
+from src.tools.rate_limit import LLMLimiter
+from src.tools.response_cache import ResponseCache, cache_key
 
 # 配置日志
 logging.basicConfig(
@@ -21,10 +29,60 @@ logging.basicConfig(
     ]
 )
 
+# 接口拒绝 response_format 时错误信息中常见的关键词
+_RESPONSE_FORMAT_HINTS = ("response_format", "json_schema", "json_object", "structured output", "schema")
+
+
+def _rejects_response_format(e: Exception) -> bool:
+    """
+    判断异常是否为模型或接口不支持结构化输出（response_format）
+
+    只有参数错误（本地 TypeError/ValueError 或 HTTP 400/422）且错误信息提到 response_format/schema 时才算；
+    限流、超时、网络和鉴权等错误不算。camel 会把接口异常包装为 ModelProcessingError，
+    此时状态码只保留在错误信息中（"Error code: 400"）。
+    """
+    message = str(e).lower()
+    if not any(hint in message for hint in _RESPONSE_FORMAT_HINTS):
+        return False
+    status = getattr(e, "status_code", None)
+    if status is not None:
+        return status in (400, 422)
+    if isinstance(e, (TypeError, ValueError, NotImplementedError)):
+        return True
+    return "error code: 400" in message or "error code: 422" in message
+
 
 class BaseAgent(ABC):
     """代理基类"""
     
+    # 所有代理共享的 LLM 限流器（批量模式下设置）
+    llm_limiter: Optional[LLMLimiter] = None
+    
+    # 所有代理共享的 LLM 响应缓存（回测时设置）
+    response_cache: Optional[ResponseCache] = None
+    
+    # 所有代理共享的分析结果缓存及有效期（秒），默认关闭
+    result_cache: Optional[ResponseCache] = None
+    result_cache_ttl: Optional[float] = None
+    
+    # 提示词模板版本，修改代理的提示词或结果格式后递增，使已缓存的分析结果失效
+    prompt_version: str = "2"
+    
+    # 代理输出结构（见 src.models），设置后请求模型原生结构化输出并校验解析结果
+    output_schema: Optional[Type[BaseModel]] = None
+    
+    # 输出无法解析或校验失败时，请求模型修正的最多次数
+    max_repair_attempts: int = 1
+    
+    # 不支持原生结构化输出的模型，首次失败后不再传入 response_format
+    _unstructured_models: Set[str] = set()
+    
+    # 为 True 时提示词包含完整的逐日价格和指标序列，默认只发送特征摘要
+    full_series: bool = False
+    
+    # 为 True 时 process 出错直接抛出异常，而不是返回默认的中性信号/决策（见 run_investment_analysis 的 raise_errors）
+    raise_errors: bool = False
+    
     def __init__(self, role_agent: ChatAgent, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化代理
         
@@ -37,7 +95,128 @@ class BaseAgent(ABC):
         self.show_reasoning = show_reasoning
         self.model_name = model_name
         self.logger = logging.getLogger(self.__class__.__name__)
+        self._parse_failed = False
+        
+    @classmethod
+    def set_llm_limiter(cls, limiter: Optional[LLMLimiter]) -> None:
+        """设置所有代理共享的 LLM 限流器
+        
+        Args:
+            limiter: 限流器，为空时取消限流
+        """
+        BaseAgent.llm_limiter = limiter
+    
+    @classmethod
+    def set_response_cache(cls, cache: Optional[ResponseCache]) -> None:
+        """设置所有代理共享的 LLM 响应缓存
+        
+        Args:
+            cache: 响应缓存，为空时不缓存
+        """
+        BaseAgent.response_cache = cache
+    
+    @classmethod
+    def set_result_cache(cls, cache: Optional[ResponseCache], ttl: Optional[float] = None) -> None:
+        """设置所有代理共享的分析结果缓存
+        
+        Args:
+            cache: 结果缓存，为空时不缓存
+            ttl: 缓存有效期（秒），为空时永不过期
+        """
+        BaseAgent.result_cache = cache
+        BaseAgent.result_cache_ttl = ttl
+    
+    def analyze(self, prompt: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """调用 _process_data_with_agent 分析数据
+        
+        设置了结果缓存时，按 (代理, 模型, 提示词版本, 时点日期, 提示词, 输入数据) 查找已解析的结果，
+        命中则直接返回，不构造提示词也不调用模型。解析失败或为空的结果不缓存。
         
+        Args:
+            prompt: 分析提示
+            data: 输入数据
+            
+        Returns:
+            Dict[str, Any]: 分析结果
+        """
+        cache = BaseAgent.result_cache
+        if cache is None:
+            return self._process_data_with_agent(prompt, data)
+        
+        as_of = get_as_of()
+        key = cache_key(
+            "result", self.__class__.__name__, self.model_name, self.prompt_version,
+            as_of.strftime("%Y-%m-%d") if as_of is not None else None,
+            BaseAgent.full_series, prompt, data
+        )
+        cached = cache.get(key, BaseAgent.result_cache_ttl)
+        if cached is not None:
+            self.logger.info("使用缓存的分析结果")
+            return json.loads(cached)
+        
+        self._parse_failed = False
+        result = self._process_data_with_agent(prompt, data)
+        if result and not self._parse_failed:
+            cache.put(key, json.dumps(result, ensure_ascii=False, default=str))
+        return result
+    
+    def step_agent(self, message: BaseMessage, use_cache: bool = True) -> ChatAgentResponse:
+        """调用 LLM，受全局限流器约束
+        
+        设置了 output_schema 时优先请求模型原生的结构化输出，模型不支持时退回普通输出。
+        设置了响应缓存时，按 (代理, 模型, 时点日期, 消息内容) 查找缓存，命中则不调用模型，
+        但这一轮仍写入代理记忆，之后的追问（如修正请求）能看到原始提示和回复。
+        
+        Args:
+            message: 发送给代理的消息
+            use_cache: 是否使用响应缓存；依赖前文对话的追问不能只按消息内容缓存，应传 False
+            
+        Returns:
+            ChatAgentResponse: 代理响应
+        """
+        cache = BaseAgent.response_cache if use_cache else None
+        key = None
+        if cache is not None:
+            as_of = get_as_of()
+            key = cache_key(
+                self.__class__.__name__, self.model_name,
+                as_of.strftime("%Y-%m-%d") if as_of is not None else None, message.content
+            )
+            content = cache.get(key)
+            if content is not None:
+                reply = self.generate_ai_message(content)
+                self.agent.update_memory(message, OpenAIBackendRole.USER)
+                self.agent.update_memory(reply, OpenAIBackendRole.ASSISTANT)
+                return ChatAgentResponse(msgs=[reply], terminated=False, info={"cached": True})
+        
+        response = self._step(message)
+        
+        if key is not None and response.msgs:
+            cache.put(key, response.msgs[0].content)
+        return response
+    
+    def _step(self, message: BaseMessage) -> ChatAgentResponse:
+        """调用 LLM，设置了 output_schema 时优先请求模型原生的结构化输出"""
+        kwargs = {}
+        if self.output_schema is not None and self.model_name not in BaseAgent._unstructured_models:
+            kwargs["response_format"] = self.output_schema
+        
+        try:
+            if BaseAgent.llm_limiter is None:
+                return self.agent.step(message, **kwargs)
+            with BaseAgent.llm_limiter:
+                return self.agent.step(message, **kwargs)
+        except Exception as e:
+            if not kwargs or not _rejects_response_format(e):
+                raise
+            self.logger.warning(f"模型 {self.model_name} 不支持结构化输出，改用普通输出: {str(e)}")
+            BaseAgent._unstructured_models.add(self.model_name)
+            return self._step(message)
+    
+    def reset(self) -> None:
+        """清空代理的对话记忆，以便复用于下一只股票"""
+        self.agent.reset()
+    
     def log_message(self, message: BaseMessage) -> None:
         """记录消息
         
@@ -54,59 +233,75 @@ class BaseAgent(ABC):
         # 记录到日志
         self.logger.info(f"推理过程: {message.content[:100]}...")
         
-    def format_data(self, data: Dict[str, Any]) -> str:
+    def format_data(self, data: Dict[str, Any], full_series: Optional[bool] = None) -> str:
         """格式化数据为字符串
         
+        默认将逐日价格和技术指标序列替换为固定大小的特征摘要（见 src.tools.digest），
+        以减少提示词长度。
+        
         Args:
             data: 要格式化的数据
+            full_series: 是否保留完整序列，为空时使用 BaseAgent.full_series
             
         Returns:
             str: 格式化后的字符串
         """
+        if not (BaseAgent.full_series if full_series is None else full_series):
+            data = digest_data(data)
         return json.dumps(data, ensure_ascii=False, indent=2)
     
     def parse_json_response(self, response: str) -> Dict[str, Any]:
         """从响应中解析JSON
         
-        尝试从响应文本中提取JSON数据，处理各种边缘情况
+        以括号配对的线性扫描提取回复中的 JSON 对象（见 src.tools.json_extract），
+        设置了 output_schema 时按其校验并补全默认字段；解析或校验失败时请模型修正，
+        最多 max_repair_attempts 次。
         
         Args:
             response: 响应文本
             
         Returns:
-            Dict[str, Any]: 解析后的JSON数据
+            Dict[str, Any]: 解析后的JSON数据，失败时为空字典
         """
+        result, error = self._validate(extract_json(response))
+        for attempt in range(1, self.max_repair_attempts + 1):
+            if result is not None or self.output_schema is None:
+                break
+            self.logger.warning(f"响应无法解析为有效结果，请求修正（第 {attempt} 次）: {error}")
+            # 修正请求的内容与股票无关，只有结合前文才有意义，不走响应缓存
+            repair = self.step_agent(self.generate_human_message(self._repair_prompt(error)), use_cache=False)
+            if not repair.msgs:
+                break
+            response = repair.msgs[0].content
+            result, error = self._validate(extract_json(response))
+        
+        if result is None:
+            # 如果所有尝试都失败，返回空字典并记录错误
+            self._parse_failed = True
+            self.logger.error(f"无法从响应中解析JSON: {response}")
+            return {}
+        return result
+    
+    def _validate(self, obj: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], str]:
+        """按 output_schema 校验解析结果，返回 (结果, 错误说明)"""
+        if obj is None:
+            return None, "回复中没有 JSON 对象"
+        if self.output_schema is None:
+            return obj, ""
         try:
-            # 尝试直接解析
-            return json.loads(response)
-        except json.JSONDecodeError:
-            pass
-        
-        # 尝试从Markdown代码块中提取JSON
-        json_pattern = r"```(?:json)?\s*([\s\S]*?)\s*```"
-        matches = re.findall(json_pattern, response)
-        
-        if matches:
-            for match in matches:
-                try:
-                    return json.loads(match)
-                except json.JSONDecodeError:
-                    continue
-        
-        # 尝试找到大括号包裹的内容
-        brace_pattern = r"\{[\s\S]*\}"
-        matches = re.findall(brace_pattern, response)
-        
-        if matches:
-            for match in matches:
-                try:
-                    return json.loads(match)
-                except json.JSONDecodeError:
-                    continue
-        
-        # 如果所有尝试都失败，返回空字典并记录错误
-        self.logger.error(f"无法从响应中解析JSON: {response}")
-        return {}
+            return self.output_schema.parse_obj(obj).dict(), ""
+        except ValidationError as e:
+            return None, str(e)
+    
+    def _repair_prompt(self, error: str) -> str:
+        """请求模型修正输出格式的提示"""
+        schema = json.dumps(self.output_schema.schema(), ensure_ascii=False)
+        return f"""你上一次的回复无法解析为要求的 JSON 格式：{error}
+
+请重新输出分析结果，只返回一个 JSON 对象，不要包含代码块标记、注释或其他文字。
+JSON 需符合以下 JSON Schema:
+{schema}
+"""
     
     @abstractmethod
     def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
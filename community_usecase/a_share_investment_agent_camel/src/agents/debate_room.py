@@ -7,7 +7,7 @@ import pandas as pd
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import AnalysisSignal, StockData, ResearchReport
+from src.models import AnalysisSignal, StockData, ResearchReport, DebateOutput
 
 from camel.messages import BaseMessage
 
@@ -15,6 +15,8 @@ from camel.messages import BaseMessage
 class DebateRoomAgent(BaseAgent):
     """辩论室代理类"""
     
+    output_schema = DebateOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化辩论室代理
         
@@ -88,7 +90,7 @@ class DebateRoomAgent(BaseAgent):
                 }}
                 """
                 
-            analysis_result = self._process_data_with_agent(prompt, debate_data)
+            analysis_result = self.analyze(prompt, debate_data)
             
             # 创建辩论结果信号
             debate_result = self._create_debate_signal(analysis_result, ticker)
@@ -101,6 +103,8 @@ class DebateRoomAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"辩论过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认辩论结果
             default_signal = AnalysisSignal(
@@ -176,7 +180,7 @@ class DebateRoomAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
@@ -7,7 +7,7 @@ import pandas as pd
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import AnalysisSignal, StockData
+from src.models import AnalysisSignal, StockData, FundamentalsOutput
 
 from camel.messages import BaseMessage
 
@@ -15,6 +15,8 @@ from camel.messages import BaseMessage
 class FundamentalsAnalystAgent(BaseAgent):
     """基本面分析代理类"""
     
+    output_schema = FundamentalsOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化基本面分析代理
         
@@ -70,7 +72,7 @@ class FundamentalsAnalystAgent(BaseAgent):
                 }}
                 """
                 
-            analysis_result = self._process_data_with_agent(prompt, {
+            analysis_result = self.analyze(prompt, {
                 "fundamental_data": fundamental_data,
                 "historical_data": historical_data
             })
@@ -86,6 +88,8 @@ class FundamentalsAnalystAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"基本面分析过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认分析结果
             default_signal = AnalysisSignal(
@@ -151,7 +155,7 @@ class FundamentalsAnalystAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
@@ -127,7 +127,7 @@ class InvestmentAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 返回结果文本
@@ -86,7 +86,7 @@ class MarketDataAgent(BaseAgent):
                 4. 关键支撑和阻力位
                 5. 市场趋势和整体判断"""
                 
-            analysis_result = self._process_data_with_agent(prompt, {
+            analysis_result = self.analyze(prompt, {
                 "ticker": ticker,
                 "historical_data": historical_data,
                 "technical_indicators": technical_indicators
@@ -143,6 +143,8 @@ class MarketDataAgent(BaseAgent):
             dates = df['date'].dt.strftime('%Y-%m-%d').tolist()
             prices = df['close'].tolist()
             volumes = df['volume'].tolist()
+            highs = df['high'].tolist()
+            lows = df['low'].tolist()
             
             # 计算汇总数据
             latest_price = prices[-1] if prices else 0
@@ -156,7 +158,9 @@ class MarketDataAgent(BaseAgent):
                 "raw": {
                     "dates": dates,
                     "prices": prices,
-                    "volumes": volumes
+                    "volumes": volumes,
+                    "highs": highs,
+                    "lows": lows
                 },
                 "summary": {
                     "ticker": ticker,
@@ -174,6 +178,8 @@ class MarketDataAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"获取历史价格数据时发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             # 返回最小数据集以避免整个流程中断
             return {
                 "raw": {"dates": [], "prices": [], "volumes": []},
@@ -206,6 +212,8 @@ class MarketDataAgent(BaseAgent):
             dates = raw_data.get("dates", [])
             prices = raw_data.get("prices", [])
             volumes = raw_data.get("volumes", [])
+            highs = raw_data.get("highs", [])
+            lows = raw_data.get("lows", [])
             
             if not prices:
                 return {}
@@ -216,6 +224,9 @@ class MarketDataAgent(BaseAgent):
                 "收盘": prices if prices else [],
                 "成交量": volumes if volumes else []
             })
+            if len(highs) == len(prices) and len(lows) == len(prices):
+                df["最高"] = highs
+                df["最低"] = lows
             
             # 记录使用的列名
             self.logger.info(f"DataFrame列名: {df.columns.tolist()}")
@@ -252,6 +263,11 @@ class MarketDataAgent(BaseAgent):
                 latest_indicators["bollinger_upper"] = indicators["bollinger_upper"][-1] if indicators["bollinger_upper"] else None
                 latest_indicators["bollinger_lower"] = indicators["bollinger_lower"][-1] if indicators["bollinger_lower"] else None
             
+            # 提取 ATR、KDJ、随机指标和 OBV
+            for key in ["atr", "kdj_k", "kdj_d", "kdj_j", "stoch_k", "stoch_d", "obv"]:
+                if indicators.get(key):
+                    latest_indicators[key] = indicators[key][-1]
+            
             # 分析价格位置
             if "ma_20" in latest_indicators and "ma_50" in latest_indicators and prices:
                 latest_price = prices[-1]
@@ -327,7 +343,7 @@ class MarketDataAgent(BaseAgent):
             msg = self.generate_human_message(content=full_prompt)
             
             # 获取代理响应
-            response = self.agent.step(msg)
+            response = self.step_agent(msg)
             
             # 记录响应
             self.log_message(response.msgs[0])
@@ -350,9 +366,13 @@ class MarketDataAgent(BaseAgent):
         """
         try:
             from src.tools.data_helper import get_fundamental_data
+            from src.tools.financial_reports import get_report_fetcher
             
             self.logger.info(f"获取财务数据: {ticker}")
             
+            # 一次并发获取全部报表，下面的基本面数据和历史财务数据都从缓存读取
+            get_report_fetcher().fetch(ticker)
+            
             # 使用data_helper中的函数获取财务数据
             financial_data = get_fundamental_data(ticker)
             
@@ -443,6 +463,8 @@ class MarketDataAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"获取财务数据时发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             # 返回基本数据结构以避免流程中断
             return {
                 "income_statement": {},
@@ -465,103 +487,48 @@ class MarketDataAgent(BaseAgent):
             List[Dict[str, Any]]: 历史财务数据列表
         """
         try:
-            import akshare as ak
+            from src.tools.financial_reports import get_report_fetcher
             
             self.logger.info(f"获取{ticker}的历史财务数据，共{num_quarters}个季度")
             
-            # 确定股票前缀
-            stock_prefix = 'sz' if ticker.startswith('0') or ticker.startswith('3') else 'sh'
-            formatted_ticker = f"{stock_prefix}{ticker}"
-            
-            # 获取利润表数据
-            income_statements = ak.stock_financial_report_sina(stock=formatted_ticker, symbol="利润表")
-            
-            # 获取资产负债表数据
-            try:
-                balance_sheets = ak.stock_financial_report_sina(stock=formatted_ticker, symbol="资产负债表")
-            except Exception as e:
-                self.logger.warning(f"获取{ticker}的资产负债表数据失败: {str(e)}")
-                balance_sheets = pd.DataFrame()
-            
-            # 获取现金流量表数据
-            try:
-                cash_flows = ak.stock_financial_report_sina(stock=formatted_ticker, symbol="现金流量表")
-            except Exception as e:
-                self.logger.warning(f"获取{ticker}的现金流量表数据失败: {str(e)}")
-                cash_flows = pd.DataFrame()
-            
-            # 获取财务指标数据
-            try:
-                financial_indicators = ak.stock_financial_analysis_indicator(symbol=ticker)
-            except Exception as e:
-                self.logger.warning(f"获取{ticker}的财务指标数据失败: {str(e)}")
-                financial_indicators = pd.DataFrame()
-            
-            # 限制数量
-            if not income_statements.empty:
-                income_statements = income_statements.head(num_quarters)
-            if not balance_sheets.empty:
-                balance_sheets = balance_sheets.head(num_quarters)
-            if not cash_flows.empty:
-                cash_flows = cash_flows.head(num_quarters)
-            if not financial_indicators.empty:
-                financial_indicators = financial_indicators.head(num_quarters)
+            # 四张报表并发获取（已缓存时直接复用），按报告期合并为季度宽表
+            quarters = get_report_fetcher().quarterly(ticker, num_quarters)
+            
+            def value(row: Dict[str, Any], key: str) -> Any:
+                item = row.get(key, 0)
+                return 0 if pd.isna(item) else item
             
             # 组织历史数据
             historical_data = []
-            
-            # 使用利润表的报告日期作为基准
-            if not income_statements.empty:
-                for i, row in income_statements.iterrows():
-                    if i >= num_quarters:
-                        break
-                    
-                    report_date = row.get("报告日", "")
-                    
-                    # 查找相应日期的资产负债表和现金流量表数据
-                    balance_sheet_row = balance_sheets[balance_sheets["报告日"] == report_date].iloc[0] if not balance_sheets.empty and report_date in balance_sheets["报告日"].values else pd.Series()
-                    cash_flow_row = cash_flows[cash_flows["报告日"] == report_date].iloc[0] if not cash_flows.empty and report_date in cash_flows["报告日"].values else pd.Series()
-                    
-                    # 提取财务指标数据
-                    financial_indicator_row = pd.Series()
-                    if not financial_indicators.empty:
-                        # 处理财务指标数据，通常日期格式不同，需要转换
-                        for _, indicator_row in financial_indicators.iterrows():
-                            indicator_date = indicator_row.get("日期")
-                            if indicator_date and str(indicator_date).replace("-", "").startswith(report_date[:6]):
-                                financial_indicator_row = indicator_row
-                                break
-                    
-                    # 组织单季度数据
-                    quarter_data = {
-                        "report_date": report_date,
-                        "formatted_date": f"{report_date[:4]}年{report_date[4:6]}月{report_date[6:]}日",
-                        "income_statement": {
-                            "revenue": row.get("营业收入", 0),
-                            "operating_profit": row.get("营业利润", 0),
-                            "net_income": row.get("净利润", 0),
-                            "total_profit": row.get("利润总额", 0),
-                            "eps": row.get("基本每股收益", 0),
-                        },
-                        "balance_sheet": {
-                            "total_assets": balance_sheet_row.get("资产总计", 0),
-                            "total_liabilities": balance_sheet_row.get("负债合计", 0),
-                            "equity": balance_sheet_row.get("所有者权益(或股东权益)合计", 0),
-                            "cash": balance_sheet_row.get("货币资金", 0),
-                        },
-                        "cash_flow": {
-                            "operating_cash_flow": cash_flow_row.get("经营活动产生的现金流量净额", 0),
-                            "investing_cash_flow": cash_flow_row.get("投资活动产生的现金流量净额", 0),
-                            "financing_cash_flow": cash_flow_row.get("筹资活动产生的现金流量净额", 0),
-                        },
-                        "financial_indicators": {
-                            "roe": financial_indicator_row.get("净资产收益率(%)", 0),
-                            "gross_margin": financial_indicator_row.get("销售毛利率(%)", 0),
-                            "debt_ratio": financial_indicator_row.get("资产负债率(%)", 0),
-                        }
+            for row in quarters.to_dict("records"):
+                report_date = row["报告日"]
+                historical_data.append({
+                    "report_date": report_date,
+                    "formatted_date": f"{report_date[:4]}年{report_date[4:6]}月{report_date[6:]}日",
+                    "income_statement": {
+                        "revenue": value(row, "营业收入"),
+                        "operating_profit": value(row, "营业利润"),
+                        "net_income": value(row, "净利润"),
+                        "total_profit": value(row, "利润总额"),
+                        "eps": value(row, "基本每股收益"),
+                    },
+                    "balance_sheet": {
+                        "total_assets": value(row, "资产总计"),
+                        "total_liabilities": value(row, "负债合计"),
+                        "equity": value(row, "所有者权益(或股东权益)合计"),
+                        "cash": value(row, "货币资金"),
+                    },
+                    "cash_flow": {
+                        "operating_cash_flow": value(row, "经营活动产生的现金流量净额"),
+                        "investing_cash_flow": value(row, "投资活动产生的现金流量净额"),
+                        "financing_cash_flow": value(row, "筹资活动产生的现金流量净额"),
+                    },
+                    "financial_indicators": {
+                        "roe": value(row, "净资产收益率(%)"),
+                        "gross_margin": value(row, "销售毛利率(%)"),
+                        "debt_ratio": value(row, "资产负债率(%)"),
                     }
-                    
-                    historical_data.append(quarter_data)
+                })
             
             self.logger.info(f"成功获取{ticker}的历史财务数据，共{len(historical_data)}个季度")
             return historical_data
@@ -667,7 +634,7 @@ class MarketDataAgent(BaseAgent):
                 try:
                     # 使用LLM分析情感
                     msg = self.generate_human_message(content=sentiment_prompt)
-                    response = self.agent.step(msg)
+                    response = self.step_agent(msg)
                     sentiment = response.msgs[0].content.strip().lower()
                     
                     # 规范化情感结果
@@ -688,6 +655,8 @@ class MarketDataAgent(BaseAgent):
                         sentiment_scores.append(0.1)
                         
                 except Exception:
+                    if self.raise_errors:
+                        raise
                     # 如果LLM分析失败，默认为中性
                     news["sentiment"] = "neutral"
                     news["sentiment_score"] = 0.0
@@ -705,6 +674,8 @@ class MarketDataAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"获取新闻数据时发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             # 返回基本数据结构以避免流程中断
             return {
                 "news": [],
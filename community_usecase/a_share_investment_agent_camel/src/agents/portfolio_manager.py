@@ -8,7 +8,7 @@ import math
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import AnalysisSignal, StockData, RiskAnalysis, TradingDecision
+from src.models import AnalysisSignal, StockData, RiskAnalysis, TradingDecision, TradeOutput
 
 from camel.messages import BaseMessage
 
@@ -16,6 +16,8 @@ from camel.messages import BaseMessage
 class PortfolioManagerAgent(BaseAgent):
     """投资组合管理代理类"""
     
+    output_schema = TradeOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化投资组合管理代理
         
@@ -115,7 +117,7 @@ class PortfolioManagerAgent(BaseAgent):
                 }}
                 """
                 
-            analysis_result = self._process_data_with_agent(prompt, decision_data)
+            analysis_result = self.analyze(prompt, decision_data)
             
             # 创建交易决策
             trading_decision = self._create_trading_decision(analysis_result, agent_signals)
@@ -128,6 +130,8 @@ class PortfolioManagerAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"制定投资决策过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认交易决策
             default_decision = TradingDecision(
@@ -221,7 +225,7 @@ class PortfolioManagerAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
@@ -7,7 +7,7 @@ import pandas as pd
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import AnalysisSignal, StockData, ResearchReport
+from src.models import AnalysisSignal, StockData, ResearchReport, ResearchOutput
 
 from camel.messages import BaseMessage
 
@@ -15,6 +15,8 @@ from camel.messages import BaseMessage
 class ResearcherBullAgent(BaseAgent):
     """多头研究员代理类"""
     
+    output_schema = ResearchOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化多头研究员代理
         
@@ -89,7 +91,7 @@ class ResearcherBullAgent(BaseAgent):
                 }}
                 """
                 
-            analysis_result = self._process_data_with_agent(prompt, analysis_data)
+            analysis_result = self.analyze(prompt, analysis_data)
             
             # 创建研究报告
             bull_research = self._create_research_report(analysis_result, ticker)
@@ -102,6 +104,8 @@ class ResearcherBullAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"生成多头研究报告过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认研究报告
             default_report = ResearchReport(
@@ -168,7 +172,7 @@ class ResearcherBullAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
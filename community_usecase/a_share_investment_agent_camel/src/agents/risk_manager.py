@@ -7,7 +7,9 @@ import pandas as pd
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import RiskAnalysis, StockData, Portfolio
+from src.models import RiskAnalysis, RiskOutput, StockData, Portfolio
+
+from src.tools.risk_metrics import compute_risk_metrics
 
 from camel.messages import BaseMessage
 
@@ -15,6 +17,8 @@ from camel.messages import BaseMessage
 class RiskManagerAgent(BaseAgent):
     """风险管理代理类"""
     
+    output_schema = RiskOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化风险管理代理
         
@@ -54,44 +58,52 @@ class RiskManagerAgent(BaseAgent):
             
         self.logger.info(f"正在进行风险评估")
         
+        # 波动率、回撤等统计量由本地行情计算，模型只负责仓位建议
+        metrics = self._compute_metrics(stock_data)
+        
         try:
-            # 提取股票基本信息和历史数据
             ticker = stock_data.ticker
-            historical_data = stock_data.historical_data
             
             # 组织风险评估数据
             risk_data = {
                 "ticker": ticker,
-                "historical_data": historical_data,
+                "risk_metrics": metrics,
+                "latest_price": stock_data.historical_data.get("summary", {}).get("latest_price"),
                 "debate_result": debate_result.dict() if debate_result else None,
                 "portfolio": portfolio
             }
             
             # 使用代理处理数据分析请求
             prompt = f"""请作为风险管理经理，评估投资股票 {ticker} 的风险水平，并提供风险管理建议。
-                分析以下方面:
-                1. 投资组合风险指标（波动率、最大回撤等）
-                2. 市场和特定股票的风险水平
-                3. 适当的持仓限制
-                4. 止损水平建议
-                5. 风险分散策略
+                数据中的 risk_metrics 是根据历史行情计算的风险指标（小数表示比例）:
+                - volatility: 近 20/60/120 个交易日及全区间的年化波动率
+                - max_drawdown / current_drawdown: 区间最大回撤和当前回撤
+                - daily_var_95 / daily_cvar_95: 95% 置信度的单日 VaR 和 CVaR
+                - benchmark: 相对基准指数的 beta 和相关系数
+                - liquidity: 近 20 个交易日的日均成交额（元）、换手率（%）和 Amihud 非流动性
+                
+                请基于这些指标和辩论结果分析:
+                1. 市场和特定股票的风险水平
+                2. 适当的持仓限制
+                3. 止损水平建议
+                4. 风险分散策略
                 
                 请根据分析提供详细的风险管理建议。
                 返回格式为JSON:
                 {{
-                    "max_position_size": 0.2, // 建议最大持仓比例
-                    "volatility": 0.15, // 预估股票波动率
-                    "risk_score": 0.7, // 0-1之间的风险分数
-                    "max_drawdown": 0.25, // 预估最大回撤
-                    "suggested_position_size": 0.15, // 建议持仓比例
+                    "max_position_size": 0.2,
+                    "risk_score": 0.7,
+                    "suggested_position_size": 0.15,
                     "reasoning": "风险评估理由..."
                 }}
+                其中 max_position_size 为建议最大持仓比例，risk_score 为 0-1 之间的风险分数，
+                suggested_position_size 为建议持仓比例。
                 """
                 
-            analysis_result = self._process_data_with_agent(prompt, risk_data)
+            analysis_result = self.analyze(prompt, risk_data)
             
             # 创建风险分析结果
-            risk_analysis = self._create_risk_analysis(analysis_result)
+            risk_analysis = self._create_risk_analysis(analysis_result, metrics)
             
             # 返回处理结果
             return {
@@ -101,45 +113,63 @@ class RiskManagerAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"风险评估过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认风险分析
-            default_analysis = RiskAnalysis(
-                max_position_size=0.1,
-                volatility=0.2,
-                risk_score=0.5,
-                max_drawdown=0.2,
-                suggested_position_size=0.05,
-                reasoning="风险评估过程中发生错误，使用保守默认值"
-            )
+            default_analysis = self._create_risk_analysis({
+                "reasoning": "风险评估过程中发生错误，使用保守默认值"
+            }, metrics)
             
             return {
                 "risk_analysis": default_analysis,
                 "messages": []
             }
+    
+    def _compute_metrics(self, stock_data: StockData) -> Dict[str, Any]:
+        """计算分析区间内的风险指标，失败时为空字典
+        
+        Args:
+            stock_data: 股票数据对象
             
-    def _create_risk_analysis(self, analysis_result: Dict[str, Any]) -> RiskAnalysis:
+        Returns:
+            Dict[str, Any]: 风险指标
+        """
+        summary = stock_data.historical_data.get("summary", {})
+        start_date, end_date = summary.get("start_date"), summary.get("end_date")
+        if not start_date or not end_date:
+            return {}
+        try:
+            return compute_risk_metrics(stock_data.ticker, start_date, end_date)
+        except Exception as e:
+            self.logger.warning(f"计算风险指标失败: {str(e)}")
+            return {}
+            
+    def _create_risk_analysis(self, analysis_result: Dict[str, Any], metrics: Dict[str, Any]) -> RiskAnalysis:
         """创建风险分析结果
         
+        波动率取近 60 个交易日的年化波动率（数据不足时取全区间），最大回撤取区间最大回撤；
+        没有风险指标时使用保守默认值。
+        
         Args:
             analysis_result: 分析结果
+            metrics: 风险指标
             
         Returns:
             RiskAnalysis: 风险分析结果
         """
-        max_position_size = analysis_result.get("max_position_size", 0.1)
-        volatility = analysis_result.get("volatility", 0.2)
-        risk_score = analysis_result.get("risk_score", 0.5)
-        max_drawdown = analysis_result.get("max_drawdown", 0.2)
-        suggested_position_size = analysis_result.get("suggested_position_size", 0.05)
-        reasoning = analysis_result.get("reasoning", "未提供风险评估理由")
+        volatility = metrics.get("volatility", {})
+        volatility = volatility.get("60d") or volatility.get("full")
+        max_drawdown = metrics.get("max_drawdown")
         
         return RiskAnalysis(
-            max_position_size=max_position_size,
-            volatility=volatility,
-            risk_score=risk_score,
-            max_drawdown=max_drawdown,
-            suggested_position_size=suggested_position_size,
-            reasoning=reasoning
+            max_position_size=analysis_result.get("max_position_size", 0.1),
+            volatility=volatility if volatility is not None else 0.2,
+            risk_score=analysis_result.get("risk_score", 0.5),
+            max_drawdown=max_drawdown if max_drawdown is not None else 0.2,
+            suggested_position_size=analysis_result.get("suggested_position_size", 0.05),
+            reasoning=analysis_result.get("reasoning", "未提供风险评估理由"),
+            metrics=metrics
         )
     
     def _process_data_with_agent(self, prompt: str, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -165,7 +195,7 @@ class RiskManagerAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
@@ -175,9 +205,7 @@ class RiskManagerAgent(BaseAgent):
         if not result:
             result = {
                 "max_position_size": 0.1,
-                "volatility": 0.2,
                 "risk_score": 0.5,
-                "max_drawdown": 0.2,
                 "suggested_position_size": 0.05,
                 "reasoning": "无法解析风险分析结果，使用保守默认值"
             }
@@ -7,7 +7,7 @@ import pandas as pd
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import AnalysisSignal, StockData
+from src.models import AnalysisSignal, StockData, SentimentOutput
 
 from camel.messages import BaseMessage
 
@@ -15,6 +15,8 @@ from camel.messages import BaseMessage
 class SentimentAnalystAgent(BaseAgent):
     """情绪分析代理类"""
     
+    output_schema = SentimentOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化情绪分析代理
         
@@ -71,7 +73,7 @@ class SentimentAnalystAgent(BaseAgent):
                 }}
                 """
                 
-            analysis_result = self._process_data_with_agent(prompt, {
+            analysis_result = self.analyze(prompt, {
                 "ticker": ticker,
                 "news_data": news_data
             })
@@ -87,6 +89,8 @@ class SentimentAnalystAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"情绪分析过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认分析结果
             default_signal = AnalysisSignal(
@@ -152,7 +156,7 @@ class SentimentAnalystAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
@@ -10,7 +10,7 @@ import json
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import StockData, AnalysisSignal
+from src.models import StockData, AnalysisSignal, TechnicalOutput
 
 from camel.messages import BaseMessage
 
@@ -18,6 +18,8 @@ from camel.messages import BaseMessage
 class TechnicalAnalystAgent(BaseAgent):
     """技术分析代理类"""
     
+    output_schema = TechnicalOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化技术分析代理
         
@@ -73,7 +75,7 @@ class TechnicalAnalystAgent(BaseAgent):
                 }}
                 """
                 
-            analysis_result = self._process_data_with_agent(prompt, {
+            analysis_result = self.analyze(prompt, {
                 "technical_indicators": technical_indicators,
                 "historical_data": historical_data
             })
@@ -89,6 +91,8 @@ class TechnicalAnalystAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"技术分析过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认分析结果
             default_signal = AnalysisSignal(
@@ -184,7 +188,7 @@ class TechnicalAnalystAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
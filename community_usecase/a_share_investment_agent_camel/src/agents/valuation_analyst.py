@@ -7,7 +7,7 @@ import pandas as pd
 
 from src.agents.base_agent import BaseAgent
 from src.roles import create_role_agent
-from src.models import AnalysisSignal, StockData
+from src.models import AnalysisSignal, StockData, ValuationOutput
 
 from camel.messages import BaseMessage
 
@@ -15,6 +15,8 @@ from camel.messages import BaseMessage
 class ValuationAnalystAgent(BaseAgent):
     """估值分析代理类"""
     
+    output_schema = ValuationOutput
+    
     def __init__(self, show_reasoning: bool = False, model_name: str = "gemini"):
         """初始化估值分析代理
         
@@ -83,7 +85,7 @@ class ValuationAnalystAgent(BaseAgent):
             if fundamentals_analysis:
                 analysis_data["fundamentals_analysis"] = fundamentals_analysis.dict()
                 
-            analysis_result = self._process_data_with_agent(prompt, analysis_data)
+            analysis_result = self.analyze(prompt, analysis_data)
             
             # 创建估值分析信号
             valuation_analysis = self._create_valuation_signal(analysis_result, stock_data)
@@ -96,6 +98,8 @@ class ValuationAnalystAgent(BaseAgent):
             
         except Exception as e:
             self.logger.error(f"估值分析过程中发生错误: {str(e)}")
+            if self.raise_errors:
+                raise
             
             # 返回默认分析结果
             default_signal = AnalysisSignal(
@@ -163,7 +167,7 @@ class ValuationAnalystAgent(BaseAgent):
 """
         # 发送到Camel代理进行分析
         human_message = self.generate_human_message(content=full_prompt)
-        response = self.agent.step(human_message)
+        response = self.step_agent(human_message)
         self.log_message(response.msgs[0])
         
         # 解析结果
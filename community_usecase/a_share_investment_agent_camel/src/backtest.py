@@ -0,0 +1,414 @@
+"""
+历史回测
+
+在历史区间内按固定间隔的交易日重放 run_investment_analysis：
+- 每个决策日在 as_of(日期) 上下文中运行，价格、财报、行情和新闻只取该日收盘时可获得的数据；
+- LLM 响应按 (代理, 决策日, 输入摘要) 缓存在 SQLite 中，重复回测不再调用模型；
+- 各决策日互不依赖（均以相同的初始组合询问决策），多个日期并发运行；
+- 决策于下一交易日开盘按不复权价格成交，按 A 股一手 100 股、佣金、印花税和滑点模拟组合，
+  两次调仓之间的持仓市值和收益按复权价格向量化计算；
+- 报告收益、回撤、夏普比率，以及各代理信号的命中率。
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.agents.base_agent import BaseAgent
+from src.batch import AgentPool
+from src.main import run_investment_analysis
+from src.models import TradingDecision
+from src.tools.point_in_time import as_of
+from src.tools.price_store import get_price_store
+from src.tools.rate_limit import LLMLimiter
+from src.tools.response_cache import LLM_CACHE_PATH, ResponseCache
+
+logger = logging.getLogger("Backtest")
+
+TRADING_DAYS = 252
+# A 股一手
+LOT_SIZE = 100
+
+# 决策 -> 目标仓位比例，hold 保持当前仓位
+_TARGET_WEIGHTS = {"buy": 1.0, "sell": 0.0}
+
+# 信号名称归一化
+_SIGNAL_DIRECTIONS = {
+    "bullish": 1, "buy": 1, "positive": 1,
+    "bearish": -1, "sell": -1, "negative": -1,
+}
+
+
+def _decision_dates(bars: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp, every: int) -> List[pd.Timestamp]:
+    """区间内每 every 个交易日取一个决策日"""
+    dates = bars.loc[(bars["date"] >= start) & (bars["date"] <= end), "date"]
+    return list(dates.iloc[::every])
+
+
+def run_decisions(
+    ticker: str,
+    dates: List[pd.Timestamp],
+    lookback_days: int = 365,
+    initial_cash: float = 100000.0,
+    num_of_news: int = 5,
+    model_name: str = "gemini",
+    date_workers: int = 4,
+    step_workers: int = 4
+) -> Dict[pd.Timestamp, TradingDecision]:
+    """
+    并发运行各决策日的投资分析
+
+    Args:
+        ticker: 股票代码
+        dates: 决策日
+        lookback_days: 每次分析使用的历史天数
+        initial_cash: 询问决策时使用的组合现金
+        num_of_news: 情绪分析使用的新闻数量
+        model_name: 使用的模型名称 (gemini, openai, qwen)
+        date_workers: 同时运行的决策日数
+        step_workers: 每个决策日内同时执行的分析步骤数
+
+    Returns:
+        Dict[pd.Timestamp, TradingDecision]: 决策日 -> 交易决策；分析出错的决策日不在其中
+    """
+    pool = AgentPool(min(date_workers, len(dates)), show_reasoning=False, model_name=model_name)
+
+    def analyze(date: pd.Timestamp) -> TradingDecision:
+        with pool.acquire() as agents, as_of(date):
+            return run_investment_analysis(
+                ticker=ticker,
+                start_date=(date - timedelta(days=lookback_days)).strftime("%Y-%m-%d"),
+                end_date=date.strftime("%Y-%m-%d"),
+                portfolio={"cash": initial_cash, "stock": 0},
+                num_of_news=num_of_news,
+                model_name=model_name,
+                agents=agents,
+                max_workers=step_workers,
+                raise_errors=True
+            )
+
+    decisions: Dict[pd.Timestamp, TradingDecision] = {}
+    with ThreadPoolExecutor(max_workers=date_workers, thread_name_prefix="backtest") as executor:
+        futures = {executor.submit(analyze, d): d for d in dates}
+        for future in as_completed(futures):
+            date = futures[future]
+            try:
+                decisions[date] = future.result()
+            except Exception as e:
+                # 出错的决策日不下单，也不计入信号命中率
+                logger.error(f"{date.date()} 分析失败: {str(e)}")
+                continue
+            logger.info(f"[{len(decisions)}/{len(dates)}] {date.date()}: {decisions[date].action}")
+    return decisions
+
+
+def simulate(
+    bars: pd.DataFrame,
+    actions: pd.Series,
+    initial_cash: float = 100000.0,
+    commission_rate: float = 0.00025,
+    min_commission: float = 5.0,
+    stamp_duty_rate: float = 0.0005,
+    slippage: float = 0.001
+) -> Dict[str, Any]:
+    """
+    模拟组合
+
+    决策在决策日收盘后作出，于下一交易日开盘成交。buy 调整到满仓，sell 清仓，hold 不动；
+    股数按一手取整，买入收佣金，卖出收佣金和印花税，成交价计入滑点。
+
+    成交价、股数和费用按不复权价格计算；持仓市值按复权收盘价 adj_close 随时间变化，
+    除权除息日送转、分红计入持仓而不表现为价格下跌。
+
+    Args:
+        bars: 不复权日线，包含 date、open、close 列，按日期升序；可选 adj_close 列为复权收盘价，
+            缺省时等于 close
+        actions: 决策日 -> 决策 (buy/sell/hold)
+        initial_cash: 初始现金
+        commission_rate: 佣金费率（双向）
+        min_commission: 单笔最低佣金
+        stamp_duty_rate: 印花税率（仅卖出）
+        slippage: 滑点（成交价相对开盘价的比例）
+
+    Returns:
+        Dict[str, Any]: daily（逐日持仓、现金和净值）与 trades（成交记录）
+    """
+    bars = bars.reset_index(drop=True)
+    position = pd.Series(bars.index, index=bars["date"])
+    opens = bars["open"].to_numpy(float)
+    adj_close = bars["adj_close"] if "adj_close" in bars.columns else bars["close"]
+    # 复权因子：复权价 / 不复权价，除权除息日跳变
+    factor = (adj_close / bars["close"]).to_numpy(float)
+
+    # units 为以复权价计的持仓份额，units * 复权价 = 持仓市值；换算为当日实际股数为 units * factor
+    units, cash = 0.0, float(initial_cash)
+    fill_units = np.full(len(bars), np.nan)
+    fill_cash = np.full(len(bars), np.nan)
+    trades = []
+
+    for date, action in actions.sort_index().items():
+        weight = _TARGET_WEIGHTS.get(str(action).lower())
+        fill = position.get(date, -1) + 1
+        if weight is None or fill <= 0 or fill >= len(bars):
+            continue
+
+        price = opens[fill]
+        # 上次成交后的送转、分红已体现在 factor 中
+        shares = units * factor[fill]
+        equity = cash + shares * price
+        if weight > 0:
+            buy_price = price * (1 + slippage)
+            target = int(equity * weight / (buy_price * (1 + commission_rate)) // LOT_SIZE) * LOT_SIZE
+            quantity = max(0, int((target - shares) // LOT_SIZE) * LOT_SIZE)
+            while quantity > 0:
+                value = quantity * buy_price
+                fee = max(value * commission_rate, min_commission)
+                if value + fee <= cash:
+                    break
+                quantity -= LOT_SIZE
+            if quantity <= 0:
+                continue
+            shares += quantity
+            cash -= value + fee
+            trades.append({"date": bars["date"][fill], "side": "buy", "quantity": quantity,
+                           "price": buy_price, "fee": fee})
+        else:
+            if units == 0:
+                continue
+            sell_price = price * (1 - slippage)
+            value = shares * sell_price
+            fee = max(value * commission_rate, min_commission) + value * stamp_duty_rate
+            trades.append({"date": bars["date"][fill], "side": "sell", "quantity": round(shares, 2),
+                           "price": sell_price, "fee": fee})
+            cash += value - fee
+            shares = 0.0
+        units = shares / factor[fill]
+        fill_units[fill] = units
+        fill_cash[fill] = cash
+
+    # 两次成交之间持仓份额和现金不变，净值按复权收盘价向量化计算
+    daily = pd.DataFrame({"date": bars["date"], "close": bars["close"], "adj_close": adj_close})
+    held = pd.Series(fill_units).ffill().fillna(0.0).to_numpy()
+    daily["shares"] = held * factor
+    daily["cash"] = pd.Series(fill_cash).ffill().fillna(initial_cash).to_numpy()
+    daily["equity"] = daily["cash"] + held * daily["adj_close"]
+    daily["returns"] = daily["equity"].pct_change().fillna(0.0)
+    return {"daily": daily, "trades": pd.DataFrame(trades)}
+
+
+def performance(daily: pd.DataFrame, trades: pd.DataFrame, initial_cash: float) -> Dict[str, Any]:
+    """收益、波动、回撤和交易统计"""
+    equity = daily["equity"]
+    returns = daily["returns"]
+    total_return = equity.iloc[-1] / initial_cash - 1
+    years = len(daily) / TRADING_DAYS
+    volatility = returns.std() * math.sqrt(TRADING_DAYS)
+    drawdown = equity / equity.cummax() - 1
+    return {
+        "start_date": daily["date"].iloc[0].strftime("%Y-%m-%d"),
+        "end_date": daily["date"].iloc[-1].strftime("%Y-%m-%d"),
+        "final_equity": round(float(equity.iloc[-1]), 2),
+        "total_return": round(float(total_return), 4),
+        "annual_return": round(float((1 + total_return) ** (1 / years) - 1), 4) if years > 0 else None,
+        "annual_volatility": round(float(volatility), 4),
+        "sharpe": round(float(returns.mean() / returns.std() * math.sqrt(TRADING_DAYS)), 3)
+        if returns.std() > 0 else None,
+        "max_drawdown": round(float(drawdown.min()), 4),
+        "benchmark_return": round(float(daily["adj_close"].iloc[-1] / daily["adj_close"].iloc[0] - 1), 4),
+        "exposure": round(float((daily["shares"] > 0).mean()), 4),
+        "trades": int(len(trades)),
+        "total_fees": round(float(trades["fee"].sum()), 2) if not trades.empty else 0.0,
+    }
+
+
+def signal_hit_rates(
+    bars: pd.DataFrame,
+    decisions: Dict[pd.Timestamp, TradingDecision],
+    horizon: int
+) -> Dict[str, Dict[str, Any]]:
+    """
+    各代理信号（及最终决策）在之后 horizon 个交易日的命中率
+
+    看涨信号之后上涨、看跌信号之后下跌记为命中；中性信号只计数。
+    bars 应为复权日线，远期收益不受除权除息影响。
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 代理 -> 信号数、方向性信号数、命中率、按信号方向计的平均远期收益
+    """
+    forward = (bars["close"].shift(-horizon) / bars["close"] - 1).set_axis(bars["date"])
+    rows = []
+    for date, decision in decisions.items():
+        rows.append({"date": date, "agent": "decision", "signal": decision.action})
+        for signal in decision.agent_signals:
+            rows.append({"date": date, "agent": signal.agent, "signal": signal.signal})
+    if not rows:
+        return {}
+
+    df = pd.DataFrame(rows)
+    df["direction"] = df["signal"].astype(str).str.lower().map(_SIGNAL_DIRECTIONS).fillna(0)
+    df["forward"] = df["date"].map(forward)
+    scored = df[(df["direction"] != 0) & df["forward"].notna()].assign(
+        hit=lambda x: np.sign(x["forward"]) == x["direction"],
+        signed=lambda x: x["forward"] * x["direction"]
+    )
+    stats = scored.groupby("agent").agg(
+        directional=("hit", "size"), hit_rate=("hit", "mean"), avg_signed_return=("signed", "mean")
+    )
+    totals = df.groupby("agent").size()
+    return {
+        agent: {
+            "signals": int(totals[agent]),
+            "directional": int(stats["directional"].get(agent, 0)),
+            "hit_rate": round(float(stats["hit_rate"][agent]), 4) if agent in stats.index else None,
+            "avg_signed_return": round(float(stats["avg_signed_return"][agent]), 4) if agent in stats.index else None,
+        }
+        for agent in totals.index
+    }
+
+
+def run_backtest(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    every: int = 5,
+    lookback_days: int = 365,
+    initial_cash: float = 100000.0,
+    num_of_news: int = 5,
+    model_name: str = "gemini",
+    date_workers: int = 4,
+    step_workers: int = 4,
+    max_llm_concurrency: int = 8,
+    requests_per_minute: Optional[float] = None,
+    cache_path: Optional[str] = LLM_CACHE_PATH,
+    output_dir: Optional[str] = "results/backtest",
+    **costs: float
+) -> Dict[str, Any]:
+    """
+    回测投资分析流程
+
+    Args:
+        ticker: 股票代码
+        start_date: 回测开始日期 (YYYY-MM-DD)
+        end_date: 回测结束日期 (YYYY-MM-DD)
+        every: 每隔多少个交易日决策一次，也是信号命中率的观察期
+        lookback_days: 每次分析使用的历史天数
+        initial_cash: 初始现金
+        num_of_news: 情绪分析使用的新闻数量
+        model_name: 使用的模型名称 (gemini, openai, qwen)
+        date_workers: 同时运行的决策日数
+        step_workers: 每个决策日内同时执行的分析步骤数
+        max_llm_concurrency: 全局同时在途的 LLM 请求数
+        requests_per_minute: 全局每分钟 LLM 请求数上限，为空时不限速
+        cache_path: LLM 响应缓存文件，为空时不缓存
+        output_dir: 结果目录，为空时不写文件
+        **costs: 传给 simulate 的交易成本参数
+
+    Returns:
+        Dict[str, Any]: 回测报告
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    # 成交用不复权价格；前复权价格只用于计算收益和信号命中率
+    raw = get_price_store(adjust="").get(ticker, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+    adjusted = get_price_store().get(ticker, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+    if raw.empty or adjusted.empty:
+        raise ValueError(f"{ticker} 在 {start_date} ~ {end_date} 没有行情数据")
+    adjusted = adjusted.sort_values("date").reset_index(drop=True)
+    bars = raw.merge(adjusted[["date", "close"]].rename(columns={"close": "adj_close"}), on="date")
+    bars = bars.sort_values("date").reset_index(drop=True)
+    dates = _decision_dates(bars, start, end, every)
+    logger.info(f"回测 {ticker}: {start_date} ~ {end_date}，共 {len(dates)} 个决策日")
+
+    cache = ResponseCache(cache_path) if cache_path else None
+    BaseAgent.set_response_cache(cache)
+    BaseAgent.set_llm_limiter(LLMLimiter(max_llm_concurrency, requests_per_minute))
+    started = time.perf_counter()
+    try:
+        decisions = run_decisions(
+            ticker, dates, lookback_days, initial_cash, num_of_news, model_name, date_workers, step_workers
+        )
+    finally:
+        BaseAgent.set_llm_limiter(None)
+        BaseAgent.set_response_cache(None)
+        if cache is not None:
+            cache.close()
+
+    actions = pd.Series({date: d.action for date, d in decisions.items()})
+    sim = simulate(bars, actions, initial_cash, **costs)
+    report = {
+        "ticker": ticker,
+        "decision_dates": len(dates),
+        "failed_dates": [d.strftime("%Y-%m-%d") for d in dates if d not in decisions],
+        "every": every,
+        "model": model_name,
+        "elapsed_s": round(time.perf_counter() - started, 1),
+        "cache": {"hits": cache.hits, "misses": cache.misses} if cache is not None else None,
+        "performance": performance(sim["daily"], sim["trades"], initial_cash),
+        "signals": signal_hit_rates(adjusted, decisions, every),
+    }
+
+    if output_dir:
+        run_dir = os.path.join(output_dir, f"{ticker}_{start:%Y%m%d}_{end:%Y%m%d}")
+        os.makedirs(run_dir, exist_ok=True)
+        with open(os.path.join(run_dir, "decisions.jsonl"), "w", encoding="utf-8") as f:
+            for date in sorted(decisions):
+                f.write(json.dumps({"date": date.strftime("%Y-%m-%d"), "decision": decisions[date].dict()},
+                                   ensure_ascii=False) + "\n")
+        sim["daily"].to_csv(os.path.join(run_dir, "equity.csv"), index=False)
+        sim["trades"].to_csv(os.path.join(run_dir, "trades.csv"), index=False)
+        with open(os.path.join(run_dir, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"回测结果已写入 {run_dir}")
+    return report
+
+
+def main() -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="A股投资代理历史回测")
+    parser.add_argument("--ticker", type=str, required=True, help="股票代码")
+    parser.add_argument("--start-date", type=str, required=True, help="回测开始日期 (YYYY-MM-DD)")
+    parser.add_argument("--end-date", type=str,
+                        default=(datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"),
+                        help="回测结束日期 (YYYY-MM-DD)")
+    parser.add_argument("--every", type=int, default=5, help="每隔多少个交易日决策一次")
+    parser.add_argument("--lookback-days", type=int, default=365, help="每次分析使用的历史天数")
+    parser.add_argument("--cash", type=float, default=100000.0, help="初始现金")
+    parser.add_argument("--model", type=str, default="qwen", choices=["gemini", "openai", "qwen"], help="使用的模型")
+    parser.add_argument("--news", type=int, default=5, help="情绪分析的新闻数量")
+    parser.add_argument("--date-workers", type=int, default=4, help="同时运行的决策日数")
+    parser.add_argument("--workers", type=int, default=4, help="每个决策日内同时执行的最大分析步骤数")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="全局同时在途的 LLM 请求数")
+    parser.add_argument("--rpm", type=float, default=None, help="全局每分钟 LLM 请求数上限")
+    parser.add_argument("--cache", type=str, default=LLM_CACHE_PATH, help="LLM 响应缓存文件")
+    parser.add_argument("--no-cache", action="store_true", help="不使用 LLM 响应缓存")
+    parser.add_argument("--output-dir", type=str, default="results/backtest", help="结果目录")
+    args = parser.parse_args()
+
+    report = run_backtest(
+        ticker=args.ticker,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        every=args.every,
+        lookback_days=args.lookback_days,
+        initial_cash=args.cash,
+        num_of_news=args.news,
+        model_name=args.model,
+        date_workers=args.date_workers,
+        step_workers=args.workers,
+        max_llm_concurrency=args.llm_concurrency,
+        requests_per_minute=args.rpm,
+        cache_path=None if args.no_cache else args.cache,
+        output_dir=args.output_dir
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+多股票批量分析
+
+复用代理和模型客户端、全市场数据只下载一次、多只股票并发分析，
+所有 LLM 调用受同一个并发/速率限制器约束，每完成一只股票即把决策追加写入结果文件。
+"""
+import json
+import logging
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.agents.base_agent import BaseAgent
+from src.main import create_agents, run_investment_analysis
+from src.models import TradingDecision
+from src.tools.data_helper import get_market_snapshot
+from src.tools.rate_limit import LLMLimiter
+
+logger = logging.getLogger("Batch")
+
+
+class AgentPool:
+    """代理池：每只股票独占一套代理，分析结束后清空记忆并放回池中"""
+
+    def __init__(self, size: int, show_reasoning: bool = False, model_name: str = "gemini"):
+        """初始化代理池
+
+        Args:
+            size: 代理套数，即可同时分析的股票数
+            show_reasoning: 是否显示推理过程
+            model_name: 使用的模型名称 (gemini, openai, qwen)
+        """
+        self._agents: "queue.Queue[Dict[str, BaseAgent]]" = queue.Queue()
+        for _ in range(size):
+            self._agents.put(create_agents(show_reasoning=show_reasoning, model_name=model_name))
+
+    @contextmanager
+    def acquire(self) -> Iterator[Dict[str, BaseAgent]]:
+        agents = self._agents.get()
+        try:
+            yield agents
+        finally:
+            for agent in agents.values():
+                agent.reset()
+            self._agents.put(agents)
+
+
+def load_tickers(tickers: Optional[List[str]] = None, tickers_file: Optional[str] = None) -> List[str]:
+    """
+    合并命令行与文件中的股票代码，去重并保持顺序
+
+    文件每行一个或多个代码（逗号或空白分隔），# 开头的行为注释。
+    """
+    items: List[str] = list(tickers or [])
+    if tickers_file:
+        with open(tickers_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0]
+                items.extend(line.replace(",", " ").split())
+    return list(dict.fromkeys(t.strip() for t in items if t.strip()))
+
+
+def _completed_tickers(output: str) -> set:
+    """已写入结果文件的股票代码，用于断点续跑"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["ticker"])
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return done
+
+
+def run_batch(
+    tickers: List[str],
+    output: str = "results/batch_decisions.jsonl",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    portfolio: Optional[Dict[str, Any]] = None,
+    num_of_news: int = 5,
+    model_name: str = "gemini",
+    show_reasoning: bool = False,
+    ticker_workers: int = 4,
+    step_workers: int = 4,
+    max_llm_concurrency: int = 8,
+    requests_per_minute: Optional[float] = None,
+    resume: bool = True
+) -> Dict[str, TradingDecision]:
+    """
+    批量分析多只股票
+
+    Args:
+        tickers: 股票代码列表
+        output: 结果文件 (JSON Lines)，每完成一只股票追加一行
+        start_date: 开始日期 (YYYY-MM-DD)
+        end_date: 结束日期 (YYYY-MM-DD)
+        portfolio: 每只股票的初始投资组合状态
+        num_of_news: 情绪分析使用的新闻数量
+        model_name: 使用的模型名称 (gemini, openai, qwen)
+        show_reasoning: 是否显示推理过程
+        ticker_workers: 同时分析的股票数
+        step_workers: 每只股票内同时执行的分析步骤数
+        max_llm_concurrency: 全局同时在途的 LLM 请求数
+        requests_per_minute: 全局每分钟 LLM 请求数上限，为空时不限速
+        resume: 跳过结果文件中已有的股票
+
+    Returns:
+        Dict[str, TradingDecision]: 本次完成的股票代码 -> 交易决策
+    """
+    if resume:
+        done = _completed_tickers(output)
+        if done:
+            logger.info(f"跳过已完成的 {len(done)} 只股票")
+        tickers = [t for t in tickers if t not in done]
+    if not tickers:
+        return {}
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    # 全市场数据只下载一次，之后各股票的数据辅助函数直接复用
+    get_market_snapshot()
+
+    BaseAgent.set_llm_limiter(LLMLimiter(max_llm_concurrency, requests_per_minute))
+    pool = AgentPool(min(ticker_workers, len(tickers)), show_reasoning, model_name)
+
+    def analyze(ticker: str) -> Tuple[TradingDecision, float]:
+        with pool.acquire() as agents:
+            start = time.perf_counter()
+            decision = run_investment_analysis(
+                ticker=ticker,
+                start_date=start_date,
+                end_date=end_date,
+                portfolio=dict(portfolio) if portfolio else None,
+                show_reasoning=show_reasoning,
+                num_of_news=num_of_news,
+                model_name=model_name,
+                agents=agents,
+                max_workers=step_workers,
+                raise_errors=True
+            )
+            return decision, time.perf_counter() - start
+
+    decisions: Dict[str, TradingDecision] = {}
+    batch_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=ticker_workers, thread_name_prefix="ticker") as executor, \
+                open(output, "a", encoding="utf-8") as f:
+            futures = {executor.submit(analyze, t): t for t in tickers}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    decision, elapsed = future.result()
+                except Exception as e:
+                    # 出错的股票不写入结果文件，续跑时会重新分析
+                    logger.error(f"{ticker} 分析失败: {str(e)}")
+                    continue
+                decisions[ticker] = decision
+                f.write(json.dumps({
+                    "ticker": ticker,
+                    "decision": decision.dict(),
+                    "elapsed_s": round(elapsed, 2)
+                }, ensure_ascii=False) + "\n")
+                f.flush()
+                logger.info(f"[{len(decisions)}/{len(tickers)}] {ticker}: {decision.action} {decision.quantity}")
+    finally:
+        BaseAgent.set_llm_limiter(None)
+
+    logger.info(f"批量分析完成: {len(decisions)}/{len(tickers)} 只股票，用时 {time.perf_counter() - batch_start:.1f} 秒")
+    return decisions
@@ -14,6 +14,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 
+from src.agents.base_agent import BaseAgent
 from src.agents.market_data_agent import MarketDataAgent
 from src.agents.technical_analyst import TechnicalAnalystAgent
 from src.agents.fundamentals_analyst import FundamentalsAnalystAgent
@@ -25,6 +26,8 @@ from src.agents.debate_room import DebateRoomAgent
 from src.agents.risk_manager import RiskManagerAgent
 from src.agents.portfolio_manager import PortfolioManagerAgent
 from src.models import Portfolio, TradingDecision, AnalysisSignal, StockData
+from src.pipeline import Node, run_dag
+from src.tools.response_cache import LLM_CACHE_PATH, ResponseCache
 
 # 设置日志
 logging.basicConfig(
@@ -38,6 +41,155 @@ logging.basicConfig(
 logger = logging.getLogger("Main")
 
 
+def create_agents(show_reasoning: bool = False, model_name: str = "gemini") -> Dict[str, Any]:
+    """
+    创建投资分析流程使用的全部代理
+
+    Args:
+        show_reasoning: 是否显示推理过程
+        model_name: 使用的模型名称 (gemini, openai, qwen)
+
+    Returns:
+        Dict[str, Any]: 节点名 -> 代理
+    """
+    return {
+        "market_data": MarketDataAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "technical": TechnicalAnalystAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "fundamentals": FundamentalsAnalystAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "sentiment": SentimentAnalystAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "valuation": ValuationAnalystAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "bull": ResearcherBullAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "bear": ResearcherBearAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "debate": DebateRoomAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "risk": RiskManagerAgent(show_reasoning=show_reasoning, model_name=model_name),
+        "portfolio": PortfolioManagerAgent(show_reasoning=show_reasoning, model_name=model_name),
+    }
+
+
+def _messages(results: Dict[str, Any], *deps: str) -> List[Any]:
+    """合并依赖节点产生的消息"""
+    messages: List[Any] = []
+    for dep in deps:
+        messages.extend(results[dep].get("messages", []))
+    return messages
+
+
+def build_analysis_graph(data: Dict[str, Any], agents: Dict[str, Any]) -> Dict[str, Node]:
+    """
+    构建投资分析的依赖图
+
+    市场数据 → 技术/基本面/情绪分析（并行）；估值只依赖基本面；
+    多头/空头研究员在四项分析完成后并行；随后依次为辩论、风险评估和投资组合决策。
+
+    Args:
+        data: 初始数据 (ticker, start_date, end_date, portfolio, num_of_news)
+        agents: create_agents 创建的代理
+
+    Returns:
+        Dict[str, Node]: 节点定义，交给 run_dag 执行
+    """
+    portfolio = data["portfolio"]
+    analyses = ["technical", "fundamentals", "sentiment", "valuation"]
+
+    def stock_data(r):
+        return r["market_data"]["stock_data"]
+
+    def market_data(r):
+        logger.info("获取市场数据")
+        result = agents["market_data"].process(data)
+        if not result.get("stock_data"):
+            raise ValueError("市场数据代理未返回股票数据")
+        return result
+
+    def technical(r):
+        logger.info("进行技术分析")
+        return agents["technical"].process({
+            "stock_data": stock_data(r),
+            "messages": _messages(r, "market_data"),
+        })
+
+    def fundamentals(r):
+        logger.info("进行基本面分析")
+        return agents["fundamentals"].process({
+            "stock_data": stock_data(r),
+            "messages": _messages(r, "market_data"),
+        })
+
+    def sentiment(r):
+        logger.info("进行情绪分析")
+        return agents["sentiment"].process({
+            "stock_data": stock_data(r),
+            "messages": _messages(r, "market_data"),
+        })
+
+    def valuation(r):
+        logger.info("进行估值分析")
+        return agents["valuation"].process({
+            "stock_data": stock_data(r),
+            "fundamentals_analysis": r["fundamentals"].get("fundamentals_analysis"),
+            "messages": _messages(r, "fundamentals"),
+        })
+
+    def research_data(r):
+        return {
+            "stock_data": stock_data(r),
+            "technical_analysis": r["technical"].get("technical_analysis"),
+            "fundamentals_analysis": r["fundamentals"].get("fundamentals_analysis"),
+            "sentiment_analysis": r["sentiment"].get("sentiment_analysis"),
+            "valuation_analysis": r["valuation"].get("valuation_analysis"),
+            "messages": _messages(r, *analyses),
+        }
+
+    def bull(r):
+        logger.info("生成多头研究报告")
+        return agents["bull"].process(research_data(r))
+
+    def bear(r):
+        logger.info("生成空头研究报告")
+        return agents["bear"].process(research_data(r))
+
+    def debate(r):
+        logger.info("举行辩论会")
+        return agents["debate"].process({
+            "stock_data": stock_data(r),
+            "bull_research": r["bull"].get("bull_research"),
+            "bear_research": r["bear"].get("bear_research"),
+            "messages": _messages(r, "bull", "bear"),
+        })
+
+    def risk(r):
+        logger.info("进行风险评估")
+        return agents["risk"].process({
+            "stock_data": stock_data(r),
+            "debate_result": r["debate"].get("debate_result"),
+            "portfolio": portfolio,
+            "messages": _messages(r, "debate"),
+        })
+
+    def portfolio_decision(r):
+        logger.info("制定最终投资决策")
+        return agents["portfolio"].process({
+            **research_data(r),
+            "debate_result": r["debate"].get("debate_result"),
+            "risk_analysis": r["risk"].get("risk_analysis"),
+            "portfolio": portfolio,
+            "messages": _messages(r, "risk"),
+        })
+
+    return {
+        "market_data": ([], market_data),
+        "technical": (["market_data"], technical),
+        "fundamentals": (["market_data"], fundamentals),
+        "sentiment": (["market_data"], sentiment),
+        "valuation": (["fundamentals"], valuation),
+        "bull": (analyses, bull),
+        "bear": (analyses, bear),
+        "debate": (["bull", "bear"], debate),
+        "risk": (["debate"], risk),
+        "portfolio": (analyses + ["debate", "risk"], portfolio_decision),
+    }
+
+
 def run_investment_analysis(
     ticker: str,
     start_date: Optional[str] = None,
@@ -45,11 +197,16 @@ def run_investment_analysis(
     portfolio: Optional[Dict[str, Any]] = None,
     show_reasoning: bool = False,
     num_of_news: int = 5,
-    model_name: str = "gemini"
+    model_name: str = "gemini",
+    agents: Optional[Dict[str, Any]] = None,
+    max_workers: int = 4,
+    raise_errors: bool = False
 ) -> TradingDecision:
     """
     运行投资分析流程
-    
+
+    各步骤按依赖图并发执行：技术、基本面、情绪分析并行，多头与空头研究员并行。
+
     Args:
         ticker: 股票代码
         start_date: 开始日期 (YYYY-MM-DD)
@@ -58,7 +215,11 @@ def run_investment_analysis(
         show_reasoning: 是否显示推理过程
         num_of_news: 情绪分析使用的新闻数量
         model_name: 使用的模型名称 (gemini, openai, qwen)
-        
+        agents: 复用的代理（见 create_agents），为空时新建
+        max_workers: 同时执行的最大步骤数
+        raise_errors: 出错时抛出异常，而不是返回默认的 hold 决策（批量分析、回测使用，
+            避免把出错的默认决策当作真实决策保存或模拟）
+
     Returns:
         TradingDecision: 交易决策
     """
@@ -85,133 +246,23 @@ def run_investment_analysis(
     }
     
     # 创建代理
-    market_data_agent = MarketDataAgent(show_reasoning=show_reasoning, model_name=model_name)
-    technical_analyst = TechnicalAnalystAgent(show_reasoning=show_reasoning, model_name=model_name)
-    fundamentals_analyst = FundamentalsAnalystAgent(show_reasoning=show_reasoning, model_name=model_name)
-    sentiment_analyst = SentimentAnalystAgent(show_reasoning=show_reasoning, model_name=model_name)
-    valuation_analyst = ValuationAnalystAgent(show_reasoning=show_reasoning, model_name=model_name)
-    researcher_bull = ResearcherBullAgent(show_reasoning=show_reasoning, model_name=model_name)
-    researcher_bear = ResearcherBearAgent(show_reasoning=show_reasoning, model_name=model_name)
-    debate_room = DebateRoomAgent(show_reasoning=show_reasoning, model_name=model_name)
-    risk_manager = RiskManagerAgent(show_reasoning=show_reasoning, model_name=model_name)
-    portfolio_manager = PortfolioManagerAgent(show_reasoning=show_reasoning, model_name=model_name)
+    if agents is None:
+        agents = create_agents(show_reasoning=show_reasoning, model_name=model_name)
+    # 各代理出错时是否抛出而不是返回默认结果，否则限流、网络等故障会被当作正常的 hold 决策
+    for agent in agents.values():
+        agent.raise_errors = raise_errors
     
     try:
-        # 第一步: 获取市场数据
-        logger.info("步骤1: 获取市场数据")
-        market_data_result = market_data_agent.process(data)
-        
-        # 提取股票数据
-        stock_data = market_data_result.get("stock_data")
-        if not stock_data:
-            raise ValueError("市场数据代理未返回股票数据")
-        
-        # 第二步: 技术分析
-        logger.info("步骤2: 进行技术分析")
-        technical_data = {
-            "stock_data": stock_data,
-            "messages": market_data_result.get("messages", [])
-        }
-        technical_result = technical_analyst.process(technical_data)
-        technical_analysis = technical_result.get("technical_analysis")
-        
-        # 第三步: 基本面分析
-        logger.info("步骤3: 进行基本面分析")
-        fundamentals_data = {
-            "stock_data": stock_data,
-            "messages": technical_result.get("messages", [])
-        }
-        fundamentals_result = fundamentals_analyst.process(fundamentals_data)
-        fundamentals_analysis = fundamentals_result.get("fundamentals_analysis")
-        
-        # 第四步: 情绪分析
-        logger.info("步骤4: 进行情绪分析")
-        sentiment_data = {
-            "stock_data": stock_data,
-            "messages": fundamentals_result.get("messages", [])
-        }
-        sentiment_result = sentiment_analyst.process(sentiment_data)
-        sentiment_analysis = sentiment_result.get("sentiment_analysis")
-        
-        # 第五步: 估值分析
-        logger.info("步骤5: 进行估值分析")
-        valuation_data = {
-            "stock_data": stock_data,
-            "fundamentals_analysis": fundamentals_analysis,
-            "messages": sentiment_result.get("messages", [])
-        }
-        valuation_result = valuation_analyst.process(valuation_data)
-        valuation_analysis = valuation_result.get("valuation_analysis")
-        
-        # 第六步: 多头研究员报告
-        logger.info("步骤6: 生成多头研究报告")
-        bull_data = {
-            "stock_data": stock_data,
-            "technical_analysis": technical_analysis,
-            "fundamentals_analysis": fundamentals_analysis,
-            "sentiment_analysis": sentiment_analysis,
-            "valuation_analysis": valuation_analysis,
-            "messages": valuation_result.get("messages", [])
-        }
-        bull_result = researcher_bull.process(bull_data)
-        bull_research = bull_result.get("bull_research")
-        
-        # 第七步: 空头研究员报告
-        logger.info("步骤7: 生成空头研究报告")
-        bear_data = {
-            "stock_data": stock_data,
-            "technical_analysis": technical_analysis,
-            "fundamentals_analysis": fundamentals_analysis,
-            "sentiment_analysis": sentiment_analysis,
-            "valuation_analysis": valuation_analysis,
-            "messages": bull_result.get("messages", [])
-        }
-        bear_result = researcher_bear.process(bear_data)
-        bear_research = bear_result.get("bear_research")
-        
-        # 第八步: 辩论室
-        logger.info("步骤8: 举行辩论会")
-        debate_data = {
-            "stock_data": stock_data,
-            "bull_research": bull_research,
-            "bear_research": bear_research,
-            "messages": bear_result.get("messages", [])
-        }
-        debate_result = debate_room.process(debate_data)
-        debate_signal = debate_result.get("debate_result")
-        
-        # 第九步: 风险评估
-        logger.info("步骤9: 进行风险评估")
-        risk_data = {
-            "stock_data": stock_data,
-            "debate_result": debate_signal,
-            "portfolio": portfolio,
-            "messages": debate_result.get("messages", [])
-        }
-        risk_result = risk_manager.process(risk_data)
-        risk_analysis = risk_result.get("risk_analysis")
-        
-        # 第十步: 投资组合管理
-        logger.info("步骤10: 制定最终投资决策")
-        portfolio_data = {
-            "stock_data": stock_data,
-            "technical_analysis": technical_analysis,
-            "fundamentals_analysis": fundamentals_analysis,
-            "sentiment_analysis": sentiment_analysis,
-            "valuation_analysis": valuation_analysis,
-            "debate_result": debate_signal,
-            "risk_analysis": risk_analysis,
-            "portfolio": portfolio,
-            "messages": risk_result.get("messages", [])
-        }
-        portfolio_result = portfolio_manager.process(portfolio_data)
-        trading_decision = portfolio_result.get("trading_decision")
+        results = run_dag(build_analysis_graph(data, agents), max_workers=max_workers)
+        trading_decision = results["portfolio"].get("trading_decision")
         
         logger.info(f"投资分析完成，决策: {trading_decision.action}, 数量: {trading_decision.quantity}")
         return trading_decision
         
     except Exception as e:
         logger.error(f"投资分析过程中发生错误: {str(e)}")
+        if raise_errors:
+            raise
         
         # 返回默认决策
         default_decision = TradingDecision(
@@ -279,7 +330,13 @@ def main():
     """主函数"""
     # 解析命令行参数
     parser = argparse.ArgumentParser(description="基于Camel框架的A股投资代理系统")
-    parser.add_argument("--ticker", type=str, required=True, help="股票代码")
+    parser.add_argument("--ticker", type=str, help="股票代码")
+    parser.add_argument("--tickers", type=str, nargs="+", help="批量模式：多个股票代码")
+    parser.add_argument("--tickers-file", type=str, help="批量模式：股票代码文件，每行一个")
+    parser.add_argument("--output", type=str, default="results/batch_decisions.jsonl", help="批量模式：决策结果文件 (JSON Lines)")
+    parser.add_argument("--ticker-workers", type=int, default=4, help="批量模式：同时分析的股票数")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="批量模式：全局同时在途的 LLM 请求数")
+    parser.add_argument("--rpm", type=float, default=None, help="批量模式：全局每分钟 LLM 请求数上限")
     parser.add_argument("--start-date", type=str, help="开始日期 (YYYY-MM-DD)")
     parser.add_argument("--end-date", type=str, help="结束日期 (YYYY-MM-DD)")
     parser.add_argument("--cash", type=float, default=100000.0, help="初始现金")
@@ -287,10 +344,43 @@ def main():
     parser.add_argument("--model", type=str, default="qwen", choices=["gemini", "openai", "qwen"], help="使用的模型")
     parser.add_argument("--news", type=int, default=10, help="情绪分析的新闻数量")
     parser.add_argument("--show-reasoning", action="store_true", help="显示详细推理过程")
+    parser.add_argument("--workers", type=int, default=4, help="同时执行的最大分析步骤数")
+    parser.add_argument("--full-series", action="store_true", help="提示词中包含完整的逐日价格和指标序列（默认只发送特征摘要）")
+    parser.add_argument("--cache", nargs="?", const=LLM_CACHE_PATH, default=None,
+                        help=f"缓存各代理的分析结果，输入数据不变时直接复用（可指定 SQLite 文件，默认 {LLM_CACHE_PATH}）")
+    parser.add_argument("--cache-ttl", type=float, default=24.0, help="分析结果缓存有效期（小时）")
     parser.add_argument("--test", action="store_true", help="以测试模式运行，使用默认参数")
     
     args = parser.parse_args()
     
+    BaseAgent.full_series = args.full_series
+    if args.cache:
+        BaseAgent.set_result_cache(ResponseCache(args.cache), ttl=args.cache_ttl * 3600)
+    
+    # 批量模式
+    if args.tickers or args.tickers_file:
+        from src.batch import load_tickers, run_batch
+        
+        decisions = run_batch(
+            tickers=load_tickers(args.tickers, args.tickers_file),
+            output=args.output,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            portfolio={"cash": args.cash, "stock": args.stock},
+            num_of_news=args.news,
+            model_name=args.model,
+            show_reasoning=args.show_reasoning,
+            ticker_workers=args.ticker_workers,
+            step_workers=args.workers,
+            max_llm_concurrency=args.llm_concurrency,
+            requests_per_minute=args.rpm
+        )
+        print(f"完成 {len(decisions)} 只股票，结果已写入 {args.output}")
+        return
+    
+    if not args.ticker:
+        parser.error("请指定 --ticker，或使用 --tickers/--tickers-file 进入批量模式")
+    
     # 测试模式
     if args.test:
         test(ticker=args.ticker, model_name=args.model)
@@ -309,7 +399,8 @@ def main():
         portfolio=portfolio,
         show_reasoning=args.show_reasoning,
         num_of_news=args.news,
-        model_name=args.model
+        model_name=args.model,
+        max_workers=args.workers
     )
     
     print(json.dumps(decision.dict(), indent=2, ensure_ascii=False))
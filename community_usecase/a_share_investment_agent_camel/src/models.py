@@ -76,6 +76,7 @@ class RiskAnalysis(BaseModel):
     max_drawdown: float
     suggested_position_size: float
     reasoning: Optional[str] = None
+    metrics: Dict[str, Any] = Field(default_factory=dict)  # 本地计算的风险指标（见 src.tools.risk_metrics）
 
 
 class ResearchReport(BaseModel):
@@ -87,4 +88,70 @@ class ResearchReport(BaseModel):
     fundamental_summary: Optional[str] = None
     sentiment_summary: Optional[str] = None
     valuation_summary: Optional[str] = None
-    reasoning: Optional[str] = None 
\ No newline at end of file
+    reasoning: Optional[str] = None 
+
+# 代理输出结构：各代理要求模型返回的 JSON 格式，用于结构化输出和结果校验
+
+
+class SignalOutput(BaseModel):
+    """分析师输出的交易信号"""
+    signal: str  # bullish, bearish, neutral
+    confidence: float  # 0.0 - 1.0
+    reasoning: str = ""
+
+
+class TechnicalOutput(SignalOutput):
+    """技术分析输出"""
+    key_indicators: List[Any] = Field(default_factory=list)
+
+
+class FundamentalsOutput(SignalOutput):
+    """基本面分析输出"""
+    key_financials: List[Any] = Field(default_factory=list)
+
+
+class SentimentOutput(SignalOutput):
+    """情绪分析输出"""
+    key_events: List[Any] = Field(default_factory=list)
+
+
+class ValuationOutput(SignalOutput):
+    """估值分析输出"""
+    fair_value: Optional[float] = 0.0
+    key_metrics: List[Any] = Field(default_factory=list)
+
+
+class ResearchOutput(BaseModel):
+    """研究员输出"""
+    key_points: List[str]
+    confidence: float
+    technical_summary: Optional[str] = None
+    fundamental_summary: Optional[str] = None
+    sentiment_summary: Optional[str] = None
+    valuation_summary: Optional[str] = None
+    reasoning: str = ""
+
+
+class DebateOutput(SignalOutput):
+    """辩论室输出"""
+    bull_key_strengths: List[Any] = Field(default_factory=list)
+    bull_key_weaknesses: List[Any] = Field(default_factory=list)
+    bear_key_strengths: List[Any] = Field(default_factory=list)
+    bear_key_weaknesses: List[Any] = Field(default_factory=list)
+    final_verdict: str = ""
+
+
+class RiskOutput(BaseModel):
+    """风险管理输出（波动率、回撤等统计量在本地计算，不由模型给出）"""
+    max_position_size: float
+    risk_score: float  # 0.0 - 1.0
+    suggested_position_size: float
+    reasoning: str = ""
+
+
+class TradeOutput(BaseModel):
+    """投资组合经理输出的交易行动"""
+    action: str  # buy, sell, hold
+    quantity: int
+    confidence: float
+    reasoning: str = ""
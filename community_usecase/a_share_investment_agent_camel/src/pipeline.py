@@ -0,0 +1,78 @@
+"""
+依赖图（DAG）执行器
+
+每个节点声明其依赖的节点和处理函数；依赖全部完成的节点立即提交到线程池并发执行，
+因此互不依赖的代理（如技术/基本面/情绪分析师）可以同时调用 LLM。
+"""
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger("Pipeline")
+
+# 节点定义: 名称 -> (依赖节点列表, 处理函数)；处理函数接收已完成节点的结果字典
+Node = Tuple[List[str], Callable[[Dict[str, Any]], Any]]
+
+
+def _check_graph(nodes: Dict[str, Node]) -> None:
+    """检查依赖是否都存在且无环"""
+    for name, (deps, _) in nodes.items():
+        missing = [d for d in deps if d not in nodes]
+        if missing:
+            raise ValueError(f"节点 {name} 依赖了不存在的节点: {missing}")
+
+    done: set = set()
+    remaining = dict(nodes)
+    while remaining:
+        ready = [n for n, (deps, _) in remaining.items() if all(d in done for d in deps)]
+        if not ready:
+            raise ValueError(f"依赖图中存在环: {sorted(remaining)}")
+        for n in ready:
+            done.add(n)
+            del remaining[n]
+
+
+def run_dag(nodes: Dict[str, Node], max_workers: int = 4) -> Dict[str, Any]:
+    """按依赖关系并发执行节点
+
+    Args:
+        nodes: 节点定义，名称 -> (依赖节点列表, 处理函数)
+        max_workers: 最大并发节点数
+
+    Returns:
+        Dict[str, Any]: 各节点的结果
+
+    Raises:
+        Exception: 任一节点抛出的异常（其余已提交的节点会先执行完）
+    """
+    _check_graph(nodes)
+
+    results: Dict[str, Any] = {}
+    pending = dict(nodes)
+    running: Dict[Future, Tuple[str, float]] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dag") as pool:
+        while pending or running:
+            ready = [n for n, (deps, _) in pending.items() if all(d in results for d in deps)]
+            for name in ready:
+                _, fn = pending.pop(name)
+                logger.info(f"开始节点: {name}")
+                # 传入结果快照，节点只读取其依赖的结果；复制上下文以传递回测时点等 contextvars
+                ctx = contextvars.copy_context()
+                running[pool.submit(ctx.run, fn, dict(results))] = (name, time.perf_counter())
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, start = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"节点 {name} 失败: {error}")
+                    for other in running:
+                        other.cancel()
+                    raise error
+                results[name] = future.result()
+                logger.info(f"完成节点: {name}，用时 {time.perf_counter() - start:.1f} 秒")
+
+    return results
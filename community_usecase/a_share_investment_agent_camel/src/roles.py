@@ -10,6 +10,7 @@ from camel.types import ModelType, ModelPlatformType
 from camel.configs.qwen_config import QwenConfig
 from camel.configs.openai_config import ChatGPTConfig
 import os
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
@@ -190,6 +191,24 @@ def get_model_config(model_name: str = "gemini") -> tuple:
         raise ValueError(f"不支持的模型: {model_name}，支持的模型: gemini, openai, qwen")
 
 
+@lru_cache(maxsize=None)
+def get_model(model_name: str = "gemini"):
+    """获取模型客户端，每个模型只创建一次
+    
+    Args:
+        model_name: 模型名称 (gemini, openai, qwen)
+        
+    Returns:
+        BaseModelBackend: 模型客户端
+    """
+    model_platform, model_type, model_config = get_model_config(model_name)
+    return ModelFactory.create(
+        model_platform=model_platform,
+        model_type=model_type,
+        model_config_dict=model_config
+    )
+
+
 # 创建角色代理工厂函数
 def create_role_agent(role: str, model_name: str = "gemini") -> ChatAgent:
     """创建特定角色的代理
@@ -201,9 +220,6 @@ def create_role_agent(role: str, model_name: str = "gemini") -> ChatAgent:
     Returns:
         ChatAgent: 创建的角色代理
     """
-    # 获取模型配置
-    model_platform, model_type, model_config = get_model_config(model_name)
-    
     # 获取角色的系统提示
     role_prompts = {
         "market_data_analyst": MARKET_DATA_ANALYST_PROMPT,
@@ -237,12 +253,8 @@ def create_role_agent(role: str, model_name: str = "gemini") -> ChatAgent:
     
     display_name = display_names.get(role, role)
     
-    # 创建模型
-    model = ModelFactory.create(
-        model_platform=model_platform,
-        model_type=model_type,
-        model_config_dict=model_config
-    )
+    # 同一模型的客户端在所有代理间共享
+    model = get_model(model_name)
     
     # 创建并返回代理
     return ChatAgent(
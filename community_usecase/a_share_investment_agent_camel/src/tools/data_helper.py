@@ -5,10 +5,120 @@ import pandas as pd
 import akshare as ak
 from datetime import datetime, timedelta
 import logging
+import threading
+import time
 from typing import Dict, Any, List, Optional
 
+from src.tools.financial_reports import FINANCIAL_INDICATORS, INCOME_STATEMENT, get_report_fetcher
+from src.tools.indicators import compute_indicators
+from src.tools.point_in_time import available_news, get_as_of
+from src.tools.price_store import COLUMN_MAPPINGS, get_adjusted_bars, get_price_store
+
 logger = logging.getLogger(__name__)
 
+# 全市场实时行情快照的缓存时间（秒），超时后下一次访问重新下载
+SNAPSHOT_TTL_SECONDS = 60
+
+
+class MarketSnapshot:
+    """
+    全市场A股实时行情快照缓存 (stock_zh_a_spot_em)
+    
+    快照在 ttl 秒内最多下载一次，并按股票代码建立字典索引，单只股票的查询为 O(1)。
+    线程安全：并发访问时只有一个线程负责下载，其余线程等待后直接复用结果。
+    """
+    
+    def __init__(self, ttl: float = SNAPSHOT_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._df: Optional[pd.DataFrame] = None
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at = 0.0
+    
+    def _ensure_fresh(self, refresh: bool = False) -> None:
+        with self._lock:
+            if not refresh and self._df is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return
+            logger.info("下载全市场实时行情快照")
+            df = ak.stock_zh_a_spot_em()
+            self._index = dict(zip(df['代码'].astype(str), df.to_dict('records')))
+            self._df = df
+            self._fetched_at = time.monotonic()
+    
+    def frame(self, refresh: bool = False) -> pd.DataFrame:
+        """全市场实时行情 DataFrame"""
+        self._ensure_fresh(refresh)
+        return self._df
+    
+    def quote(self, ticker: str, refresh: bool = False) -> Dict[str, Any]:
+        """单只股票的实时行情，未找到时返回空字典"""
+        self._ensure_fresh(refresh)
+        return dict(self._index.get(ticker, {}))
+
+
+# 所有数据辅助函数与代理共享同一份快照
+_market_snapshot = MarketSnapshot()
+
+
+def get_market_snapshot(refresh: bool = False) -> pd.DataFrame:
+    """
+    获取全市场A股实时行情快照 (stock_zh_a_spot_em)，缓存 SNAPSHOT_TTL_SECONDS 秒
+    
+    Args:
+        refresh: 是否强制重新下载
+        
+    Returns:
+        pd.DataFrame: 全市场实时行情
+    """
+    return _market_snapshot.frame(refresh)
+
+
+def get_stock_quote(ticker: str, refresh: bool = False) -> Dict[str, Any]:
+    """
+    从共享快照中按代码查询单只股票的实时行情
+    
+    Args:
+        ticker: 股票代码
+        refresh: 是否强制重新下载快照
+        
+    Returns:
+        Dict[str, Any]: 实时行情字段（名称、最新价、市盈率-动态等），未找到时为空字典
+    """
+    quote = _market_snapshot.quote(ticker, refresh)
+    stamp = get_as_of()
+    if stamp is not None and quote:
+        return _point_in_time_quote(ticker, quote.get("名称", ""), stamp)
+    return quote
+
+
+def _point_in_time_quote(ticker: str, name: str, stamp: pd.Timestamp) -> Dict[str, Any]:
+    """
+    回测时以时点日期的不复权日线代替实时行情
+
+    市盈率、市净率、市值等依赖当日股本和财报的字段无法从日线还原，不提供。
+    """
+    start = (stamp - timedelta(days=15)).strftime("%Y-%m-%d")
+    bars = get_price_store(adjust="").get(ticker, start, stamp.strftime("%Y-%m-%d"))
+    if bars.empty:
+        return {"代码": ticker, "名称": name}
+    bar = bars.iloc[-1]
+    prev_close = bars.iloc[-2]["close"] if len(bars) > 1 else None
+    return {
+        "代码": ticker,
+        "名称": name,
+        "最新价": bar.get("close"),
+        "涨跌幅": bar.get("pct_change"),
+        "涨跌额": bar.get("change"),
+        "成交量": bar.get("volume"),
+        "成交额": bar.get("amount"),
+        "振幅": bar.get("amplitude"),
+        "最高": bar.get("high"),
+        "最低": bar.get("low"),
+        "今开": bar.get("open"),
+        "昨收": prev_close,
+        "换手率": bar.get("turnover"),
+    }
+
 
 def get_stock_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
     """
@@ -25,18 +135,9 @@ def get_stock_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
     try:
         logger.info(f"获取股票 {ticker} 的历史数据")
         
-        # 转换日期格式
-        start_date_fmt = datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y%m%d")
-        end_date_fmt = datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y%m%d")
-        
-        # 使用akshare获取A股历史数据
-        df = ak.stock_zh_a_hist(
-            symbol=ticker,
-            period="daily",
-            start_date=start_date_fmt,
-            end_date=end_date_fmt,
-            adjust="qfq"  # 前复权
-        )
+        # 从本地行情库读取复权日线（回测时以时点日期为基准），并还原 akshare 的中文列名
+        df = get_adjusted_bars(ticker, start_date, end_date)
+        df = df.rename(columns={v: k for k, v in COLUMN_MAPPINGS.items()})
         
         logger.info(f"成功获取历史数据，共 {len(df)} 条记录")
         return df
@@ -59,29 +160,17 @@ def get_fundamental_data(ticker: str) -> Dict[str, Any]:
     try:
         logger.info(f"获取股票 {ticker} 的基本面数据")
         
-        # 获取财务指标数据
-        financial_indicators = ak.stock_financial_analysis_indicator(symbol=ticker)
-        
-        # 获取利润表数据
-        try:
-            # 根据akshare文档修正
-            # stock参数格式应该为'sh'或'sz'+股票代码，而不是直接使用数字代码
-            stock_prefix = 'sz' if ticker.startswith('0') or ticker.startswith('3') else 'sh'
-            formatted_ticker = f"{stock_prefix}{ticker}"
-            # 必须传入symbol参数，设置为"利润表"
-            income_statement = ak.stock_financial_report_sina(stock=formatted_ticker, symbol="利润表")
-            logger.info(f"成功获取{ticker}的利润表数据")
-        except Exception as e:
-            logger.error(f"获取利润表数据时出错: {str(e)}")
-            income_statement = pd.DataFrame()
+        # 并发获取财务指标和利润表（共享缓存，获取失败时为空表）
+        reports = get_report_fetcher().fetch(ticker, [FINANCIAL_INDICATORS, INCOME_STATEMENT])
+        financial_indicators = reports[FINANCIAL_INDICATORS]
+        income_statement = reports[INCOME_STATEMENT]
         
         # 获取实时行情
-        real_time_quote = ak.stock_zh_a_spot_em()
-        stock_quote = real_time_quote[real_time_quote['代码'] == ticker]
+        stock_info = get_stock_quote(ticker)
         
         # 记录实时行情字段名，帮助调试
-        if not stock_quote.empty:
-            logger.info(f"实时行情数据字段: {stock_quote.columns.tolist()}")
+        if stock_info:
+            logger.info(f"实时行情数据字段: {list(stock_info.keys())}")
         
         # 提取关键财务指标
         latest_indicators = {}
@@ -93,11 +182,6 @@ def get_fundamental_data(ticker: str) -> Dict[str, Any]:
         if not income_statement.empty:
             income_data = income_statement.iloc[-1].to_dict()
         
-        # 股票基本信息
-        stock_info = {}
-        if not stock_quote.empty:
-            stock_info = stock_quote.iloc[0].to_dict()
-        
         logger.info(f"成功获取基本面数据")
         
         # 调整处理市场信息，确保字段名正确匹配
@@ -148,9 +232,7 @@ def get_stock_news(ticker: str, num_of_news: int = 5) -> List[Dict[str, Any]]:
         logger.info(f"获取股票 {ticker} 的新闻数据 (共{num_of_news}条)")
         
         # 获取股票名称
-        real_time_quote = ak.stock_zh_a_spot_em()
-        stock_quote = real_time_quote[real_time_quote['代码'] == ticker]
-        stock_name = stock_quote.iloc[0]['名称'] if not stock_quote.empty else ""
+        stock_name = get_stock_quote(ticker).get('名称', "")
         
         if not stock_name:
             logger.warning(f"无法获取股票 {ticker} 的名称")
@@ -163,11 +245,8 @@ def get_stock_news(ticker: str, num_of_news: int = 5) -> List[Dict[str, Any]]:
         if not news_df.empty:
             logger.info(f"新闻数据字段: {news_df.columns.tolist()}")
         
-        # 筛选最近的新闻
-        recent_news = news_df.head(min(num_of_news, len(news_df)))
-        
         news_list = []
-        for _, row in recent_news.iterrows():
+        for _, row in news_df.iterrows():
             news_list.append({
                 "title": row.get("新闻标题", ""),
                 "content": row.get("新闻内容", ""),
@@ -175,6 +254,9 @@ def get_stock_news(ticker: str, num_of_news: int = 5) -> List[Dict[str, Any]]:
                 "source": row.get("文章来源", "")  # 调整为正确的字段名
             })
         
+        # 回测时只保留时点日期前发布的新闻，再筛选最近的新闻
+        news_list = available_news(news_list)[:num_of_news]
+        
         logger.info(f"成功获取 {len(news_list)} 条新闻")
         return news_list
         
@@ -225,50 +307,19 @@ def calculate_technical_indicators(df: pd.DataFrame) -> Dict[str, Any]:
         if not volume_column:
             logger.warning("找不到有效的成交量列，将只计算价格相关指标")
         
-        # 提取收盘价和成交量数据
-        close_prices = df[price_column].values
-        volumes = df[volume_column].values if volume_column else None
-        
-        # 计算常用技术指标
-        indicators = {}
-        
-        # 1. 移动平均线
-        ma_windows = [5, 10, 20, 50, 200]
-        for window in ma_windows:
-            if len(close_prices) >= window:
-                ma = pd.Series(close_prices).rolling(window=window).mean().values
-                indicators[f"ma_{window}"] = ma.tolist()
-        
-        # 2. 相对强弱指数 (RSI)
-        if len(close_prices) >= 14:
-            delta = pd.Series(close_prices).diff()
-            gain = delta.clip(lower=0)
-            loss = -delta.clip(upper=0)
-            avg_gain = gain.rolling(window=14).mean()
-            avg_loss = loss.rolling(window=14).mean()
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-            indicators["rsi"] = rsi.values.tolist()
-        
-        # 3. MACD (移动平均收敛/发散)
-        if len(close_prices) >= 26:
-            exp12 = pd.Series(close_prices).ewm(span=12, adjust=False).mean()
-            exp26 = pd.Series(close_prices).ewm(span=26, adjust=False).mean()
-            macd = exp12 - exp26
-            signal = macd.ewm(span=9, adjust=False).mean()
-            indicators["macd"] = macd.values.tolist()
-            indicators["macd_signal"] = signal.values.tolist()
-            indicators["macd_histogram"] = (macd - signal).values.tolist()
-        
-        # 4. 布林带
-        if len(close_prices) >= 20:
-            ma20 = pd.Series(close_prices).rolling(window=20).mean()
-            std20 = pd.Series(close_prices).rolling(window=20).std()
-            upper_band = ma20 + (std20 * 2)
-            lower_band = ma20 - (std20 * 2)
-            indicators["bollinger_ma"] = ma20.values.tolist()
-            indicators["bollinger_upper"] = upper_band.values.tolist()
-            indicators["bollinger_lower"] = lower_band.values.tolist()
+        high_column = next((c for c in ["最高", "high"] if c in df.columns), None)
+        low_column = next((c for c in ["最低", "low"] if c in df.columns), None)
+        has_range = high_column is not None and low_column is not None
+        
+        # 一次向量化计算全部指标：移动平均线、RSI、MACD、布林带，
+        # 有最高/最低价时另算 ATR、KDJ、随机指标，有成交量时另算 OBV
+        indicators = compute_indicators(
+            df[price_column].to_numpy(dtype=float),
+            high=df[high_column].to_numpy(dtype=float) if has_range else None,
+            low=df[low_column].to_numpy(dtype=float) if has_range else None,
+            volume=df[volume_column].to_numpy(dtype=float) if volume_column else None
+        )
+        indicators = {key: values.tolist() for key, values in indicators.items()}
         
         logger.info("成功计算技术指标")
         return indicators
@@ -0,0 +1,277 @@
+"""
+市场数据特征摘要
+
+代理提示词默认不再包含逐日的价格和指标序列，而是固定大小的特征摘要：
+最新值、最近几根 K 线、区间收益、分位数、波动率、趋势斜率以及均线/MACD/KDJ 交叉信号。
+摘要大小与历史长度无关，一年的日线和一个月的日线生成的提示词长度相同。
+"""
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 摘要中保留的最近 K 线数
+RECENT_BARS = 10
+# 指标摘要中保留的最近值个数
+RECENT_INDICATOR_VALUES = 5
+# 查找交叉信号的回看天数
+CROSS_LOOKBACK = 20
+# 超过该长度的数值列表会被替换为统计摘要
+MAX_LIST_LENGTH = 20
+
+RETURN_HORIZONS = (1, 5, 20, 60, 120, 250)
+TRADING_DAYS = 252
+
+# (快线, 慢线, 名称)
+_CROSS_PAIRS = [
+    ("ma_5", "ma_20", "ma5_ma20"),
+    ("ma_20", "ma_50", "ma20_ma50"),
+    ("ma_50", "ma_200", "ma50_ma200"),
+    ("macd", "macd_signal", "macd_signal"),
+    ("kdj_k", "kdj_d", "kdj_k_d"),
+]
+
+
+def _num(x: Any, digits: int = 4) -> Optional[float]:
+    """转换为保留 digits 位小数的浮点数，NaN/无穷返回 None"""
+    try:
+        x = float(x)
+    except (TypeError, ValueError):
+        return None
+    return round(x, digits) if math.isfinite(x) else None
+
+
+def _is_numeric_list(values: Any) -> bool:
+    return isinstance(values, list) and all(
+        v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values
+    )
+
+
+def _array(values: Sequence) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _last_valid(x: np.ndarray) -> float:
+    valid = x[~np.isnan(x)]
+    return valid[-1] if valid.size else np.nan
+
+
+def _percentile_rank(x: np.ndarray, value: float) -> Optional[float]:
+    """value 在 x 的有效值中的百分位 (0-100)"""
+    valid = x[~np.isnan(x)]
+    if valid.size == 0 or not math.isfinite(value):
+        return None
+    return _num((valid <= value).mean() * 100, 1)
+
+
+def _trend(closes: np.ndarray, window: int) -> Optional[Dict[str, Optional[float]]]:
+    """最近 window 天对数价格的线性回归：年化斜率 (%) 与 R²"""
+    y = closes[-window:]
+    if y.size < window or np.isnan(y).any() or (y <= 0).any():
+        return None
+    y = np.log(y)
+    t = np.arange(window, dtype=float)
+    slope, intercept = np.polyfit(t, y, 1)
+    residual = y - (slope * t + intercept)
+    total = ((y - y.mean()) ** 2).sum()
+    r2 = 1 - (residual ** 2).sum() / total if total > 0 else 0.0
+    return {"annualized_slope_pct": _num(slope * TRADING_DAYS * 100, 2), "r2": _num(r2, 3)}
+
+
+def _volatility(closes: np.ndarray, window: int) -> Optional[float]:
+    """最近 window 天日对数收益率的年化波动率 (%)"""
+    if closes.size <= window:
+        return None
+    returns = np.diff(np.log(closes[-window - 1:]))
+    return _num(np.nanstd(returns, ddof=1) * math.sqrt(TRADING_DAYS) * 100, 2)
+
+
+def summarize_series(values: Sequence) -> Dict[str, Any]:
+    """通用数值序列摘要"""
+    x = _array(values)
+    valid = x[~np.isnan(x)]
+    if valid.size == 0:
+        return {"length": len(x)}
+    return {
+        "length": len(x),
+        "latest": _num(valid[-1]),
+        "min": _num(valid.min()),
+        "max": _num(valid.max()),
+        "mean": _num(valid.mean()),
+        "recent": [_num(v) for v in x[-RECENT_INDICATOR_VALUES:]],
+    }
+
+
+def summarize_prices(raw: Dict[str, List]) -> Dict[str, Any]:
+    """
+    价格历史特征摘要
+
+    Args:
+        raw: 包含 dates、prices（收盘价），可选 volumes、highs、lows 的逐日数据
+
+    Returns:
+        Dict[str, Any]: 固定大小的价格特征
+    """
+    closes = _array(raw.get("prices", []))
+    if closes.size == 0:
+        return {}
+    dates = raw.get("dates", [])
+    latest = closes[-1]
+    highs = _array(raw["highs"]) if len(raw.get("highs", [])) == closes.size else closes
+    lows = _array(raw["lows"]) if len(raw.get("lows", [])) == closes.size else closes
+    period_high, period_low = np.nanmax(highs), np.nanmin(lows)
+
+    features: Dict[str, Any] = {
+        "bars": int(closes.size),
+        "first_date": dates[0] if dates else None,
+        "last_date": dates[-1] if dates else None,
+        "latest_close": _num(latest),
+        "returns_pct": {
+            f"{h}d": _num((latest / closes[-1 - h] - 1) * 100, 2)
+            for h in RETURN_HORIZONS if closes.size > h
+        },
+        "period_high": _num(period_high),
+        "period_low": _num(period_low),
+        "drawdown_from_high_pct": _num((latest / period_high - 1) * 100, 2),
+        "position_in_range_pct": _num((latest - period_low) / (period_high - period_low) * 100, 1)
+        if period_high > period_low else None,
+        "close_percentile": _percentile_rank(closes, latest),
+        "volatility_pct": {f"{w}d": _volatility(closes, w) for w in (20, 60) if closes.size > w},
+        "trend": {f"{w}d": _trend(closes, w) for w in (20, 60) if closes.size >= w},
+    }
+
+    volumes = _array(raw.get("volumes", []))
+    if volumes.size == closes.size:
+        avg20 = np.nanmean(volumes[-20:])
+        features["volume"] = {
+            "latest": _num(volumes[-1], 0),
+            "avg_20d": _num(avg20, 0),
+            "latest_vs_avg_20d": _num(volumes[-1] / avg20, 2) if avg20 > 0 else None,
+            "percentile": _percentile_rank(volumes, volumes[-1]),
+        }
+
+    recent = slice(-RECENT_BARS, None)
+    features["recent_bars"] = [
+        {"date": d, "close": _num(c), **({"volume": _num(v, 0)} if volumes.size == closes.size else {})}
+        for d, c, v in zip(
+            dates[recent] if len(dates) == closes.size else [None] * len(closes[recent]),
+            closes[recent],
+            volumes[recent] if volumes.size == closes.size else [None] * len(closes[recent])
+        )
+    ]
+    return features
+
+
+def _last_cross(fast: np.ndarray, slow: np.ndarray) -> Optional[Dict[str, Any]]:
+    """最近 CROSS_LOOKBACK 天内快线与慢线的最后一次交叉"""
+    diff = fast - slow
+    sign = np.sign(diff)
+    n = sign.size
+    for i in range(n - 1, max(0, n - CROSS_LOOKBACK) - 1, -1):
+        if i == 0 or np.isnan(sign[i]) or np.isnan(sign[i - 1]):
+            continue
+        if sign[i] != sign[i - 1] and sign[i] != 0:
+            return {"type": "golden_cross" if sign[i] > 0 else "death_cross", "bars_ago": n - 1 - i}
+    return None
+
+
+def summarize_indicators(full: Dict[str, List], closes: Optional[Sequence] = None) -> Dict[str, Any]:
+    """
+    技术指标特征摘要
+
+    Args:
+        full: 指标名 -> 逐日数值列表
+        closes: 同期收盘价，用于计算布林带位置和价格相对均线的位置
+
+    Returns:
+        Dict[str, Any]: 各指标的最新值、最近值、5 日变化和历史分位数，以及交叉信号
+    """
+    series = {k: _array(v) for k, v in full.items() if _is_numeric_list(v) and v}
+    summary: Dict[str, Any] = {"indicators": {}, "signals": {}}
+
+    for key, x in series.items():
+        latest = _last_valid(x)
+        summary["indicators"][key] = {
+            "latest": _num(latest),
+            "recent": [_num(v) for v in x[-RECENT_INDICATOR_VALUES:]],
+            "change_5": _num(latest - x[-6]) if x.size > 5 else None,
+            "percentile": _percentile_rank(x, latest),
+        }
+
+    signals = summary["signals"]
+    for fast, slow, name in _CROSS_PAIRS:
+        if fast in series and slow in series:
+            state = _last_valid(series[fast] - series[slow])
+            signals[name] = {
+                "state": None if np.isnan(state) else ("above" if state > 0 else "below"),
+                "last_cross": _last_cross(series[fast], series[slow]),
+            }
+
+    if "rsi" in series:
+        rsi = _last_valid(series["rsi"])
+        signals["rsi_zone"] = "overbought" if rsi > 70 else "oversold" if rsi < 30 else "neutral"
+    if "kdj_j" in series:
+        j = _last_valid(series["kdj_j"])
+        signals["kdj_zone"] = "overbought" if j > 100 else "oversold" if j < 0 else "neutral"
+
+    if closes is not None and len(closes):
+        price = _array(closes)[-1]
+        for key in series:
+            if key.startswith("ma_"):
+                ma = _last_valid(series[key])
+                signals[f"price_vs_{key}_pct"] = _num((price / ma - 1) * 100, 2) if ma else None
+        if all(k in series for k in ["bollinger_upper", "bollinger_lower", "bollinger_ma"]):
+            upper = _last_valid(series["bollinger_upper"])
+            lower = _last_valid(series["bollinger_lower"])
+            mid = _last_valid(series["bollinger_ma"])
+            signals["bollinger_percent_b"] = _num((price - lower) / (upper - lower), 3) if upper > lower else None
+            signals["bollinger_bandwidth_pct"] = _num((upper - lower) / mid * 100, 2) if mid else None
+
+    return summary
+
+
+def _find_closes(data: Dict[str, Any]) -> Optional[List]:
+    """在同一层数据中查找价格历史的收盘价序列"""
+    for value in data.values():
+        if isinstance(value, dict) and isinstance(value.get("raw"), dict) and "prices" in value["raw"]:
+            return value["raw"]["prices"]
+    return None
+
+
+def digest_data(data: Any, closes: Optional[List] = None) -> Any:
+    """
+    将提示词数据中的逐日序列替换为特征摘要
+
+    - 含 raw.prices 的价格历史（MarketDataAgent 的 historical_data）-> 价格特征
+    - 含 full 的技术指标（MarketDataAgent 的 technical_indicators）-> 指标特征
+    - 其他长度超过 MAX_LIST_LENGTH 的数值列表 -> 统计摘要
+    其余数据原样保留。
+
+    Args:
+        data: 原始数据
+        closes: 上层传入的收盘价序列
+
+    Returns:
+        Any: 摘要后的数据
+    """
+    if isinstance(data, dict):
+        if isinstance(data.get("raw"), dict) and "prices" in data["raw"]:
+            digested = {k: digest_data(v) for k, v in data.items() if k != "raw"}
+            digested["features"] = summarize_prices(data["raw"])
+            return digested
+        if isinstance(data.get("full"), dict):
+            digested = {k: digest_data(v) for k, v in data.items() if k != "full"}
+            if isinstance(digested.get("latest"), dict):
+                # 最新值已包含在指标摘要中，只保留其余字段（如 price_vs_ma20）
+                digested["latest"] = {k: v for k, v in digested["latest"].items() if k not in data["full"]}
+            digested.update(summarize_indicators(data["full"], closes))
+            return digested
+        closes = _find_closes(data) or closes
+        return {k: digest_data(v, closes) for k, v in data.items()}
+    if isinstance(data, list):
+        if len(data) > MAX_LIST_LENGTH and _is_numeric_list(data):
+            return summarize_series(data)
+        return [digest_data(v, closes) for v in data]
+    if isinstance(data, float) and not math.isfinite(data):
+        return None
+    return data
@@ -0,0 +1,184 @@
+"""
+财务报表获取工具
+
+利润表、资产负债表、现金流量表和财务指标四个接口互不依赖，通过有界线程池并发下载。
+每只股票的每张报表缓存一段时间，并按报告期建立索引，同一进程内的各代理和各股票共享。
+多张报表按报告期向量化合并为季度宽表，代替逐行循环匹配。
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import akshare as ak
+import pandas as pd
+
+from src.tools.point_in_time import available_reports
+
+logger = logging.getLogger(__name__)
+
+INCOME_STATEMENT = "利润表"
+BALANCE_SHEET = "资产负债表"
+CASH_FLOW = "现金流量表"
+FINANCIAL_INDICATORS = "财务指标"
+ALL_REPORTS = (INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW, FINANCIAL_INDICATORS)
+
+# 报表缓存时间（秒）；报表只在发布新一期财报时变化，缓存期内不重复下载
+REPORT_TTL_SECONDS = 6 * 3600
+
+
+def sina_symbol(ticker: str) -> str:
+    """新浪财报接口的股票代码格式：sh/sz + 代码"""
+    stock_prefix = 'sz' if ticker.startswith('0') or ticker.startswith('3') else 'sh'
+    return f"{stock_prefix}{ticker}"
+
+
+def _date_column(report: str) -> str:
+    return "日期" if report == FINANCIAL_INDICATORS else "报告日"
+
+
+def _period_key(dates: pd.Series) -> pd.Series:
+    """报告期的年月 (YYYYMM)，用于对齐 "20240331" 与 "2024-03-31" 两种日期格式"""
+    return dates.astype(str).str.replace("-", "", regex=False).str[:6]
+
+
+class FinancialReportFetcher:
+    """财务报表并发获取与缓存（线程安全）"""
+
+    def __init__(self, max_workers: int = 4, ttl: float = REPORT_TTL_SECONDS):
+        """初始化
+
+        Args:
+            max_workers: 同时进行的报表请求数上限（所有股票共享）
+            ttl: 报表缓存时间（秒）
+        """
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._cache: Dict[Tuple[str, str], Tuple[float, pd.DataFrame]] = {}
+        self._periods: Dict[Tuple[str, str], Dict[str, Dict]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _download(ticker: str, report: str) -> pd.DataFrame:
+        if report == FINANCIAL_INDICATORS:
+            return ak.stock_financial_analysis_indicator(symbol=ticker)
+        return ak.stock_financial_report_sina(stock=sina_symbol(ticker), symbol=report)
+
+    def _get(self, ticker: str, report: str) -> pd.DataFrame:
+        key = (ticker, report)
+        # 同一报表只由一个线程下载，其余线程等待后直接读缓存
+        with self._lock(key):
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+            try:
+                df = self._download(ticker, report)
+                if df is None:
+                    df = pd.DataFrame()
+                logger.info(f"成功获取{ticker}的{report}数据，共 {len(df)} 期")
+            except Exception as e:
+                logger.warning(f"获取{ticker}的{report}数据失败: {str(e)}")
+                return pd.DataFrame()
+
+            date_column = _date_column(report)
+            periods = {}
+            if date_column in df.columns:
+                # 同一报告期保留第一条（最新发布的）记录
+                for period, row in zip(_period_key(df[date_column]), df.to_dict("records")):
+                    periods.setdefault(period, row)
+            with self._guard:
+                self._cache[key] = (time.monotonic(), df)
+                self._periods[key] = periods
+            return df
+
+    def fetch(self, ticker: str, reports: Iterable[str] = ALL_REPORTS) -> Dict[str, pd.DataFrame]:
+        """
+        并发获取多张报表
+
+        Args:
+            ticker: 股票代码
+            reports: 报表名称，默认为全部四张
+
+        Returns:
+            Dict[str, pd.DataFrame]: 报表名称 -> 报表，获取失败时为空表；
+                回测中（见 src.tools.point_in_time）只包含时点日期前已公告的报告期
+        """
+        futures = {report: self._pool.submit(self._get, ticker, report) for report in reports}
+        return {
+            report: available_reports(future.result(), _date_column(report))
+            for report, future in futures.items()
+        }
+
+    def report_for_period(self, ticker: str, report: str, period: str) -> Dict:
+        """
+        按报告期查询单期报表
+
+        Args:
+            ticker: 股票代码
+            report: 报表名称
+            period: 报告期，"20240331"、"2024-03-31" 或 "202403"
+
+        Returns:
+            Dict: 该期报表字段，未找到时为空字典
+        """
+        df = self.fetch(ticker, [report])[report]
+        key = period.replace("-", "")[:6]
+        if df.empty or key not in set(_period_key(df[_date_column(report)])):
+            return {}
+        with self._guard:
+            return dict(self._periods.get((ticker, report), {}).get(key, {}))
+
+    def quarterly(self, ticker: str, num_quarters: int = 4) -> pd.DataFrame:
+        """
+        最近 num_quarters 期的季度宽表
+
+        以利润表的报告日为基准，按报告日左连接资产负债表和现金流量表，
+        按报告期年月左连接财务指标（两者日期格式不同）。
+
+        Args:
+            ticker: 股票代码
+            num_quarters: 季度数
+
+        Returns:
+            pd.DataFrame: 每行一个报告期；同名字段以报表名作后缀区分，利润表字段保持原名
+        """
+        reports = self.fetch(ticker)
+        income = reports[INCOME_STATEMENT]
+        if income.empty or "报告日" not in income.columns:
+            return pd.DataFrame()
+
+        merged = income.head(num_quarters).copy()
+        merged["报告日"] = merged["报告日"].astype(str)
+        for name in (BALANCE_SHEET, CASH_FLOW):
+            other = reports[name]
+            if other.empty or "报告日" not in other.columns:
+                continue
+            other = other.assign(报告日=other["报告日"].astype(str)).drop_duplicates("报告日")
+            merged = merged.merge(other, on="报告日", how="left", suffixes=("", f"_{name}"))
+
+        indicators = reports[FINANCIAL_INDICATORS]
+        if not indicators.empty and "日期" in indicators.columns:
+            indicators = indicators.assign(_period=_period_key(indicators["日期"])).drop_duplicates("_period")
+            merged = merged.assign(_period=_period_key(merged["报告日"]))
+            merged = merged.merge(indicators, on="_period", how="left",
+                                  suffixes=("", f"_{FINANCIAL_INDICATORS}")).drop(columns="_period")
+        return merged
+
+
+_fetcher: Optional[FinancialReportFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_report_fetcher() -> FinancialReportFetcher:
+    """获取共享的财务报表获取器"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = FinancialReportFetcher()
+        return _fetcher
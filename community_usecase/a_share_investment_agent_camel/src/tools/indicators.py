@@ -0,0 +1,392 @@
+"""
+技术指标计算引擎
+
+所有指标在 NumPy 数组上一次性向量化计算，时间为最后一维：
+一维输入 (天数,) 为单只股票，二维输入 (股票数, 天数) 可一次计算整个自选股列表。
+较短历史的股票可在前面用 NaN 补齐，各指标从每行第一个有效值开始计算。
+
+支持的指标：移动平均线、RSI、MACD、布林带、ATR、KDJ、随机指标 (Stochastic)、OBV。
+IncrementalIndicators 在已有历史的基础上逐根 K 线更新指标，无需重新计算全部历史。
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+DEFAULT_MA_WINDOWS = (5, 10, 20, 50, 200)
+
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_PERIOD, BOLLINGER_WIDTH = 20, 2.0
+ATR_PERIOD = 14
+KDJ_PERIOD, KDJ_SMOOTH = 9, 3
+STOCH_PERIOD, STOCH_SMOOTH = 14, 3
+
+# 指标 -> 输出该指标所需的最少 K 线数
+_MIN_BARS = {
+    "rsi": RSI_PERIOD,
+    "macd": MACD_SLOW,
+    "bollinger": BOLLINGER_PERIOD,
+    "atr": ATR_PERIOD,
+    "kdj": KDJ_PERIOD,
+    "stoch": STOCH_PERIOD,
+}
+
+
+def _as_2d(x) -> Tuple[np.ndarray, bool]:
+    """转换为 (股票数, 天数) 的浮点数组，并返回原输入是否为一维"""
+    arr = np.asarray(x, dtype=float)
+    if arr.ndim == 1:
+        return arr[None, :], True
+    if arr.ndim != 2:
+        raise ValueError(f"指标输入必须是一维或二维数组，实际维度: {arr.ndim}")
+    return arr, False
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    """每行第一个非 NaN 值的位置，整行为 NaN 时为天数"""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=-1), valid.argmax(axis=-1), x.shape[-1])
+
+
+def _ffill(x: np.ndarray) -> np.ndarray:
+    """沿时间轴向前填充 NaN（如停牌日）"""
+    idx = np.where(np.isnan(x), 0, np.arange(x.shape[-1]))
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return x[np.arange(x.shape[0])[:, None], idx]
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """简单移动平均，窗口内含 NaN 时结果为 NaN（与 pandas rolling 一致）"""
+    out = np.full_like(x, np.nan)
+    if window > x.shape[-1]:
+        return out
+    nan = np.isnan(x)
+    zero = np.zeros(x.shape[:-1] + (1,))
+    csum = np.concatenate([zero, np.cumsum(np.where(nan, 0.0, x), axis=-1)], axis=-1)
+    cnan = np.concatenate([zero, np.cumsum(nan, axis=-1)], axis=-1)
+    wsum = csum[..., window:] - csum[..., :-window]
+    wnan = cnan[..., window:] - cnan[..., :-window]
+    out[..., window - 1:] = np.where(wnan > 0, np.nan, wsum / window)
+    return out
+
+
+def _rolling(x: np.ndarray, window: int, func, **kwargs) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if window > x.shape[-1]:
+        return out
+    out[..., window - 1:] = func(sliding_window_view(x, window, axis=-1), axis=-1, **kwargs)
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """滚动样本标准差 (ddof=1)"""
+    return _rolling(x, window, np.std, ddof=1)
+
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, np.max)
+
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, np.min)
+
+
+def ema(x: np.ndarray, alpha: float, init: Optional[float] = None) -> np.ndarray:
+    """
+    指数移动平均 y[t] = y[t-1] + alpha * (x[t] - y[t-1])
+
+    每行从第一个有效值开始；init 为空时以第一个有效值作为初值
+    （与 pandas ewm(adjust=False) 一致），否则以 init 作为第一个有效值之前的状态。
+    """
+    out = np.full_like(x, np.nan)
+    first = _first_valid(x)
+    rows = np.nonzero(first < x.shape[-1])[0]
+    if rows.size == 0:
+        return out
+
+    xs, f = x[rows], first[rows]
+    start = xs[np.arange(rows.size), f] if init is None else np.full(rows.size, float(init))
+    missing = np.isnan(xs)
+    # 前导 NaN 用初值填充时滤波状态保持为初值，因此各行可以同时计算
+    lead = np.arange(x.shape[-1])[None, :] < f[:, None]
+    xs = _ffill(np.where(lead, start[:, None], xs))
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], xs, axis=-1, zi=((1.0 - alpha) * start)[:, None])
+    out[rows] = np.where(missing, np.nan, y)
+    return out
+
+
+def _span_alpha(span: int) -> float:
+    return 2.0 / (span + 1.0)
+
+
+def _range_position(close: np.ndarray, high: np.ndarray, low: np.ndarray, period: int) -> np.ndarray:
+    """收盘价在 period 日最高/最低价区间中的位置 (0-100)，区间为零时取 50"""
+    hhv = rolling_max(high, period)
+    llv = rolling_min(low, period)
+    rng = hhv - llv
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pos = (close - llv) / rng * 100.0
+    return np.where(rng > 0, pos, np.where(np.isnan(rng), np.nan, 50.0))
+
+
+def _true_range(close: np.ndarray, high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    prev_close = np.concatenate([np.full(close.shape[:-1] + (1,), np.nan), close[..., :-1]], axis=-1)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _rsi_from(gain_avg: np.ndarray, loss_avg: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 - 100.0 / (1.0 + gain_avg / loss_avg)
+
+
+def _compute_all(
+    close: np.ndarray,
+    high: Optional[np.ndarray],
+    low: Optional[np.ndarray],
+    volume: Optional[np.ndarray],
+    ma_windows: Sequence[int]
+) -> Dict[str, np.ndarray]:
+    """不考虑最少 K 线数，计算全部可计算的指标（二维输入）"""
+    out: Dict[str, np.ndarray] = {}
+
+    for window in ma_windows:
+        out[f"ma_{window}"] = sma(close, window)
+
+    # RSI：14 日平均涨幅 / 平均跌幅（简单平均）
+    delta = np.diff(close, axis=-1, prepend=np.nan)
+    out["rsi"] = _rsi_from(
+        sma(np.clip(delta, 0, None), RSI_PERIOD),
+        sma(-np.clip(delta, None, 0), RSI_PERIOD)
+    )
+
+    fast = ema(close, _span_alpha(MACD_FAST))
+    slow = ema(close, _span_alpha(MACD_SLOW))
+    out["macd"] = fast - slow
+    out["macd_signal"] = ema(out["macd"], _span_alpha(MACD_SIGNAL))
+    out["macd_histogram"] = out["macd"] - out["macd_signal"]
+    out["_ema_fast"], out["_ema_slow"] = fast, slow
+
+    mid = sma(close, BOLLINGER_PERIOD)
+    std = rolling_std(close, BOLLINGER_PERIOD)
+    out["bollinger_ma"] = mid
+    out["bollinger_upper"] = mid + BOLLINGER_WIDTH * std
+    out["bollinger_lower"] = mid - BOLLINGER_WIDTH * std
+
+    if high is not None and low is not None:
+        # ATR：真实波幅的 Wilder 平滑
+        out["atr"] = ema(_true_range(close, high, low), 1.0 / ATR_PERIOD)
+
+        # KDJ (9, 3, 3)：K、D 为初值 50 的 1/3 平滑
+        rsv = _range_position(close, high, low, KDJ_PERIOD)
+        k = ema(rsv, 1.0 / KDJ_SMOOTH, init=50.0)
+        d = ema(k, 1.0 / KDJ_SMOOTH, init=50.0)
+        out["kdj_k"], out["kdj_d"], out["kdj_j"] = k, d, 3.0 * k - 2.0 * d
+
+        # 随机指标 (14, 3)：快速 %K 及其 3 日均线 %D
+        out["stoch_k"] = _range_position(close, high, low, STOCH_PERIOD)
+        out["stoch_d"] = sma(out["stoch_k"], STOCH_SMOOTH)
+
+    if volume is not None:
+        direction = np.sign(np.diff(close, axis=-1, prepend=close[..., :1]))
+        out["obv"] = np.cumsum(np.nan_to_num(direction * volume), axis=-1)
+
+    return out
+
+
+def _prefix(key: str) -> str:
+    return key.split("_")[0] if not key.startswith("ma_") else key
+
+
+def compute_indicators(
+    close,
+    high=None,
+    low=None,
+    volume=None,
+    ma_windows: Sequence[int] = DEFAULT_MA_WINDOWS
+) -> Dict[str, np.ndarray]:
+    """
+    一次向量化计算全部技术指标
+
+    Args:
+        close: 收盘价，形状 (天数,) 或 (股票数, 天数)
+        high: 最高价，与 close 同形状；为空时不计算 ATR/KDJ/随机指标
+        low: 最低价，与 close 同形状
+        volume: 成交量，与 close 同形状；为空时不计算 OBV
+        ma_windows: 移动平均线窗口
+
+    Returns:
+        Dict[str, np.ndarray]: 指标名 -> 与 close 同形状的数组（历史不足的位置为 NaN）。
+            历史长度不足某指标所需最少 K 线数时不返回该指标，
+            如 ma_200 需要至少 200 天，MACD 需要至少 26 天。
+    """
+    close2, squeeze = _as_2d(close)
+    high2 = _as_2d(high)[0] if high is not None else None
+    low2 = _as_2d(low)[0] if low is not None else None
+    volume2 = _as_2d(volume)[0] if volume is not None else None
+
+    n = close2.shape[-1]
+    min_bars = dict(_MIN_BARS, **{f"ma_{w}": w for w in ma_windows})
+    indicators = {}
+    for key, values in _compute_all(close2, high2, low2, volume2, ma_windows).items():
+        if key.startswith("_") or n < min_bars.get(_prefix(key), 1):
+            continue
+        indicators[key] = values[0] if squeeze else values
+    return indicators
+
+
+def _ema_step(state: np.ndarray, x: np.ndarray, alpha: float, init: Optional[float] = None) -> np.ndarray:
+    prev = np.where(np.isnan(state), x if init is None else init, state)
+    return np.where(np.isnan(x), state, prev + alpha * (x - prev))
+
+
+class IncrementalIndicators:
+    """
+    增量技术指标计算器
+
+    用已有历史初始化后，每收到一根新 K 线只更新各指标的状态（EMA 状态、OBV 累计值，
+    以及各窗口所需的最近若干根 K 线），每次更新的开销与窗口长度相关而与历史长度无关。
+    输入为一只股票时各值为标量，为多只股票时为 (股票数,) 数组。
+    """
+
+    def __init__(
+        self,
+        close,
+        high=None,
+        low=None,
+        volume=None,
+        ma_windows: Sequence[int] = DEFAULT_MA_WINDOWS
+    ):
+        """用历史数据初始化
+
+        Args:
+            close: 历史收盘价，形状 (天数,) 或 (股票数, 天数)
+            high: 历史最高价；为空时不更新 ATR/KDJ/随机指标
+            low: 历史最低价
+            volume: 历史成交量；为空时不更新 OBV
+            ma_windows: 移动平均线窗口
+        """
+        close2, self._squeeze = _as_2d(close)
+        high2 = _as_2d(high)[0] if high is not None else None
+        low2 = _as_2d(low)[0] if low is not None else None
+        volume2 = _as_2d(volume)[0] if volume is not None else None
+        self.ma_windows = tuple(ma_windows)
+        self._has_range = high2 is not None and low2 is not None
+        self._has_volume = volume2 is not None
+
+        full = _compute_all(close2, high2, low2, volume2, self.ma_windows)
+        self.latest = {key: values[:, -1].copy() for key, values in full.items()}
+        self._ema_fast = self.latest.pop("_ema_fast")
+        self._ema_slow = self.latest.pop("_ema_slow")
+        self._count = close2.shape[-1]
+
+        # 各窗口需要的最近 K 线，缓冲区长度为最长窗口
+        self._close_len = max(self.ma_windows + (BOLLINGER_PERIOD,))
+        self._range_len = max(KDJ_PERIOD, STOCH_PERIOD)
+        self._closes = close2[:, -self._close_len:]
+        delta = np.diff(close2, axis=-1, prepend=np.nan)
+        self._gains = np.clip(delta, 0, None)[:, -RSI_PERIOD:]
+        self._losses = -np.clip(delta, None, 0)[:, -RSI_PERIOD:]
+        if self._has_range:
+            self._highs = high2[:, -self._range_len:]
+            self._lows = low2[:, -self._range_len:]
+            self._stoch_ks = full["stoch_k"][:, -STOCH_SMOOTH:]
+
+    @staticmethod
+    def _push(buffer: np.ndarray, x: np.ndarray, size: int) -> np.ndarray:
+        return np.concatenate([buffer, x[:, None]], axis=-1)[:, -size:]
+
+    @staticmethod
+    def _window_mean(buffer: np.ndarray, window: int) -> np.ndarray:
+        if buffer.shape[-1] < window:
+            return np.full(buffer.shape[0], np.nan)
+        return buffer[:, -window:].mean(axis=-1)
+
+    def _range_position(self, close: np.ndarray, period: int) -> np.ndarray:
+        if self._highs.shape[-1] < period:
+            return np.full(close.shape, np.nan)
+        hhv = self._highs[:, -period:].max(axis=-1)
+        llv = self._lows[:, -period:].min(axis=-1)
+        rng = hhv - llv
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pos = (close - llv) / rng * 100.0
+        return np.where(rng > 0, pos, np.where(np.isnan(rng), np.nan, 50.0))
+
+    def update(self, close, high=None, low=None, volume=None) -> Dict[str, np.ndarray]:
+        """
+        追加一根新 K 线并返回各指标的最新值
+
+        Args:
+            close: 最新收盘价，标量或 (股票数,) 数组
+            high: 最新最高价
+            low: 最新最低价
+            volume: 最新成交量
+
+        Returns:
+            Dict[str, np.ndarray]: 指标名 -> 最新值（与 compute_indicators 的键一致）
+        """
+        c = np.asarray(close, dtype=float).reshape(-1)
+        prev_close = self._closes[:, -1]
+        latest = self.latest
+        self._count += 1
+
+        self._closes = self._push(self._closes, c, self._close_len)
+        for window in self.ma_windows:
+            latest[f"ma_{window}"] = self._window_mean(self._closes, window)
+
+        delta = c - prev_close
+        self._gains = self._push(self._gains, np.clip(delta, 0, None), RSI_PERIOD)
+        self._losses = self._push(self._losses, -np.clip(delta, None, 0), RSI_PERIOD)
+        latest["rsi"] = _rsi_from(self._window_mean(self._gains, RSI_PERIOD),
+                                  self._window_mean(self._losses, RSI_PERIOD))
+
+        self._ema_fast = _ema_step(self._ema_fast, c, _span_alpha(MACD_FAST))
+        self._ema_slow = _ema_step(self._ema_slow, c, _span_alpha(MACD_SLOW))
+        macd = self._ema_fast - self._ema_slow
+        latest["macd"] = macd
+        latest["macd_signal"] = _ema_step(latest["macd_signal"], macd, _span_alpha(MACD_SIGNAL))
+        latest["macd_histogram"] = macd - latest["macd_signal"]
+
+        mid = self._window_mean(self._closes, BOLLINGER_PERIOD)
+        if self._closes.shape[-1] >= BOLLINGER_PERIOD:
+            std = self._closes[:, -BOLLINGER_PERIOD:].std(axis=-1, ddof=1)
+        else:
+            std = np.full(c.shape, np.nan)
+        latest["bollinger_ma"] = mid
+        latest["bollinger_upper"] = mid + BOLLINGER_WIDTH * std
+        latest["bollinger_lower"] = mid - BOLLINGER_WIDTH * std
+
+        if self._has_range and high is not None and low is not None:
+            h = np.asarray(high, dtype=float).reshape(-1)
+            l = np.asarray(low, dtype=float).reshape(-1)
+            tr = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+            latest["atr"] = _ema_step(latest["atr"], tr, 1.0 / ATR_PERIOD)
+
+            self._highs = self._push(self._highs, h, self._range_len)
+            self._lows = self._push(self._lows, l, self._range_len)
+
+            rsv = self._range_position(c, KDJ_PERIOD)
+            latest["kdj_k"] = _ema_step(latest["kdj_k"], rsv, 1.0 / KDJ_SMOOTH, init=50.0)
+            latest["kdj_d"] = _ema_step(latest["kdj_d"], latest["kdj_k"], 1.0 / KDJ_SMOOTH, init=50.0)
+            latest["kdj_j"] = 3.0 * latest["kdj_k"] - 2.0 * latest["kdj_d"]
+
+            latest["stoch_k"] = self._range_position(c, STOCH_PERIOD)
+            self._stoch_ks = self._push(self._stoch_ks, latest["stoch_k"], STOCH_SMOOTH)
+            latest["stoch_d"] = self._window_mean(self._stoch_ks, STOCH_SMOOTH)
+
+        if self._has_volume and volume is not None:
+            v = np.asarray(volume, dtype=float).reshape(-1)
+            latest["obv"] = latest["obv"] + np.nan_to_num(np.sign(delta) * v)
+
+        return self.values()
+
+    def values(self) -> Dict[str, np.ndarray]:
+        """各指标的最新值，键与 compute_indicators 一致"""
+        min_bars = dict(_MIN_BARS, **{f"ma_{w}": w for w in self.ma_windows})
+        values = {}
+        for key, value in self.latest.items():
+            if self._count < min_bars.get(_prefix(key), 1):
+                continue
+            values[key] = float(value[0]) if self._squeeze else value
+        return values
@@ -0,0 +1,131 @@
+"""
+从模型回复中提取 JSON 对象
+
+按括号配对单遍扫描回复文本，只对配对完整的最外层 {...} 片段调用 json.loads，
+代码块标记、前后说明文字都会被跳过。扫描时间与回复长度成线性关系，
+不会像贪婪正则 \\{[\\s\\S]*\\} 那样在长回复上反复回溯。
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# 说明文字中出现未闭合的 "{" 时，从其后重新扫描的最多次数
+MAX_RESCANS = 3
+
+
+def _scan(text: str, start: int) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+    """
+    从 start 开始扫描配对完整的最外层 {...} 片段
+
+    字符串内的括号和转义字符不参与配对；片段之外的引号不视为字符串边界。
+
+    Returns:
+        Tuple: (片段的 [起, 止) 位置列表, 扫描结束时仍未闭合的最外层 "{" 的位置)
+    """
+    spans = []
+    depth = 0
+    opened = -1
+    in_string = escaped = False
+    i, n = start, len(text)
+    while i < n:
+        if depth == 0:
+            i = text.find("{", i)
+            if i == -1:
+                break
+            depth, opened = 1, i
+            i += 1
+            continue
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                spans.append((opened, i + 1))
+        i += 1
+    return spans, (opened if depth > 0 else None)
+
+
+def _strip_comments(text: str) -> str:
+    """去掉字符串之外的 // 行注释和 } ] 前多余的逗号（模型常照抄提示词示例中的注释）"""
+    out = []
+    in_string = escaped = False
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+            continue
+        elif ch == ",":
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j >= n or text[j] not in "}]":
+                out.append(ch)
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _loads(candidate: str) -> Optional[Dict[str, Any]]:
+    try:
+        obj = json.loads(candidate)
+    except ValueError:
+        try:
+            obj = json.loads(_strip_comments(candidate))
+        except ValueError:
+            return None
+    return obj if isinstance(obj, dict) else None
+
+
+def extract_json(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    提取回复中第一个可以解析的 JSON 对象
+
+    Args:
+        text: 模型回复
+
+    Returns:
+        Optional[Dict[str, Any]]: JSON 对象，未找到时为 None
+    """
+    if not text:
+        return None
+    try:
+        obj = json.loads(text)
+        if isinstance(obj, dict):
+            return obj
+    except ValueError:
+        pass
+
+    start = 0
+    for _ in range(MAX_RESCANS + 1):
+        spans, unclosed = _scan(text, start)
+        for begin, end in spans:
+            obj = _loads(text[begin:end])
+            if obj is not None:
+                return obj
+        if unclosed is None:
+            break
+        start = unclosed + 1
+    return None
@@ -0,0 +1,82 @@
+"""
+时点数据（回测用）
+
+在 as_of(date) 上下文中，数据辅助函数只返回该日收盘时已经可以获得的数据，避免未来函数：
+价格只取到该日，实时行情由该日 K 线代替，财务报表只保留已公告的报告期，新闻只保留该日及之前发布的。
+
+as_of 基于 contextvars，src.pipeline.run_dag 会把上下文传递给各节点的工作线程。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+_as_of: ContextVar[Optional[pd.Timestamp]] = ContextVar("as_of", default=None)
+
+# 报告期(月日) -> (法定披露截止日的月日, 年份偏移)：一季报 4/30，半年报 8/31，三季报 10/31，年报次年 4/30
+_DISCLOSURE_DEADLINES = {
+    "0331": ("0430", 0),
+    "0630": ("0831", 0),
+    "0930": ("1031", 0),
+    "1231": ("0430", 1),
+}
+
+
+def get_as_of() -> Optional[pd.Timestamp]:
+    """当前的时点日期，不在回测中时为 None"""
+    return _as_of.get()
+
+
+@contextmanager
+def as_of(date: Any) -> Iterator[pd.Timestamp]:
+    """在该上下文中，数据辅助函数只返回 date 收盘时可获得的数据"""
+    stamp = pd.Timestamp(date).normalize()
+    token = _as_of.set(stamp)
+    try:
+        yield stamp
+    finally:
+        _as_of.reset(token)
+
+
+def _disclosure_deadline(period: str) -> pd.Timestamp:
+    """报告期的法定披露截止日，非常规报告期按 4 个月计，无法解析时为 NaT（视为未公告）"""
+    period = period.replace("-", "")[:8]
+    if len(period) != 8 or not period.isdigit():
+        return pd.NaT
+    deadline = _DISCLOSURE_DEADLINES.get(period[4:8])
+    if deadline is None:
+        return pd.Timestamp(period) + pd.DateOffset(months=4)
+    month_day, year_offset = deadline
+    return pd.Timestamp(f"{int(period[:4]) + year_offset}{month_day}")
+
+
+def available_reports(df: pd.DataFrame, date_column: str) -> pd.DataFrame:
+    """
+    只保留在时点日期前已公告的报告期
+
+    有公告日期（"公告日期"）时以其为准，否则以法定披露截止日为准。
+    """
+    stamp = get_as_of()
+    if stamp is None or df.empty or date_column not in df.columns:
+        return df
+    periods = df[date_column].astype(str)
+    published = periods.map(_disclosure_deadline)
+    if "公告日期" in df.columns:
+        announced = pd.to_datetime(df["公告日期"].astype(str), errors="coerce")
+        published = announced.fillna(published)
+    return df[published <= stamp]
+
+
+def available_news(news: List[Dict[str, Any]], date_key: str = "date") -> List[Dict[str, Any]]:
+    """只保留时点日期当天及之前发布的新闻"""
+    stamp = get_as_of()
+    if stamp is None:
+        return news
+    cutoff = stamp + pd.Timedelta(days=1)
+    kept = []
+    for item in news:
+        published = pd.to_datetime(item.get(date_key), errors="coerce")
+        if pd.notna(published) and published < cutoff:
+            kept.append(item)
+    return kept
@@ -0,0 +1,334 @@
+"""
+本地日线行情库
+
+每只股票的日线按复权方式存为一个 Parquet 文件，读取时使用内存映射并按日期过滤。
+增量更新只下载最后一根已存 K 线之后的数据；下载时与最后一根已存 K 线重叠一天，
+若该 K 线的复权价格发生变化（期间发生除权除息，前复权价格整体重新基准），
+则重新下载已覆盖区间的全部历史，保证库中价格始终与最新复权基准一致。
+
+当天的 K 线在收盘前会变化，因此只存到昨天；查询包含今天时临时下载今天的数据拼接返回。
+指数日线（如计算 beta 用的沪深300）以 adjust=INDEX 存在同一个库中。
+
+分析用的复权日线通过 get_adjusted_bars 读取：回测的 as_of 上下文中以时点日期为复权基准。
+"""
+import argparse
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import akshare as ak
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.tools.point_in_time import get_as_of
+
+logger = logging.getLogger(__name__)
+
+# 行情库目录，可通过环境变量 PRICE_STORE_DIR 修改
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "data/prices")
+
+# akshare 中文列名 -> 英文列名
+COLUMN_MAPPINGS = {
+    '日期': 'date',
+    '股票代码': 'code',
+    '开盘': 'open',
+    '收盘': 'close',
+    '最高': 'high',
+    '最低': 'low',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '振幅': 'amplitude',
+    '涨跌幅': 'pct_change',
+    '涨跌额': 'change',
+    '换手率': 'turnover'
+}
+
+# 指数日线使用的 adjust 取值（指数无需复权）
+INDEX = "index"
+
+# 判断复权价格是否变化时的相对误差
+_REBASE_RTOL = 1e-6
+
+# 随复权基准缩放的价格列
+_PRICE_COLUMNS = ['open', 'close', 'high', 'low', 'change']
+
+
+def normalize_price_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """将 akshare 日线数据的中文列名转换为英文列名，并将日期列转换为 datetime 类型"""
+    df = df.rename(columns=COLUMN_MAPPINGS)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def fetch_daily_bars(ticker: str, start: pd.Timestamp, end: pd.Timestamp, adjust: str = "qfq") -> pd.DataFrame:
+    """
+    从 akshare 下载日线数据
+
+    Args:
+        ticker: 股票代码，adjust 为 INDEX 时为指数代码
+        start: 开始日期
+        end: 结束日期
+        adjust: 复权方式，"qfq" 前复权，"hfq" 后复权，"" 不复权，INDEX 为指数日线
+
+    Returns:
+        pd.DataFrame: 英文列名的日线数据，无数据时为空表
+    """
+    if start > end:
+        return pd.DataFrame()
+    if adjust == INDEX:
+        df = ak.index_zh_a_hist(
+            symbol=ticker,
+            period="daily",
+            start_date=start.strftime("%Y%m%d"),
+            end_date=end.strftime("%Y%m%d")
+        )
+        if df is None or df.empty:
+            return pd.DataFrame()
+        return normalize_price_columns(df)
+    df = ak.stock_zh_a_hist(
+        symbol=ticker,
+        period="daily",
+        start_date=start.strftime("%Y%m%d"),
+        end_date=end.strftime("%Y%m%d"),
+        adjust=adjust
+    )
+    if df is None or df.empty:
+        return pd.DataFrame()
+    return normalize_price_columns(df)
+
+
+class PriceStore:
+    """
+    按股票代码存储日线行情的本地 Parquet 库（线程安全）
+
+    文件路径为 {root}/{adjust}/{ticker}.parquet，schema 元数据记录已覆盖的日期区间：
+    covered_from 为请求过的最早日期，updated_through 为已确认下载过的最晚日期。
+    """
+
+    def __init__(self, root: str = PRICE_STORE_DIR, adjust: str = "qfq"):
+        """初始化行情库
+
+        Args:
+            root: 存储目录
+            adjust: 复权方式，"qfq" 前复权，"hfq" 后复权，"" 不复权，INDEX 为指数日线
+        """
+        self.root = root
+        self.adjust = adjust
+        self._dir = os.path.join(root, adjust or "none")
+        os.makedirs(self._dir, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self._dir, f"{ticker}.parquet")
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _coverage(self, ticker: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """已覆盖的日期区间 (covered_from, updated_through)，文件不存在时为 None"""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        meta = pq.read_schema(path).metadata or {}
+        return (
+            pd.Timestamp(meta[b"covered_from"].decode()),
+            pd.Timestamp(meta[b"updated_through"].decode())
+        )
+
+    def _read(self, ticker: str, start: Optional[pd.Timestamp] = None,
+              end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        filters = []
+        if start is not None:
+            filters.append(("date", ">=", start))
+        if end is not None:
+            filters.append(("date", "<=", end))
+        table = pq.read_table(self._path(ticker), memory_map=True, filters=filters or None)
+        return table.to_pandas()
+
+    def _write(self, ticker: str, df: pd.DataFrame, covered_from: pd.Timestamp,
+               updated_through: pd.Timestamp) -> None:
+        df = df.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"covered_from": covered_from.strftime("%Y-%m-%d").encode(),
+            b"updated_through": updated_through.strftime("%Y-%m-%d").encode(),
+        })
+        path = self._path(ticker)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _rebased(stored: pd.DataFrame, fresh: pd.DataFrame, day: pd.Timestamp) -> bool:
+        """重叠日的 K 线在新旧数据中是否不一致（复权基准已变化）"""
+        old = stored.loc[stored['date'] == day, ['open', 'close', 'high', 'low']]
+        new = fresh.loc[fresh['date'] == day, ['open', 'close', 'high', 'low']]
+        if old.empty or new.empty:
+            return False
+        return not np.allclose(old.to_numpy(float), new.to_numpy(float), rtol=_REBASE_RTOL)
+
+    def update(self, ticker: str, start_date: str, end_date: str) -> None:
+        """
+        增量更新，使库中覆盖 [start_date, min(end_date, 昨天)]
+
+        Args:
+            ticker: 股票代码
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+        """
+        start = pd.Timestamp(start_date)
+        end = min(pd.Timestamp(end_date), pd.Timestamp(datetime.now().date() - timedelta(days=1)))
+
+        with self._lock(ticker):
+            coverage = self._coverage(ticker)
+            if coverage is None:
+                logger.info(f"行情库首次下载 {ticker}: {start.date()} ~ {end.date()}")
+                df = fetch_daily_bars(ticker, start, end, self.adjust)
+                self._write(ticker, df if not df.empty else pd.DataFrame({'date': pd.to_datetime([])}),
+                            start, max(start, end))
+                return
+
+            covered_from, updated_through = coverage
+            if start >= covered_from and end <= updated_through:
+                return
+
+            stored = self._read(ticker)
+            if end > updated_through:
+                if stored.empty:
+                    stored = fetch_daily_bars(ticker, covered_from, end, self.adjust)
+                else:
+                    last = stored['date'].max()
+                    fresh = fetch_daily_bars(ticker, last, end, self.adjust)
+                    if self._rebased(stored, fresh, last):
+                        logger.info(f"{ticker} 复权基准已变化，重新下载 {covered_from.date()} 起的全部历史")
+                        stored = fetch_daily_bars(ticker, covered_from, end, self.adjust)
+                    elif not fresh.empty:
+                        stored = pd.concat([stored, fresh[fresh['date'] > last]], ignore_index=True)
+                updated_through = end
+            if start < covered_from:
+                if stored.empty:
+                    older = fetch_daily_bars(ticker, start, covered_from - timedelta(days=1), self.adjust)
+                    stored = older
+                else:
+                    # 向前补数据时多取已存的第一根 K 线，用来判断复权基准是否已变化
+                    first = stored['date'].min()
+                    older = fetch_daily_bars(ticker, start, first, self.adjust)
+                    if self._rebased(stored, older, first):
+                        logger.info(f"{ticker} 复权基准已变化，重新下载 {start.date()} 起的全部历史")
+                        stored = fetch_daily_bars(ticker, start, updated_through, self.adjust)
+                    elif not older.empty:
+                        stored = pd.concat([older[older['date'] < first], stored], ignore_index=True)
+                covered_from = start
+
+            if stored.empty:
+                stored = pd.DataFrame({'date': pd.to_datetime([])})
+            self._write(ticker, stored, covered_from, updated_through)
+
+    def get(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        读取日线数据，必要时先增量更新
+
+        Args:
+            ticker: 股票代码
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+
+        Returns:
+            pd.DataFrame: 英文列名的日线数据，按日期升序
+        """
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        self.update(ticker, start_date, end_date)
+        df = self._read(ticker, start, end)
+
+        today = pd.Timestamp(datetime.now().date())
+        if end >= today:
+            live = fetch_daily_bars(ticker, today, today, self.adjust)
+            if not live.empty:
+                df = pd.concat([df, live], ignore_index=True)
+        return df.reset_index(drop=True)
+
+
+_stores: Dict[str, PriceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_price_store(adjust: str = "qfq") -> PriceStore:
+    """获取共享的行情库实例"""
+    with _stores_lock:
+        if adjust not in _stores:
+            _stores[adjust] = PriceStore(adjust=adjust)
+        return _stores[adjust]
+
+
+def get_adjusted_bars(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    读取分析用的复权日线
+
+    平时为前复权日线。前复权价格以今天为基准，包含时点之后的除权除息，
+    因此在 as_of 上下文中改用后复权日线，并以时点日期为基准重新前复权：
+    时点当天的价格等于不复权价格（与时点行情的"最新价"一致），之前的价格按期间的除权除息调整。
+    后复权价格不随之后的除权除息变化，同一时点的提示词保持不变，响应缓存不会失效。
+
+    Args:
+        ticker: 股票代码
+        start_date: 开始日期 (YYYY-MM-DD)
+        end_date: 结束日期 (YYYY-MM-DD)
+
+    Returns:
+        pd.DataFrame: 英文列名的日线数据，按日期升序
+    """
+    stamp = get_as_of()
+    if stamp is None:
+        return get_price_store().get(ticker, start_date, end_date)
+
+    bars = get_price_store("hfq").get(ticker, start_date, end_date)
+    if bars.empty:
+        return bars
+    # 时点日期（或之前最近一个交易日）的后复权因子
+    base_start = (stamp - timedelta(days=15)).strftime("%Y-%m-%d")
+    base_end = stamp.strftime("%Y-%m-%d")
+    base = get_price_store("hfq").get(ticker, base_start, base_end)[['date', 'close']].merge(
+        get_price_store("").get(ticker, base_start, base_end)[['date', 'close']],
+        on='date', suffixes=('_hfq', '_raw')
+    )
+    if base.empty:
+        logger.warning(f"{ticker} 缺少 {base_end} 附近的不复权行情，返回后复权价格")
+        return bars
+    factor = base['close_hfq'].iloc[-1] / base['close_raw'].iloc[-1]
+    columns = [c for c in _PRICE_COLUMNS if c in bars.columns]
+    bars = bars.copy()
+    bars[columns] = (bars[columns] / factor).round(2)
+    return bars
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口：预先下载或增量更新一批股票的日线数据"""
+    parser = argparse.ArgumentParser(description="更新本地日线行情库")
+    parser.add_argument("tickers", nargs="+", help="股票代码")
+    parser.add_argument("--start-date", type=str,
+                        default=(datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d"),
+                        help="开始日期 (YYYY-MM-DD)")
+    parser.add_argument("--end-date", type=str, default=datetime.now().strftime("%Y-%m-%d"),
+                        help="结束日期 (YYYY-MM-DD)")
+    parser.add_argument("--adjust", type=str, default="qfq", choices=["qfq", "hfq", "", INDEX],
+                        help="复权方式，index 表示更新指数日线")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    store = get_price_store(args.adjust)
+    for ticker in args.tickers:
+        try:
+            store.update(ticker, args.start_date, args.end_date)
+        except Exception as e:
+            logger.error(f"更新 {ticker} 失败: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
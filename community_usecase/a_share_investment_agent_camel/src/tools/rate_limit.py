@@ -0,0 +1,54 @@
+"""
+LLM 调用限流工具
+
+所有代理共享一个限流器：信号量限制同时在途的请求数，令牌桶限制每分钟请求数。
+"""
+import threading
+import time
+from typing import Optional
+
+
+class LLMLimiter:
+    """全局 LLM 并发与速率限制器（线程安全）"""
+
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: Optional[float] = None):
+        """初始化限流器
+
+        Args:
+            max_concurrency: 同时在途的最大请求数
+            requests_per_minute: 每分钟最大请求数，为空时不限速
+        """
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._tokens = float(max_concurrency)
+        self._last = time.monotonic()
+
+    def _wait_for_token(self) -> None:
+        if not self.requests_per_minute:
+            return
+        rate = self.requests_per_minute / 60.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # 桶容量与并发数一致，允许短时突发
+                self._tokens = min(float(self.max_concurrency), self._tokens + (now - self._last) * rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / rate
+            time.sleep(wait)
+
+    def __enter__(self) -> "LLMLimiter":
+        self._semaphore.acquire()
+        try:
+            self._wait_for_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._semaphore.release()
@@ -0,0 +1,78 @@
+"""
+LLM 响应缓存
+
+以 SQLite 存储"请求摘要 -> 响应文本"，多线程共享一个连接。
+回测中按 (代理, 时点日期, 输入摘要) 缓存每次 LLM 调用，重复回测同一区间时不再调用模型；
+BaseAgent 的分析结果缓存按 (代理, 模型, 提示词版本, 输入数据) 保存解析后的 JSON 结果。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+# 缓存文件路径，可通过环境变量 LLM_CACHE_PATH 修改
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+
+
+def cache_key(*parts: Any) -> str:
+    """由任意可 JSON 序列化的内容生成稳定的缓存键（键排序，非 ASCII 原样保留）"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """基于 SQLite 的响应缓存（线程安全）"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH):
+        """初始化缓存
+
+        Args:
+            path: SQLite 文件路径
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[str]:
+        """读取缓存
+
+        Args:
+            key: 缓存键
+            ttl: 有效期（秒），超过有效期的条目视为未命中，为空时永不过期
+
+        Returns:
+            Optional[str]: 缓存内容，未命中时为 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (ttl is not None and time.time() - row[1] > ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,160 @@
+"""
+风险指标
+
+由本地行情库的日线向量化计算确定性的风险统计量，代替让模型根据逐日价格估计：
+多窗口已实现波动率、最大回撤、历史 VaR/CVaR、相对基准指数的 beta，以及成交额、换手率等流动性指标。
+"""
+import logging
+import math
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.tools.price_store import INDEX, get_adjusted_bars, get_price_store
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+# 已实现波动率的窗口（交易日）
+VOLATILITY_WINDOWS = (20, 60, 120)
+# VaR/CVaR 的置信水平
+VAR_CONFIDENCE = 0.95
+# 流动性指标的回看窗口（交易日）
+LIQUIDITY_WINDOW = 20
+# 基准指数，默认沪深300，可通过环境变量 RISK_BENCHMARK_INDEX 修改
+BENCHMARK_INDEX = os.getenv("RISK_BENCHMARK_INDEX", "000300")
+
+
+def _num(x: Any, digits: int = 4) -> Optional[float]:
+    """转换为保留 digits 位小数的浮点数，NaN/无穷返回 None"""
+    try:
+        x = float(x)
+    except (TypeError, ValueError):
+        return None
+    return round(x, digits) if math.isfinite(x) else None
+
+
+def realized_volatility(log_returns: np.ndarray, windows: Sequence[int] = VOLATILITY_WINDOWS) -> Dict[str, Optional[float]]:
+    """最近各窗口及全区间日对数收益率的年化波动率"""
+    result = {
+        f"{w}d": _num(log_returns[-w:].std(ddof=1) * math.sqrt(TRADING_DAYS))
+        for w in windows if log_returns.size >= w
+    }
+    if log_returns.size > 1:
+        result["full"] = _num(log_returns.std(ddof=1) * math.sqrt(TRADING_DAYS))
+    return result
+
+
+def drawdown(close: np.ndarray) -> Dict[str, Optional[float]]:
+    """最大回撤与当前回撤（正数表示跌幅比例），以及最大回撤的峰谷位置"""
+    peak = np.maximum.accumulate(close)
+    dd = 1 - close / peak
+    trough = int(dd.argmax())
+    return {
+        "max_drawdown": _num(dd[trough]),
+        "current_drawdown": _num(dd[-1]),
+        "peak_index": int(close[:trough + 1].argmax()),
+        "trough_index": trough,
+    }
+
+
+def value_at_risk(returns: np.ndarray, confidence: float = VAR_CONFIDENCE) -> Dict[str, Optional[float]]:
+    """历史模拟法的单日 VaR 与 CVaR（正数表示损失比例）"""
+    if returns.size == 0:
+        return {"var": None, "cvar": None}
+    cutoff = np.quantile(returns, 1 - confidence)
+    tail = returns[returns <= cutoff]
+    return {"var": _num(-cutoff), "cvar": _num(-tail.mean())}
+
+
+def beta(stock: pd.Series, benchmark: pd.Series) -> Dict[str, Optional[float]]:
+    """按日期对齐的日收益率计算 beta 与相关系数"""
+    aligned = pd.concat([stock, benchmark], axis=1, join="inner").dropna().to_numpy()
+    if len(aligned) < 2:
+        return {"beta": None, "correlation": None, "observations": len(aligned)}
+    cov = np.cov(aligned, rowvar=False)
+    return {
+        "beta": _num(cov[0, 1] / cov[1, 1]) if cov[1, 1] > 0 else None,
+        "correlation": _num(np.corrcoef(aligned, rowvar=False)[0, 1]),
+        "observations": len(aligned),
+    }
+
+
+def liquidity(bars: pd.DataFrame, returns: np.ndarray, window: int = LIQUIDITY_WINDOW) -> Dict[str, Optional[float]]:
+    """
+    最近 window 个交易日的流动性
+
+    成交额单位为元；Amihud 非流动性为 |日收益率| / 成交额（亿元）的均值，越大流动性越差。
+    """
+    recent = bars.tail(window)
+    result: Dict[str, Optional[float]] = {}
+    if "amount" in recent.columns:
+        result["avg_daily_amount"] = _num(recent["amount"].mean(), 0)
+        # returns[i] 是 bars 第 i+1 天的收益率，与当天成交额对齐
+        amount = bars["amount"].to_numpy(float)[1:][-window:] / 1e8
+        with np.errstate(divide="ignore", invalid="ignore"):
+            amihud = np.abs(returns[-window:]) / amount
+        amihud = amihud[np.isfinite(amihud)]
+        result["amihud_illiquidity"] = _num(amihud.mean(), 6) if amihud.size else None
+    if "turnover" in recent.columns:
+        result["avg_turnover_pct"] = _num(recent["turnover"].mean(), 3)
+    if "volume" in recent.columns:
+        result["zero_volume_days"] = int((recent["volume"] <= 0).sum())
+    return result
+
+
+def compute_risk_metrics(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    benchmark: Optional[str] = BENCHMARK_INDEX
+) -> Dict[str, Any]:
+    """
+    计算股票在区间内的风险指标
+
+    Args:
+        ticker: 股票代码
+        start_date: 开始日期 (YYYY-MM-DD)
+        end_date: 结束日期 (YYYY-MM-DD)
+        benchmark: 计算 beta 的基准指数代码，为空时不计算
+
+    Returns:
+        Dict[str, Any]: 波动率、回撤、VaR/CVaR、beta 和流动性指标；没有行情数据时为空字典
+    """
+    bars = get_adjusted_bars(ticker, start_date, end_date)
+    if bars.empty or len(bars) < 2:
+        return {}
+    bars = bars.sort_values("date").reset_index(drop=True)
+    close = bars["close"].to_numpy(float)
+    simple = close[1:] / close[:-1] - 1
+    log_returns = np.log1p(simple)
+
+    dd = drawdown(close)
+    dates = bars["date"].dt.strftime("%Y-%m-%d")
+    metrics: Dict[str, Any] = {
+        "start_date": dates.iloc[0],
+        "end_date": dates.iloc[-1],
+        "observations": int(simple.size),
+        "volatility": realized_volatility(log_returns),
+        "max_drawdown": dd["max_drawdown"],
+        "max_drawdown_period": [dates.iloc[dd["peak_index"]], dates.iloc[dd["trough_index"]]],
+        "current_drawdown": dd["current_drawdown"],
+        "liquidity": liquidity(bars, simple),
+    }
+    tail = value_at_risk(simple)
+    metrics["daily_var_95"] = tail["var"]
+    metrics["daily_cvar_95"] = tail["cvar"]
+
+    if benchmark:
+        try:
+            index = get_price_store(INDEX).get(benchmark, start_date, end_date)
+            if not index.empty:
+                stock_returns = pd.Series(simple, index=bars["date"].iloc[1:].to_numpy())
+                index = index.sort_values("date")
+                index_returns = index.set_index("date")["close"].pct_change()
+                metrics["benchmark"] = {"index": benchmark, **beta(stock_returns, index_returns)}
+        except Exception as e:
+            logger.warning(f"获取基准指数 {benchmark} 行情失败，不计算 beta: {str(e)}")
+    return metrics
@@ -100,6 +100,7 @@ def construct_society(question: str) -> RolePlaying:
     }
 
     # Configure toolkits
+    document_toolkit = DocumentProcessingToolkit(model=models["document"])
     tools = [
         *BrowserToolkit(
             headless=False,  # Set to True for headless mode (e.g., on remote servers)
@@ -114,7 +115,7 @@ def construct_society(question: str) -> RolePlaying:
         SearchToolkit().search_google,  # Comment this out if you don't have google search
         SearchToolkit().search_wiki,
         *ExcelToolkit().get_tools(),
-        *DocumentProcessingToolkit(model=models["document"]).get_tools(),
+        *document_toolkit.get_tools(),
         *FileWriteToolkit(output_dir="./").get_tools(),
     ]
 
@@ -137,6 +138,9 @@ def construct_society(question: str) -> RolePlaying:
         assistant_agent_kwargs=assistant_agent_kwargs,
     )
 
+    # Keep the toolkit so the caller can release its HTTP session
+    society.document_toolkit = document_toolkit
+
     return society
 
 
@@ -150,7 +154,10 @@ def main():
 
     # Construct and run the society
     society = construct_society(task)
-    answer, chat_history, token_count = run_society(society)
+    try:
+        answer, chat_history, token_count = run_society(society)
+    finally:
+        society.document_toolkit.close()
 
     # Output the result
     print(f"\033[94mAnswer: {answer}\033[0m")
@@ -138,6 +138,7 @@ def construct_society() -> RolePlaying:
     }
 
     # Configure toolkits
+    document_toolkit = DocumentProcessingToolkit(model=models["document"])
     tools = [
         *BrowserToolkit(
             headless=False,
@@ -153,7 +154,7 @@ def construct_society() -> RolePlaying:
         SearchToolkit().search_baidu,
         SearchToolkit().search_bing,
         *ExcelToolkit().get_tools(),
-        *DocumentProcessingToolkit(model=models["document"]).get_tools(),
+        *document_toolkit.get_tools(),
         *FileWriteToolkit(output_dir="./").get_tools(),
     ]
 
@@ -177,6 +178,9 @@ def construct_society() -> RolePlaying:
         output_language=selected_language,
     )
 
+    # Keep the toolkit so the caller can release its HTTP session
+    society.document_toolkit = document_toolkit
+
     return society
 
 
@@ -184,7 +188,10 @@ def main():
     # Construct the society
     society = construct_society()
     # Run the society and get the answer, chat history, and token count
-    answer, chat_history, token_count = run_society(society)
+    try:
+        answer, chat_history, token_count = run_society(society)
+    finally:
+        society.document_toolkit.close()
     # Print the answer
     print(f"\033[94mAnswer: {answer}\033[0m")
 
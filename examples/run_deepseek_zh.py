@@ -18,6 +18,7 @@
 # Set it as DEEPSEEK_API_KEY="your-api-key" in your .env file or add it to your environment variables
 
 import sys
+from typing import Optional
 from dotenv import load_dotenv
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -36,6 +37,8 @@ from owl.utils.enhanced_role_playing import OwlRolePlaying, run_society
 from camel.logger import set_log_level
 
 from owl.utils import run_society
+from owl.utils.replay_model import resolve_models, resolve_tools
+from owl.utils.tool_output_store import cap_tool_outputs
 
 import pathlib
 
@@ -104,18 +107,21 @@ load_dotenv(dotenv_path=str(env_path))
 #
 #     return society
 
-def construct_society(question: str) -> OwlRolePlaying:
+def construct_society(question: str, extra_tools: Optional[list] = None) -> OwlRolePlaying:
     r"""Construct a society of agents based on the given question.
 
     Args:
         question (str): The task or question to be addressed by the society.
+        extra_tools (list, optional): Additional tools for the assistant,
+            e.g. a local Wikipedia lookup. (default: :obj:`None`)
 
     Returns:
         RolePlaying: A configured society of agents ready to address the question.
     """
 
     # Create models for different components
-    models = {
+    # (OWL_MODEL_MODE=record|replay records or replays them, see owl.utils.replay_model)
+    models = resolve_models(lambda: {
         "user": ModelFactory.create(
             model_platform=ModelPlatformType.DEEPSEEK,
             model_type=ModelType.DEEPSEEK_CHAT,
@@ -128,17 +134,19 @@ def construct_society(question: str) -> OwlRolePlaying:
             # model_type=ModelType.DEEPSEEK_REASONER,
             model_config_dict={"temperature": 0},
         ),
-    }
+    })
 
     # Configure toolkits
-    tools = [
+    # Long tool outputs are capped and paged through read_tool_output
+    tools = cap_tool_outputs(resolve_tools([
         *CodeExecutionToolkit(sandbox="subprocess", verbose=True).get_tools(),
         # SearchToolkit().search_duckduckgo,
         SearchToolkit().search_wiki,
         SearchToolkit().search_baidu,
         *ExcelToolkit().get_tools(),
         *FileWriteToolkit(output_dir="./").get_tools(),
-    ]
+        *(extra_tools or []),
+    ]))
 
     # Configure agent roles and parameters
     user_agent_kwargs = {"model": models["user"]}
@@ -32,7 +32,7 @@ from camel.toolkits import (
 from camel.types import ModelPlatformType, ModelType
 from camel.configs import ChatGPTConfig
 
-from owl.utils import GAIABenchmark
+from owl.utils import GAIABenchmark, ToolOutputStore, cap_tool_outputs
 from camel.logger import set_log_level
 
 import pathlib
@@ -93,8 +93,8 @@ def main():
         ),
     }
 
-    # Configure toolkits
-    tools = [
+    # Configure toolkits (long outputs are capped and paged through read_tool_output)
+    tools = cap_tool_outputs([
         *BrowserToolkit(
             headless=False,  # Set to True for headless mode (e.g., on remote servers)
             web_agent_model=models["browsing"],
@@ -109,7 +109,7 @@ def main():
         *SearchToolkit().get_tools(),
         *ExcelToolkit().get_tools(),
         *FileWriteToolkit(output_dir="./").get_tools(),
-    ]
+    ], ToolOutputStore(os.path.join(cache_dir, "tool_outputs")))
 
     # Configure agent roles and parameters
     user_agent_kwargs = {"model": models["user"]}
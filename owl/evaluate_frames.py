@@ -1,4 +1,5 @@
 import argparse
+import asyncio
 import json
 import os
 import time
@@ -6,10 +7,12 @@ from typing import List, Dict
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from openai import OpenAI
-from datasets import load_dataset
 from tqdm import tqdm
 from examples.run_deepseek_zh import construct_society,run_society
 from multiprocessing import Pool
+from owl.utils import load_frames, WikiArticleStore, WikiLookupToolkit, collect_wiki_links, prefetch_articles
+from owl.frames_cache import AnswerCache, JudgeCache, society_config, stable_hash
+from owl.utils.results_store import ResultsStore
 
 # from deepseek import DeepSeekAPI
 
@@ -25,6 +28,7 @@ client = OpenAI(
 )
 
 SLEEP_INTERVAL = 300
+ROUND_LIMIT = 15
 
 
 def load_existing_results(filename: str) -> List[Dict]:
@@ -51,7 +55,11 @@ def get_last_processed_index(results: List[Dict]) -> int:
     return max(int(r.get('index', -1)) for r in results)
 
 
-def generate_llm_prompt(prompt: str, wiki_links: List[str]) -> str:
+def generate_llm_prompt(prompt: str, wiki_links: List[str], local_wiki: bool = False) -> str:
+    if local_wiki:
+        # 文章已预取到本地快照，提示 society 优先用本地查询工具
+        wiki_links = (f"{wiki_links}\n(These articles are available offline: read them with the "
+                      f"`lookup_wikipedia_article` tool instead of searching or browsing the web.)")
     return f"Here are the relevant Wikipedia articles:\n{wiki_links}\n\nBased on all the information, answer the query. \n\nQuery: {prompt}\n\n"
 
 
@@ -71,14 +79,22 @@ def generate_llm_prompt(prompt: str, wiki_links: List[str]) -> str:
 #     return response.choices[0].message.content.strip()
 
 
-def get_llm_response(prompt: str, model: str) -> str:
+def get_llm_response(prompt: str, model: str, answer_cache: AnswerCache = None,
+                     extra_tools: list = None) -> str:
     """
     ignore `model` arg here, we call camel_answer instead.
+    传入 answer_cache 时先查缓存，成功作答后把答案与完整对话记录写入缓存。
     """
+    if answer_cache is not None:
+        cached = answer_cache.load(prompt)
+        if cached is not None:
+            return cached["answer"]
     try:
-        society = construct_society(prompt)
-        answer, chat_history, token_count = run_society(society)
+        society = construct_society(prompt, extra_tools=extra_tools)
+        answer, chat_history, token_count = run_society(society, round_limit=ROUND_LIMIT)
         # return camel_answer(prompt, output_lang="English")
+        if answer_cache is not None:
+            answer_cache.save(prompt, answer, chat_history, token_count)
         return answer
     except Exception as e:
         # 若 CAMEL 抛错，返回空串，继续下一条
@@ -88,8 +104,8 @@ def get_llm_response(prompt: str, model: str) -> str:
 
 
 
-def evaluate_response(question: str, llm_response: str, ground_truth: str, model: str) -> Dict[str, str]:
-    evaluation_prompt = f"""===Task===
+def build_evaluation_prompt(question: str, llm_response: str, ground_truth: str) -> str:
+    return f"""===Task===
 I need your help in evaluating an answer provided by an LLM against a ground
 truth answer. Your task is to determine if the ground truth answer is present in the LLM's
 response. Please analyze the provided data and make a decision.
@@ -109,6 +125,21 @@ Provide your final evaluation in the following format:
 "Decision:" ("TRUE" or "FALSE" )
 Please proceed with the evaluation."""
 
+
+# 评测 prompt 模板的指纹：改了 build_evaluation_prompt 就自动换版本，旧的评测缓存不再命中
+JUDGE_PROMPT_VERSION = stable_hash(
+    build_evaluation_prompt("{question}", "{llm_response}", "{ground_truth}")
+)[:16]
+
+
+def evaluate_response(question: str, llm_response: str, ground_truth: str, model: str,
+                      judge_cache: JudgeCache = None) -> Dict[str, str]:
+    if judge_cache is not None:
+        cached = judge_cache.load(question, llm_response, ground_truth)
+        if cached is not None:
+            return cached
+
+    evaluation_prompt = build_evaluation_prompt(question, llm_response, ground_truth)
     evaluation_response = client.chat.completions.create(
         model=model,
         messages=[
@@ -133,12 +164,31 @@ Please proceed with the evaluation."""
         elif line.startswith("Explanation:"):
             explanation = line.split(":", 1)[1].strip()
 
-    return {"decision": decision, "explanation": explanation}
+    evaluation = {"decision": decision, "explanation": explanation}
+    if judge_cache is not None:
+        judge_cache.save(question, llm_response, ground_truth, evaluation)
+    return evaluation
 
 
-def main(model: str):
-    # Load the dataset
-    dataset = load_dataset("google/frames-benchmark", split="test")
+def main(model: str, judge_model: str = None, cache_dir: str = "frames_cache", society_tag: str = "",
+         wiki_store: str = None, offline: bool = False, reasoning_types: List[str] = None,
+         indices: List[int] = None, limit: int = None, frames_snapshot: str = None,
+         results_store: str = "results_store"):
+    # Load the dataset: 本地固定版本的 Arrow 快照，内存映射，无网络访问
+    dataset = load_frames(frames_snapshot, reasoning_types=reasoning_types, indices=indices, limit=limit)
+
+    # 可选：把全部 wiki_links 去重后预取到本地快照，society 通过本地查询工具读取
+    wiki_tools = None
+    if wiki_store:
+        store = WikiArticleStore(wiki_store)
+        if not offline:
+            asyncio.run(prefetch_articles(store, collect_wiki_links(dataset)))
+        wiki_tools = WikiLookupToolkit(store).get_tools()
+
+    # 作答与评测分开缓存：换评测 prompt / 模型时不必重跑 society
+    answer_cache = AnswerCache(cache_dir, society_config(construct_society, ROUND_LIMIT, society_tag))
+    judge_model = judge_model or model
+    judge_cache = JudgeCache(cache_dir, judge_model, JUDGE_PROMPT_VERSION)
 
     filename = f"evaluation_results_{model.replace('/', '_')}.json"
     existing_results = load_existing_results(filename)
@@ -149,9 +199,9 @@ def main(model: str):
         if index <= last_processed_index:
             continue
 
-        prompt = generate_llm_prompt(item['Prompt'], item['wiki_links'])
-        llm_response = get_llm_response(prompt, model)
-        evaluation = evaluate_response(item['Prompt'], llm_response, item['Answer'], model)
+        prompt = generate_llm_prompt(item['Prompt'], item['wiki_links'], local_wiki=wiki_tools is not None)
+        llm_response = get_llm_response(prompt, model, answer_cache, wiki_tools)
+        evaluation = evaluate_response(item['Prompt'], llm_response, item['Answer'], judge_model, judge_cache)
 
         result = {
             "index": index,
@@ -167,29 +217,34 @@ def main(model: str):
         print(f"Index: {index}, Decision: {result['evaluation_decision']}")
         # time.sleep(SLEEP_INTERVAL)
 
-    # Calculate and print summary statistics
-    results = load_existing_results(filename)
-    total_samples = len(results)
-    correct_answers = sum(1 for r in results if r['evaluation_decision'] == 'TRUE')
-    accuracy = correct_answers / total_samples
+    # 汇总统计：结果文件入库一次，再按列查询，不再对每个 reasoning type 重扫整个 JSON
+    store = ResultsStore(results_store)
+    run_id = store.ingest(filename, model=model, benchmark="frames")
+    overall = store.accuracy(["run_id"], runs=[run_id])[0]
 
     print(f"Model: {model}")
-    print(f"Total samples: {total_samples}")
-    print(f"Correct answers: {correct_answers}")
-    print(f"Accuracy: {accuracy:.2%}")
+    print(f"Total samples: {overall['total']}")
+    print(f"Correct answers: {overall['correct']}")
+    print(f"Accuracy: {overall['accuracy']:.2%}")
 
     # Print accuracy by reasoning type
-    reasoning_types = set(r['reasoning_type'] for r in results)
-    for rt in reasoning_types:
-        rt_samples = [r for r in results if r['reasoning_type'] == rt]
-        rt_correct = sum(1 for r in rt_samples if r['evaluation_decision'] == 'TRUE')
-        rt_accuracy = rt_correct / len(rt_samples)
-        print(f"Accuracy for {rt}: {rt_accuracy:.2%}")
-
+    for row in store.accuracy(["reasoning_type"], runs=[run_id]):
+        print(f"Accuracy for {row['reasoning_type']}: {row['accuracy']:.2%}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Evaluate LLM performance on google/frames-benchmark")
     parser.add_argument("--model", type=str, required=True, help="OpenAI model to use (e.g., gpt-4o, gpt-4o-mini)")
+    parser.add_argument("--judge-model", type=str, default=None, help="评测模型（默认同 --model）")
+    parser.add_argument("--cache-dir", type=str, default="frames_cache", help="作答与评测缓存目录")
+    parser.add_argument("--society-tag", type=str, default="", help="society 配置标签，改动 construct_society 后换一个以避开旧答案缓存")
+    parser.add_argument("--wiki-store", type=str, default=None, help="本地 Wikipedia 快照（SQLite）路径，指定后先预取 wiki_links 并给 society 本地查询工具")
+    parser.add_argument("--offline", action="store_true", help="不预取，只使用本地快照中已有的文章")
+    parser.add_argument("--reasoning-type", type=str, action="append", default=None, help="只评测 reasoning_types 含该类型的样本，可重复指定")
+    parser.add_argument("--indices", type=int, nargs="+", default=None, help="只评测这些样本 index")
+    parser.add_argument("--limit", type=int, default=None, help="只评测前 N 条样本")
+    parser.add_argument("--frames-snapshot", type=str, default=None, help="FRAMES 本地 Arrow 快照路径（默认使用仓库内固定版本）")
+    parser.add_argument("--results-store", type=str, default="results_store", help="结果分析库目录，评测结束后自动入库")
     args = parser.parse_args()
 
-    main(args.model)
\ No newline at end of file
+    main(args.model, args.judge_model, args.cache_dir, args.society_tag, args.wiki_store, args.offline,
+         args.reasoning_type, args.indices, args.limit, args.frames_snapshot, args.results_store)
\ No newline at end of file
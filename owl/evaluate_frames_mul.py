@@ -1,16 +1,16 @@
 import argparse
+import asyncio
 import json
 import os
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from openai import OpenAI
-from datasets import load_dataset
+from openai import AsyncOpenAI
 from tqdm import tqdm
-from examples.run_deepseek_zh import construct_society,run_society
-from multiprocessing import Pool, cpu_count
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from examples.run_deepseek_zh import construct_society
+from owl.utils import load_frames, arun_society, WikiArticleStore, WikiLookupToolkit, collect_wiki_links, prefetch_articles
+from owl.frames_cache import AnswerCache, JudgeCache, society_config, stable_hash
 import markdown     # pip install markdown
 from bs4 import BeautifulSoup  # pip install beautifulsoup4
 # TIMEOUT_SECONDS = 60
@@ -24,13 +24,13 @@ import re
 # client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 #
 # client = DeepSeekAPI(api_key=os.getenv("DEEPSEEK_API_KEY"))
-client = OpenAI(
+aclient = AsyncOpenAI(
     api_key=os.getenv("DEEPSEEK_API_KEY"),
     base_url=os.getenv("DEEPSEEK_API_BASE_URL", "https://api.deepseek.com/v1")
-    # base_url="https://www.chataiapi.com/v1"
 )
 
 SLEEP_INTERVAL = 300
+ROUND_LIMIT = 15
 
 
 def load_existing_results(filename: str) -> List[Dict]:
@@ -43,7 +43,8 @@ def load_existing_results(filename: str) -> List[Dict]:
 
 
 def save_result(filename: str, result: Dict):
-    results = load_existing_results(filename)
+    # 同一 index 只保留最新一条（--rejudge 时会覆盖旧评测）
+    results = [r for r in load_existing_results(filename) if r.get("index") != result["index"]]
     results.append(result)
     # with open(filename, 'w') as f:
     #     json.dump(results, f, indent=2)
@@ -54,45 +55,29 @@ def save_results(filename: str, results: List[Dict]):
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
 
-def get_last_processed_index(results: List[Dict]) -> int:
-    if not results:
-        return -1
-    return max(int(r.get('index', -1)) for r in results)
-
-
-def generate_llm_prompt(prompt: str, wiki_links: List[str]) -> str:
+def generate_llm_prompt(prompt: str, wiki_links: List[str], local_wiki: bool = False) -> str:
+    if local_wiki:
+        # 文章已预取到本地快照，提示 society 优先用本地查询工具
+        wiki_links = (f"{wiki_links}\n(These articles are available offline: read them with the "
+                      f"`lookup_wikipedia_article` tool instead of searching or browsing the web.)")
     return f"Here are the relevant Wikipedia articles:\n{wiki_links}\n\nBased on all the information, answer the query. \n\nQuery: {prompt}\n\n"
 
 
-# def get_llm_response(prompt: str, model: str) -> str:
-#     response = client.with_options(timeout=1000.0).chat.completions.create(
-#         model=model,
-#         messages=[
-#             {"role": "system", "content": "You are a helpful assistant."},
-#             {"role": "user", "content": prompt}
-#         ],
-#         max_tokens=1000,
-#         n=1,
-#         stop=None,
-#         temperature=0.7,
-#         extra_body={"optillm_approach": "readurls&memory"}
-#     )
-#     return response.choices[0].message.content.strip()
-
-
-def get_llm_response(prompt: str, model: str) -> str:
+async def aget_llm_response(prompt: str, model: str,
+                            extra_tools: Optional[list] = None) -> Tuple[str, Optional[List[dict]], Optional[dict]]:
     """
-    ignore `model` arg here, we call camel_answer instead.
+    用 arun_society 驱动社会作答，
+    外层 asyncio.wait_for 取消时能真正中断正在进行的轮次。
+    返回 (answer, chat_history, token_info)；出错时后两项为 None，调用方据此不写缓存。
     """
     try:
-        society = construct_society(prompt)
-        answer, _, _ = run_society(society)
-        # return camel_answer(prompt, output_lang="English")
-        return answer
+        society = construct_society(prompt, extra_tools=extra_tools)
+        return await arun_society(society, round_limit=ROUND_LIMIT)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        # 若 CAMEL 抛错，返回空串，继续下一条
         print(f"[CAMEL ERROR] {e}")
-        return ""
+        return "", None, None
 
 
 def markdown_to_text(md: str) -> str:
@@ -109,7 +94,7 @@ def markdown_to_text(md: str) -> str:
     text = re.sub(r"\n{2,}", "\n\n", text).strip()
     return text
 
-def evaluate_response(question: str, llm_response: str, ground_truth: str, model: str) -> Dict[str, str]:
+def build_evaluation_prompt(question: str, llm_response: str, ground_truth: str) -> str:
     # llm_response = markdown_to_text(llm_response)
 
     evaluation_prompt = f"""===Task===
@@ -163,8 +148,11 @@ Please proceed with the evaluation."""
 # "Explanation:" (How you made the decision?)
 # "Decision:" ("TRUE" or "FALSE" )
 # Please proceed with the evaluation."""
+    return evaluation_prompt
+
 
-    evaluation_response = client.chat.completions.create(
+def _judge_request(evaluation_prompt: str, model: str) -> Dict:
+    return dict(
         model=model,
         messages=[
             {"role": "system", "content": "You are a helpful assistant."},
@@ -176,8 +164,8 @@ Please proceed with the evaluation."""
         temperature=0.3,
     )
 
-    evaluation_text = evaluation_response.choices[0].message.content.strip()
 
+def parse_evaluation(evaluation_text: str) -> Dict[str, str]:
     # Extract the decision and explanation
     lines = evaluation_text.split('\n')
     decision = "FALSE"
@@ -191,73 +179,204 @@ Please proceed with the evaluation."""
     return {"decision": decision, "explanation": explanation}
 
 
-# def process_item(args):
-# def process_item(item, model, last_idx):
-def process_item(item, model):
+async def aevaluate_response(question: str, llm_response: str, ground_truth: str, model: str) -> Dict[str, str]:
+    evaluation_prompt = build_evaluation_prompt(question, llm_response, ground_truth)
+    evaluation_response = await aclient.chat.completions.create(**_judge_request(evaluation_prompt, model))
+    return parse_evaluation(evaluation_response.choices[0].message.content.strip())
+
+
+class TokenBucket:
+    """
+    异步令牌桶：每秒补充 rate 个令牌，最多积攒 capacity 个；rate 为 None/0 时不限速。
+    """
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_DONE = object()
+
+# 评测 prompt 模板的指纹：改了 build_evaluation_prompt 就自动换版本，旧的评测缓存不再命中
+JUDGE_PROMPT_VERSION = stable_hash(
+    build_evaluation_prompt("{question}", "{llm_response}", "{ground_truth}")
+)[:16]
+
+
+async def run_pipeline(tasks: List[Dict], model: str, filename: str, args,
+                       answer_cache: AnswerCache, judge_cache: JudgeCache,
+                       wiki_tools: Optional[list] = None) -> None:
     """
-    多进程 worker：处理单条样本，返回结果 dict 或 None（已处理过的）。
-    args = (item, model, last_idx)
+    两级流水线：answer 阶段跑多智能体社会，judge 阶段调用评测模型，
+    中间用有界队列衔接，使评测与作答重叠进行。
+    两个阶段各自有并发上限、令牌桶限速和单条样本的硬超时（超时即取消，不保存，下次续跑会重试）。
+    作答与评测结果分别查/写缓存；--rejudge 时只用缓存中的答案，不会启动 society。
     """
-    # item, model, last_idx = args
-    idx = int(item["Unnamed: 0"])
-    # if idx <= last_idx:
-    #     return None
-    prompt = generate_llm_prompt(item["Prompt"], item["wiki_links"])
-    resp = get_llm_response(prompt, model)
-    ev   = evaluate_response(item["Prompt"], resp, item["Answer"], model)
-    return {
-        "index": idx,
-        "prompt": item["Prompt"],
-        "ground_truth": item["Answer"],
-        "llm_response": resp,
-        "evaluation_decision": ev["decision"],
-        "evaluation_explanation": ev["explanation"],
-        "reasoning_type": item["reasoning_types"],
-    }
-
-def main(model: str):
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.queue_size)
+    answer_bucket = TokenBucket(args.answer_rps)
+    judge_bucket = TokenBucket(args.judge_rps)
+    items: asyncio.Queue = asyncio.Queue()
+    for item in tasks:
+        items.put_nowait(item)
+    pbar = tqdm(total=len(tasks), desc="Evaluating")
+
+    async def answer_worker():
+        while True:
+            try:
+                item = items.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            idx = int(item["Unnamed: 0"])
+            prompt = generate_llm_prompt(item["Prompt"], item["wiki_links"], local_wiki=wiki_tools is not None)
+            cached = answer_cache.load(prompt)
+            if cached is not None:
+                resp = cached["answer"]
+            elif args.rejudge:
+                # 重评模式下没有缓存答案的样本直接跳过
+                pbar.update(1)
+                continue
+            else:
+                await answer_bucket.acquire()
+                try:
+                    resp, chat_history, token_info = await asyncio.wait_for(
+                        aget_llm_response(prompt, model, wiki_tools), args.answer_timeout
+                    )
+                except asyncio.TimeoutError:
+                    print(f"[ANSWER TIMEOUT] index={idx}")
+                    pbar.update(1)
+                    continue
+                if chat_history is None:
+                    # society 出错：不评测也不保存，下次续跑会重试
+                    pbar.update(1)
+                    continue
+                answer_cache.save(prompt, resp, chat_history, token_info)
+            # 队列满时在这里阻塞，作答速度不会远超评测速度
+            await queue.put((item, resp))
+
+    async def judge_worker():
+        while True:
+            entry = await queue.get()
+            if entry is _DONE:
+                return
+            item, resp = entry
+            idx = int(item["Unnamed: 0"])
+            try:
+                ev = judge_cache.load(item["Prompt"], resp, item["Answer"])
+                if ev is None:
+                    await judge_bucket.acquire()
+                    ev = await asyncio.wait_for(
+                        aevaluate_response(item["Prompt"], resp, item["Answer"], judge_cache.judge_model),
+                        args.judge_timeout,
+                    )
+                    judge_cache.save(item["Prompt"], resp, item["Answer"], ev)
+            except asyncio.TimeoutError:
+                print(f"[JUDGE TIMEOUT] index={idx}")
+                continue
+            except Exception as e:
+                print(f"[JUDGE ERROR] index={idx}: {e}")
+                continue
+            finally:
+                pbar.update(1)
+            try:
+                save_result(filename, {
+                    "index": idx,
+                    "prompt": item["Prompt"],
+                    "ground_truth": item["Answer"],
+                    "llm_response": resp,
+                    "evaluation_decision": ev["decision"],
+                    "evaluation_explanation": ev["explanation"],
+                    "reasoning_type": item["reasoning_types"],
+                })
+            except Exception as e:
+                # 保存失败只丢这一条（下次续跑会重试），worker 继续消费队列，作答侧不会卡在 queue.put 上
+                print(f"[SAVE ERROR] index={idx}: {e}")
+
+    async def produce():
+        await asyncio.gather(*answerers)
+        for _ in judges:
+            await queue.put(_DONE)
+
+    answerers = [asyncio.create_task(answer_worker()) for _ in range(args.answer_concurrency)]
+    judges = [asyncio.create_task(judge_worker()) for _ in range(args.judge_concurrency)]
+    try:
+        # 作答与评测一起等待：任一侧意外退出时立即抛出，finally 取消另一侧，不会永久阻塞
+        await asyncio.gather(produce(), *judges)
+    finally:
+        for t in answerers + judges:
+            t.cancel()
+        pbar.close()
+
+
+def main(args):
+    model = args.model
     # 1. 载入数据集
-    dataset = list(load_dataset("google/frames-benchmark", split="test"))
+    #    本地固定版本的 Arrow 快照，内存映射，无网络访问；按 reasoning type / index 选子集时不物化其余样本
+    dataset = load_frames(args.frames_snapshot, reasoning_types=args.reasoning_type,
+                          indices=args.indices, limit=args.limit)
 
-    # 2. 断点续跑：读取已存 json，并计算 last_idx
+    # 2. 断点续跑：读取已存 json
     filename = f"evaluation_results_{model.replace('/', '_')}.json"
     existing = load_existing_results(filename)
-    last_idx = get_last_processed_index(existing)
     processed_indices = {r["index"] for r in existing}
-    # 3. 构造仅包含未处理样本的任务列表
-    # tasks = [(item, model, last_idx) for item in dataset if int(item["Unnamed: 0"]) > last_idx]
-    tasks = [item for item in dataset if int(item["Unnamed: 0"]) not in processed_indices]
-
-
-    from signal import signal, SIGINT, SIG_IGN
-    orig_handler = signal(SIGINT, SIG_IGN)
-
-    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-        signal(SIGINT, orig_handler)
-        futures = {
-            # executor.submit(process_item, item, model, last_idx): item
-            # for item, model, last_idx in tasks
-            executor.submit(process_item, item, model): item
-            for item in tasks
-        }
-
-        try:
-            for fut in tqdm(as_completed(futures), total=len(futures), desc="Evaluating"):
-                try:
-                    res = fut.result(timeout=TIMEOUT_SECONDS)
-                except TimeoutError:
-                    # 单个子任务超时则跳过
-                    continue
-                if res:
-                    save_result(filename, res)
-        except KeyboardInterrupt:
-            print("\n检测到 Ctrl+C，已中断，当前进度已保存。")
+    # 3. 构造仅包含未处理样本的任务列表；重评模式下对全部样本重新评测
+    if args.rejudge:
+        tasks = list(dataset)
+    else:
+        tasks = [item for item in dataset if int(item["Unnamed: 0"]) not in processed_indices]
+
+    answer_cache = AnswerCache(args.cache_dir, society_config(construct_society, ROUND_LIMIT, args.society_tag))
+    judge_cache = JudgeCache(args.cache_dir, args.judge_model or model, JUDGE_PROMPT_VERSION)
+
+    # 4. 可选：把全部 wiki_links 去重后预取到本地快照，society 通过本地查询工具读取
+    wiki_tools = None
+    if args.wiki_store:
+        store = WikiArticleStore(args.wiki_store)
+        if not args.offline:
+            asyncio.run(prefetch_articles(store, collect_wiki_links(dataset)))
+        wiki_tools = WikiLookupToolkit(store).get_tools()
 
+    try:
+        asyncio.run(run_pipeline(tasks, model, filename, args, answer_cache, judge_cache, wiki_tools))
+    except KeyboardInterrupt:
+        print("\n检测到 Ctrl+C，已中断，当前进度已保存。")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Evaluate LLM performance on google/frames-benchmark")
     parser.add_argument("--model", type=str, required=True, help="OpenAI model to use (e.g., gpt-4o, gpt-4o-mini)")
+    parser.add_argument("--answer-concurrency", type=int, default=8, help="answer 阶段并发的社会数")
+    parser.add_argument("--judge-concurrency", type=int, default=4, help="judge 阶段并发的评测请求数")
+    parser.add_argument("--answer-rps", type=float, default=None, help="每秒最多启动的社会数（默认不限）")
+    parser.add_argument("--judge-rps", type=float, default=None, help="每秒最多发出的评测请求数（默认不限）")
+    parser.add_argument("--answer-timeout", type=float, default=TIMEOUT_SECONDS, help="单条样本作答的超时秒数")
+    parser.add_argument("--judge-timeout", type=float, default=120, help="单条样本评测的超时秒数")
+    parser.add_argument("--queue-size", type=int, default=16, help="answer 与 judge 之间的队列长度")
+    parser.add_argument("--judge-model", type=str, default=None, help="评测模型（默认同 --model）")
+    parser.add_argument("--cache-dir", type=str, default="frames_cache", help="作答与评测缓存目录")
+    parser.add_argument("--society-tag", type=str, default="", help="society 配置标签，改动 construct_society 后换一个以避开旧答案缓存")
+    parser.add_argument("--rejudge", action="store_true", help="只用缓存的答案重新评测，不重跑 society")
+    parser.add_argument("--wiki-store", type=str, default=None, help="本地 Wikipedia 快照（SQLite）路径，指定后先预取 wiki_links 并给 society 本地查询工具")
+    parser.add_argument("--offline", action="store_true", help="不预取，只使用本地快照中已有的文章")
+    parser.add_argument("--reasoning-type", type=str, action="append", default=None, help="只评测 reasoning_types 含该类型的样本，可重复指定")
+    parser.add_argument("--indices", type=int, nargs="+", default=None, help="只评测这些样本 index")
+    parser.add_argument("--limit", type=int, default=None, help="只评测前 N 条样本")
+    parser.add_argument("--frames-snapshot", type=str, default=None, help="FRAMES 本地 Arrow 快照路径（默认使用仓库内固定版本）")
     args = parser.parse_args()
 
-    main(args.model)
\ No newline at end of file
+    main(args)
\ No newline at end of file
@@ -0,0 +1,122 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+"""
+FRAMES 评测的磁盘缓存：多智能体作答结果与评测（judge）结果分开持久化。
+
+- AnswerCache: 以 (prompt, society 配置) 的哈希为键，保存答案、完整对话记录与 token 统计。
+  改评测 prompt 或评测模型时不必重跑最昂贵的 society。
+- JudgeCache: 以 (question, answer, ground truth, judge model, prompt 版本) 的哈希为键，
+  保存评测结论，重复评测同一答案直接命中。
+
+每条记录单独一个 JSON 文件，写入先落临时文件再原子改名，多个并发 worker 同时写也不会互相覆盖。
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def stable_hash(obj: Any) -> str:
+    """对可 JSON 序列化的对象计算稳定的 sha256（键排序、不转义中文）。"""
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def society_config(construct_fn: Callable, round_limit: int, tag: str = "") -> Dict:
+    """作答缓存键的一部分：society 的构造函数与轮数上限；改了构造函数内部时用 tag 区分。"""
+    return {
+        "constructor": f"{construct_fn.__module__}.{construct_fn.__qualname__}",
+        "round_limit": round_limit,
+        "tag": tag,
+    }
+
+
+class _JsonStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # 两级目录，避免单目录下文件过多
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, record: Dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+
+class AnswerCache(_JsonStore):
+    """society 作答缓存。"""
+
+    def __init__(self, cache_dir: str, society_config: Dict):
+        super().__init__(os.path.join(cache_dir, "answers"))
+        self.society_config = society_config
+
+    def key(self, prompt: str) -> str:
+        return stable_hash({"prompt": prompt, "society": self.society_config})
+
+    def load(self, prompt: str) -> Optional[Dict]:
+        return self.get(self.key(prompt))
+
+    def save(self, prompt: str, answer: str, chat_history: Any, token_info: Any) -> None:
+        self.put(self.key(prompt), {
+            "prompt": prompt,
+            "society_config": self.society_config,
+            "answer": answer,
+            "chat_history": chat_history,
+            "token_info": token_info,
+            "created_at": time.time(),
+        })
+
+
+class JudgeCache(_JsonStore):
+    """评测结果缓存。"""
+
+    def __init__(self, cache_dir: str, judge_model: str, prompt_version: str):
+        super().__init__(os.path.join(cache_dir, "judgments"))
+        self.judge_model = judge_model
+        self.prompt_version = prompt_version
+
+    def key(self, question: str, answer: str, ground_truth: str) -> str:
+        return stable_hash({
+            "question": question,
+            "answer": answer,
+            "ground_truth": ground_truth,
+            "judge_model": self.judge_model,
+            "prompt_version": self.prompt_version,
+        })
+
+    def load(self, question: str, answer: str, ground_truth: str) -> Optional[Dict[str, str]]:
+        record = self.get(self.key(question, answer, ground_truth))
+        return record["evaluation"] if record else None
+
+    def save(self, question: str, answer: str, ground_truth: str, evaluation: Dict[str, str]) -> None:
+        self.put(self.key(question, answer, ground_truth), {
+            "judge_model": self.judge_model,
+            "prompt_version": self.prompt_version,
+            "evaluation": evaluation,
+            "created_at": time.time(),
+        })
@@ -20,7 +20,16 @@ from .enhanced_role_playing import (
     arun_society,
 )
 from .gaia import GAIABenchmark
+from .benchmark_data import BenchmarkTable, load_frames
+from .results_store import ResultsStore
 from .document_toolkit import DocumentProcessingToolkit
+from .tool_output_store import ToolOutputStore, ToolOutputToolkit, cap_tool_outputs
+from .wiki_store import (
+    WikiArticleStore,
+    WikiLookupToolkit,
+    collect_wiki_links,
+    prefetch_articles,
+)
 
 __all__ = [
     "extract_pattern",
@@ -29,5 +38,15 @@ __all__ = [
     "run_society",
     "arun_society",
     "GAIABenchmark",
+    "BenchmarkTable",
+    "ResultsStore",
+    "load_frames",
     "DocumentProcessingToolkit",
+    "ToolOutputStore",
+    "ToolOutputToolkit",
+    "cap_tool_outputs",
+    "WikiArticleStore",
+    "WikiLookupToolkit",
+    "collect_wiki_links",
+    "prefetch_articles",
 ]
@@ -1,10 +1,22 @@
-import asyncio, aiohttp, re, hashlib, os
-from urllib.parse import urlparse, urljoin
+import asyncio, aiohttp, re, hashlib, os, heapq, time
+from collections import deque
+from urllib.parse import urldefrag, urlparse, urljoin
 from bs4 import BeautifulSoup
 from readability import Document               # pip install readability-lxml
-from typing import List, Set, Dict
+from typing import Callable, List, Set, Dict, Optional
+
+from owl.utils.url_dedup import ExactSeenSet, SeenSet, normalize_url
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[一-鿿]", re.IGNORECASE)
+
+
+def _tokens(text: str) -> Set[str]:
+    return {t.lower() for t in _TOKEN_RE.findall(text or "")}
+
 
 class AsyncCrawler:
+    HEADERS = {"User-Agent": "Mozilla/5.0"}
+
     def __init__(
         self,
         max_depth: int = 1,
@@ -13,11 +25,18 @@ class AsyncCrawler:
         cache_dir: str = "tmp/",
         include_patterns: List[str] = None,
         exclude_patterns: List[str] = None,
+        time_budget: Optional[float] = None,
+        byte_budget: Optional[int] = None,
+        seen_factory: Callable[[], SeenSet] = ExactSeenSet,
     ):
         self.max_depth, self.limit = max_depth, limit
         self.sem = asyncio.Semaphore(concurrency)
-        self.seen: Set[str] = set()
+        # 每次 crawl 新建一个去重集合，不在长生命周期的实例上无限累积；
+        # 大站点可传入 ScalableBloomFilter 以固定的误判率换取有界内存
+        self.seen_factory = seen_factory
         self.include_patterns, self.exclude_patterns = include_patterns, exclude_patterns
+        # 预算：爬取耗时（秒）与累计下载的 HTML 字节数，None 表示不限
+        self.time_budget, self.byte_budget = time_budget, byte_budget
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
 
@@ -41,27 +60,95 @@ class AsyncCrawler:
         return (not self.include_patterns or p(self.include_patterns, url)) and \
                (not self.exclude_patterns or not p(self.exclude_patterns, url))
 
-    async def crawl(self, url: str) -> List[Dict]:
-        queue = [(url, 0)]
+    '''
+    相关性打分：query 分词后，与锚文本的重合度权重 2，与 URL 路径/参数的重合度权重 1，
+    再按深度轻微衰减。没有 query 时恒为 0（退化为 BFS 顺序）。
+    '''
+    @staticmethod
+    def score_link(query_tokens: Set[str], anchor_text: str, url: str, depth: int) -> float:
+        if not query_tokens:
+            return 0.0
+        parts = urlparse(url)
+        anchor_hits = len(query_tokens & _tokens(anchor_text))
+        url_hits = len(query_tokens & _tokens(f"{parts.path} {parts.query}"))
+        return (2 * anchor_hits + url_hits) / len(query_tokens) - 0.1 * depth
+
+    async def crawl(
+        self,
+        url: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_depth: Optional[int] = None,
+        limit: Optional[int] = None,
+        query: Optional[str] = None,
+        time_budget: Optional[float] = None,
+        byte_budget: Optional[int] = None,
+    ) -> List[Dict]:
+        # session 由调用方传入时复用其连接池（keep-alive / DNS 缓存），否则临时建一个
+        if session is None:
+            async with aiohttp.ClientSession(headers=self.HEADERS) as sess:
+                return await self.crawl(url, sess, max_depth, limit,
+                                        query, time_budget, byte_budget)
+
+        max_depth = self.max_depth if max_depth is None else max_depth
+        limit = self.limit if limit is None else limit
+        time_budget = self.time_budget if time_budget is None else time_budget
+        byte_budget = self.byte_budget if byte_budget is None else byte_budget
+        query_tokens = _tokens(query)
+
+        # 有 query 时用最大堆做 best-first frontier，否则保持 BFS 队列
+        # heap 元素: (-score, 入队序号, url, depth)；序号保证同分时按发现顺序
+        best_first = bool(query_tokens)
+        frontier = [] if best_first else deque()
+        counter = 0
+
+        def push(u: str, d: int, score: float = 0.0):
+            nonlocal counter
+            if best_first:
+                heapq.heappush(frontier, (-score, counter, u, d))
+            else:
+                frontier.append((u, d))
+            counter += 1
+
+        def pop():
+            if best_first:
+                _, _, u, d = heapq.heappop(frontier)
+                return u, d
+            return frontier.popleft()
+
+        # seen 以规范化 URL 为键；frontier 和请求使用原始的绝对 URL，
+        # 因为规范化后的 URL 不一定指向同一资源
+        seen = self.seen_factory()
+        push(urldefrag(url.strip())[0], 0)
         results = []
+        fetched_bytes = 0
+        started = time.monotonic()
+
+        while frontier and len(results) < limit:
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                break
+            if byte_budget is not None and fetched_bytes >= byte_budget:
+                break
+
+            cur, depth = pop()
+            key = normalize_url(cur)
+            if key in seen or depth > max_depth or not self._match(cur):
+                continue
+            seen.add(key)
+            html = await self.fetch(session, cur)
+            if not html:
+                continue
+            fetched_bytes += len(html.encode("utf-8", errors="ignore"))
+
+            soup = BeautifulSoup(html, "html.parser")
+            results.append({"url": cur, "html": html, "soup": soup})
 
-        async with aiohttp.ClientSession(headers={"User-Agent": "Mozilla/5.0"}) as sess:
-            while queue and len(results) < self.limit:
-                cur, depth = queue.pop(0)
-                if cur in self.seen or depth > self.max_depth or not self._match(cur):
-                    continue
-                self.seen.add(cur)
-                html = await self.fetch(sess, cur)
-                if not html:
-                    continue
-
-                soup = BeautifulSoup(html, "html.parser")
-                results.append({"url": cur, "html": html, "soup": soup})
-
-                # enqueue new links
-                if depth < self.max_depth:
-                    for a in soup.find_all("a", href=True):
-                        nxt = urljoin(cur, a["href"])
-                        if urlparse(nxt).scheme in ("http", "https"):
-                            queue.append((nxt, depth + 1))
+            # enqueue new links
+            if depth < max_depth:
+                for a in soup.find_all("a", href=True):
+                    nxt = urldefrag(urljoin(cur, a["href"]))[0]
+                    if urlparse(nxt).scheme not in ("http", "https") or normalize_url(nxt) in seen:
+                        continue
+                    score = self.score_link(query_tokens, a.get_text(" ", strip=True),
+                                            nxt, depth + 1)
+                    push(nxt, depth + 1, score)
         return results
@@ -0,0 +1,213 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from camel.logger import get_logger
+
+logger = get_logger(__name__)
+
+# The FRAMES test split pinned to a dataset revision, shipped in the repo as
+# the Arrow file written by `datasets`.
+FRAMES_REVISION = "58d9fb6330f3ab1316d1eca12e5e8ef23dcc22ef"
+FRAMES_SNAPSHOT = (
+    Path(__file__).resolve().parent.parent
+    / "google___frames-benchmark/default/0.0.0"
+    / FRAMES_REVISION
+    / "frames-benchmark-test.arrow"
+)
+
+
+def open_arrow(path: Union[str, Path]) -> pa.Table:
+    r"""Open an Arrow IPC file (file or stream format) memory-mapped.
+
+    The returned table references the mapped pages directly, so opening is
+    O(metadata) and rows are only paged in when they are read.
+    """
+    source = pa.memory_map(str(path), "r")
+    try:
+        return pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source).read_all()
+
+
+def write_arrow(table: pa.Table, path: Union[str, Path]) -> None:
+    r"""Write `table` as an Arrow IPC file, atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp.replace(path)
+
+
+class BenchmarkTable(Sequence):
+    r"""A read-only, lazily materialized view over a benchmark split.
+
+    Filtering returns another zero-copy view; rows become Python dicts only
+    when they are indexed or iterated, so selecting a handful of tasks from
+    a large split never materializes the rest.
+
+    Args:
+        table (pa.Table): The underlying Arrow table.
+        row_fn (Callable[[Dict], Dict], optional): A function applied to
+            every materialized row, e.g. to resolve relative file paths.
+            (default: :obj:`None`)
+    """
+
+    def __init__(self, table: pa.Table, row_fn: Optional[Callable[[Dict], Dict]] = None):
+        self.table = table
+        self.row_fn = row_fn
+
+    @classmethod
+    def open(cls, path: Union[str, Path], row_fn: Optional[Callable[[Dict], Dict]] = None):
+        return cls(open_arrow(path), row_fn)
+
+    def _wrap(self, table: pa.Table) -> "BenchmarkTable":
+        return BenchmarkTable(table, self.row_fn)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        row = self.table.slice(i, 1).to_pylist()[0]
+        return self.row_fn(row) if self.row_fn else row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for batch in self.table.to_batches(max_chunksize=256):
+            for row in batch.to_pylist():
+                yield self.row_fn(row) if self.row_fn else row
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def take(self, positions: Sequence[int]) -> "BenchmarkTable":
+        r"""Select rows by position."""
+        return self._wrap(self.table.take(pa.array(positions, type=pa.int64())))
+
+    def where_in(self, column: str, values: Sequence[Any]) -> "BenchmarkTable":
+        r"""Keep the rows whose `column` is one of `values`."""
+        col = self.table.column(column)
+        mask = pc.is_in(col, value_set=pa.array(values, type=col.type))
+        return self._wrap(self.table.filter(mask))
+
+    def where_contains(self, column: str, substrings: Sequence[str]) -> "BenchmarkTable":
+        r"""Keep the rows whose string `column` contains any of `substrings`
+        (case-insensitive)."""
+        col = self.table.column(column)
+        mask = None
+        for sub in substrings:
+            m = pc.match_substring(col, sub, ignore_case=True)
+            mask = m if mask is None else pc.or_(mask, m)
+        return self if mask is None else self._wrap(self.table.filter(mask))
+
+    def head(self, n: int) -> "BenchmarkTable":
+        return self._wrap(self.table.slice(0, n))
+
+
+def load_frames(
+    path: Union[str, Path, None] = None,
+    reasoning_types: Optional[Sequence[str]] = None,
+    indices: Optional[Sequence[int]] = None,
+    limit: Optional[int] = None,
+) -> BenchmarkTable:
+    r"""Load the FRAMES test split from the pinned local snapshot, without
+    any network access.
+
+    Args:
+        path (str, optional): The Arrow snapshot to load.
+            (default: :obj:`FRAMES_SNAPSHOT`)
+        reasoning_types (Sequence[str], optional): Keep only items whose
+            `reasoning_types` mentions one of these, e.g.
+            `["Numerical reasoning"]`. (default: :obj:`None`)
+        indices (Sequence[int], optional): Keep only these dataset indices
+            (the `Unnamed: 0` column). (default: :obj:`None`)
+        limit (int, optional): Keep only the first `limit` selected items.
+            (default: :obj:`None`)
+
+    Returns:
+        BenchmarkTable: The selected items.
+    """
+    path = Path(path or FRAMES_SNAPSHOT)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"FRAMES snapshot not found at {path}. Create it once with "
+            f"`snapshot_frames('{path}')`."
+        )
+    data = BenchmarkTable.open(path)
+    if reasoning_types:
+        data = data.where_contains("reasoning_types", reasoning_types)
+    if indices is not None:
+        data = data.where_in("Unnamed: 0", list(indices))
+    if limit is not None:
+        data = data.head(limit)
+    return data
+
+
+def snapshot_frames(
+    path: Union[str, Path],
+    revision: str = FRAMES_REVISION,
+    force_download: bool = False,
+) -> Path:
+    r"""Download the FRAMES test split once (pinned to `revision`) and write
+    it as a local Arrow file. This is the only function here that touches
+    the network.
+
+    Args:
+        path (str): Where to write the Arrow snapshot.
+        revision (str, optional): The dataset revision to pin.
+            (default: :obj:`FRAMES_REVISION`)
+        force_download (bool, optional): Whether to re-download the split
+            instead of reusing the `datasets` cache. (default: :obj:`False`)
+
+    Returns:
+        Path: The written snapshot.
+    """
+    from datasets import load_dataset
+
+    ds = load_dataset(
+        "google/frames-benchmark", split="test", revision=revision,
+        download_mode="force_redownload" if force_download else None,
+    )
+    write_arrow(ds.data.table, path)
+    return Path(path)
+
+
+def snapshot_gaia_split(split_dir: Union[str, Path]) -> Path:
+    r"""Convert a GAIA split's `metadata.jsonl` into `metadata.arrow` next to
+    it. `file_name` is kept relative to the split directory."""
+    split_dir = Path(split_dir)
+    rows = []
+    with open(split_dir / "metadata.jsonl", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rows.append(json.loads(line))
+    # from_pylist only takes the columns of the first row; use every key seen
+    # in any row and leave it null where a row lacks it
+    columns = dict.fromkeys(key for row in rows for key in row)
+    table = pa.table({key: [row.get(key) for row in rows] for key in columns})
+    out = split_dir / "metadata.arrow"
+    write_arrow(table, out)
+    logger.info(f"Wrote GAIA snapshot with {len(rows)} rows to {out}")
+    return out
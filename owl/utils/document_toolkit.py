@@ -244,6 +244,18 @@ class DocumentProcessingToolkit(BaseToolkit):
                 return "Error while crawling the webpage."
 
         return str(data["data"][0]["markdown"])
+
+    async def _crawl_once(self, url: str) -> str:
+        # 每次 asyncio.run 都是新的事件循环，session 要在本循环结束前关闭
+        try:
+            return await self.web_toolkit.crawl_and_extract(url, max_depth=1, limit=1)
+        finally:
+            await self.web_toolkit.close()
+
+    def close(self):
+        r"""Release the network resources held by the toolkit."""
+        asyncio.run(self.web_toolkit.close())
+
     @retry_on_error()
     def _extract_webpage_content(self, url: str) -> str:
         """
@@ -252,9 +264,7 @@ class DocumentProcessingToolkit(BaseToolkit):
         """
         try:
             # max_depth=1 相当于 Firecrawl limit=1；可调
-            markdown = asyncio.run(
-                self.web_toolkit.crawl_and_extract(url, max_depth=1, limit=1)
-            )
+            markdown = asyncio.run(self._crawl_once(url))
             return markdown or "No content found on the webpage."
         except Exception as e:
             logger.error(f"Local crawler failed: {e}")
@@ -0,0 +1,188 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+import asyncio
+import hashlib
+import logging
+import os
+import pathlib
+import weakref
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import aiofiles
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class _LoopState:
+    r"""单个事件循环内的并发原语：asyncio 的信号量和 future 绑定到首次使用它们的循环，
+    不能跨 ``asyncio.run`` 复用。"""
+
+    def __init__(self, max_concurrency: int):
+        self.global_sem = asyncio.Semaphore(max_concurrency)
+        self.host_sems: Dict[str, asyncio.Semaphore] = {}
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+
+class DownloadManager:
+    r"""有界、流式的文件下载器。
+
+    - 全局并发上限 + 单 host 并发上限，避免一页几百张图时打开几百个 socket
+    - 分块流式写入临时文件，完成后 ``os.replace`` 原子改名，半截文件不会被当作缓存命中
+    - Content-Length 预检 + 实际字节数上限，超限立即中止
+    - 同一 URL 的并发请求只下载一次（in-flight 去重）
+    - ``metrics`` 记录命中、下载、失败、超限和字节数
+
+    Args:
+        out_dir (str): 下载目录。
+        max_concurrency (int): 全局并发下载数。(default: :obj:`16`)
+        per_host_concurrency (int): 单个 host 的并发下载数。
+            (default: :obj:`4`)
+        max_bytes (int): 单个文件允许的最大字节数。
+            (default: :obj:`10 * 1024 * 1024`)
+        chunk_size (int): 每次读取/写入的块大小。(default: :obj:`64 * 1024`)
+        content_type_prefix (str, optional): 要求的 Content-Type 前缀，
+            为 ``None`` 时不检查。(default: :obj:`"image"`)
+        timeout (float): 单个下载的总超时秒数。(default: :obj:`30`)
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        max_concurrency: int = 16,
+        per_host_concurrency: int = 4,
+        max_bytes: int = 10 * 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+        content_type_prefix: Optional[str] = "image",
+        timeout: float = 30,
+    ):
+        self.out_dir = out_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.content_type_prefix = content_type_prefix
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        # 事件循环 -> 该循环的信号量与 in-flight 表，循环被回收后自动清除
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.metrics: Dict[str, int] = defaultdict(int)
+        os.makedirs(out_dir, exist_ok=True)
+
+    def local_path(self, url: str) -> str:
+        # 依据 URL 生成本地文件名（md5 + 后缀），后缀过长视为无后缀
+        suffix = pathlib.Path(urlparse(url).path).suffix
+        if len(suffix) > 8:
+            suffix = ""
+        fname = hashlib.md5(url.encode()).hexdigest() + suffix
+        return os.path.join(self.out_dir, fname)
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    def _host_sem(self, state: _LoopState, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in state.host_sems:
+            state.host_sems[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return state.host_sems[host]
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> str:
+        r"""下载 ``url`` 并返回本地路径，失败返回空串。
+
+        同一 URL 已在下载中时直接等待那次下载的结果。
+        """
+        path = self.local_path(url)
+        # 只有完整改名后的文件才会出现在最终路径上，可以安全复用
+        if os.path.exists(path):
+            self.metrics["cache_hits"] += 1
+            return path
+
+        state = self._state()
+        if url in state.inflight:
+            self.metrics["dedup_hits"] += 1
+            return await asyncio.shield(state.inflight[url])
+
+        fut = asyncio.get_running_loop().create_future()
+        state.inflight[url] = fut
+        try:
+            result = await self._download(state, session, url, path)
+            fut.set_result(result)
+            return result
+        except BaseException:
+            # 取消等异常：让等待方拿到空结果而不是永远挂起
+            if not fut.done():
+                fut.set_result("")
+            raise
+        finally:
+            state.inflight.pop(url, None)
+
+    async def _download(
+        self,
+        state: _LoopState,
+        session: aiohttp.ClientSession,
+        url: str,
+        path: str,
+    ) -> str:
+        tmp_path = f"{path}.{os.getpid()}.{id(asyncio.current_task())}.part"
+        # 先取 host 槽位再取全局槽位：等待繁忙 host 时不占用全局槽位，
+        # 其他 host 的下载不会被阻塞
+        async with self._host_sem(state, url), state.global_sem:
+            self.metrics["requests"] += 1
+            try:
+                async with session.get(url, timeout=self.timeout) as r:
+                    if r.status != 200:
+                        self.metrics["bad_status"] += 1
+                        return ""
+                    ctype = r.headers.get("Content-Type", "")
+                    if self.content_type_prefix and not ctype.startswith(
+                        self.content_type_prefix
+                    ):
+                        self.metrics["bad_content_type"] += 1
+                        return ""
+                    # 1) 先看 Content-Length，明显超限的不读 body
+                    if r.content_length and r.content_length > self.max_bytes:
+                        self.metrics["too_large"] += 1
+                        return ""
+
+                    # 2) 分块写临时文件，边写边计数，超限即中止
+                    written = 0
+                    async with aiofiles.open(tmp_path, "wb") as f:
+                        async for chunk in r.content.iter_chunked(self.chunk_size):
+                            written += len(chunk)
+                            if written > self.max_bytes:
+                                self.metrics["too_large"] += 1
+                                break
+                            await f.write(chunk)
+                    if written > self.max_bytes:
+                        return ""
+
+                # 3) 写完后原子改名
+                os.replace(tmp_path, path)
+                self.metrics["downloaded"] += 1
+                self.metrics["bytes"] += written
+                return path
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                self.metrics["errors"] += 1
+                logger.debug(f"Failed to download {url}: {e}")
+                return ""
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
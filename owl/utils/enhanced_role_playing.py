@@ -22,6 +22,9 @@ from camel.messages.base import BaseMessage
 from camel.societies import RolePlaying
 from camel.logger import get_logger
 
+from .memory_policy import MemoryPolicy
+from .tool_output_store import with_latency
+
 
 from copy import deepcopy
 
@@ -40,6 +43,9 @@ class OwlRolePlaying(RolePlaying):
         self.assistant_agent_kwargs: dict = kwargs.get("assistant_agent_kwargs", {})
         # 4. 再次读取输出语言（与上面重复，但保持兼容性）
         self.output_language = kwargs.get("output_language", None)
+        # 5. 可选的记忆策略（RolePlaying 不认识该参数，需先取出）；每轮的 prompt 大小记录在 memory_metrics
+        self.memory_policy: Optional[MemoryPolicy] = kwargs.pop("memory_policy", None)
+        self.memory_metrics: List[dict] = []
 
         super().__init__(**kwargs)
         # 6. 按 GAIA 协议生成用户 & 助手端的 system message
@@ -122,6 +128,16 @@ class OwlRolePlaying(RolePlaying):
         )
         self.user_sys_msg = self.user_agent.system_message
 
+    def _apply_memory_policy(self) -> None:
+        r"""Apply :attr:`memory_policy` to both agents before a round."""
+        if self.memory_policy is None:
+            return
+        _round = len(self.memory_metrics) // 2
+        for role, agent in (("user", self.user_agent), ("assistant", self.assistant_agent)):
+            metrics = self.memory_policy.apply(agent)
+            self.memory_metrics.append({"round": _round, "agent": role, **metrics})
+            logger.debug(f"Memory policy round {_round} {role}: {metrics}")
+
     # def _judge_if_reasoning_task(self, question: str) -> bool:
     #     r"""Judge if the question is a reasoning task."""
 
@@ -225,6 +241,7 @@ Please note that our overall task may be very complicated. Here are some tips th
     def step(
         self, assistant_msg: BaseMessage
     ) -> Tuple[ChatAgentResponse, ChatAgentResponse]:
+        self._apply_memory_policy()
         user_response = self.user_agent.step(assistant_msg)
         if user_response.terminated or user_response.msgs is None:
             return (
@@ -315,6 +332,7 @@ Please note that our overall task may be very complicated. Here are some tips th
     async def astep(
         self, assistant_msg: BaseMessage
     ) -> Tuple[ChatAgentResponse, ChatAgentResponse]:
+        self._apply_memory_policy()
         user_response = await self.user_agent.astep(assistant_msg)
         if user_response.terminated or user_response.msgs is None:
             return (
@@ -388,6 +406,7 @@ class OwlGAIARolePlaying(OwlRolePlaying):
     def step(
         self, assistant_msg: BaseMessage
     ) -> Tuple[ChatAgentResponse, ChatAgentResponse]:
+        self._apply_memory_policy()
         user_response = self.user_agent.step(assistant_msg)
         if user_response.terminated or user_response.msgs is None:
             return (
@@ -593,7 +612,7 @@ def run_society(
         if assistant_response.info.get("tool_calls"):
             for tool_call in assistant_response.info["tool_calls"]:
                 # 每个 tool_call 都是一个对象，调用 .as_dict() 转成可序列化 dict
-                tool_call_records.append(tool_call.as_dict())
+                tool_call_records.append(with_latency(tool_call.as_dict()))
 
         # 4.4 构造本轮对话记录条目
         _data = {
@@ -690,7 +709,7 @@ async def arun_society(
         if assistant_response.info.get("tool_calls"):
             for tool_call in assistant_response.info["tool_calls"]:
                 # 将每个 ToolCall 对象转换为 dict，方便序列化和展示
-                tool_call_records.append(tool_call.as_dict())
+                tool_call_records.append(with_latency(tool_call.as_dict()))
 
         # 4.4 从响应中读取纯文本内容，防止属性不存在导致报错
         user_content = (
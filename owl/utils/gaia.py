@@ -17,16 +17,18 @@ sys.path.append("../")
 
 import json
 import random
-import re
-import string
 from pathlib import Path
 from typing import Any, Dict, List, Literal, Optional, Union, Tuple
 
+import pyarrow as pa
+import pyarrow.compute as pc
 from tqdm import tqdm
 from camel.benchmarks import BaseBenchmark
 from camel.tasks import Task
 from camel.logger import get_logger
 
+from . import gaia_scorer
+from .benchmark_data import BenchmarkTable, snapshot_gaia_split
 from .common import extract_pattern
 from .enhanced_role_playing import run_society, OwlGAIARolePlaying
 
@@ -61,8 +63,13 @@ class GAIABenchmark(BaseBenchmark):
         """
         super().__init__("gaia", data_dir, save_to, processes)
 
-    def download(self):
-        r"""Download the GAIA dataset."""
+    def download(self, force_download: bool = False):
+        r"""Download the GAIA dataset.
+
+        Args:
+            force_download (bool, optional): Whether to re-download files
+                that already exist in `data_dir`. (default: :obj:`False`)
+        """
         from huggingface_hub import snapshot_download
 
         snapshot_download(
@@ -70,6 +77,7 @@ class GAIABenchmark(BaseBenchmark):
             repo_type="dataset",
             local_dir=self.data_dir,
             local_dir_use_symlinks=True,
+            force_download=force_download,
         )
 
     def _check_task_completed(self, task_id: str) -> bool:
@@ -100,35 +108,49 @@ class GAIABenchmark(BaseBenchmark):
     def load(self, force_download=False):
         r"""Load the GAIA dataset.
 
+        Each split is read from a local `metadata.arrow` snapshot,
+        memory-mapped, so loading does not parse every task up front and
+        never touches the network. The snapshot is built from
+        `metadata.jsonl` the first time; the dataset is downloaded only if
+        neither exists.
+
         Args:
-            force_download (bool, optional): Whether to
-                force download the data.
+            force_download (bool, optional): Whether to re-download the
+                data from the hub, overwriting local files, and rebuild the
+                snapshots from it.
         """
         if force_download:
             logger.info("Force downloading data.")
-            self.download()
+            self.download(force_download=True)
 
         # Define validation and test directories
         valid_dir = self.data_dir / "2023/validation"
         test_dir = self.data_dir / "2023/test"
 
-        # Check if directories exist; if not, download the data
-        if not valid_dir.is_dir() or not test_dir.is_dir():
+        def _has_split(path: Path) -> bool:
+            return (path / "metadata.arrow").exists() or (path / "metadata.jsonl").exists()
+
+        # Check if the data exists locally; if not, download the data
+        if not _has_split(valid_dir) or not _has_split(test_dir):
             logger.info("Data not found. Downloading data.")
             self.download()
 
-        # Load metadata for both validation and test datasets
         for path, label in zip([valid_dir, test_dir], ["valid", "test"]):
-            self._data[label] = []
-            with open(path / "metadata.jsonl", "r") as f:
-                lines = f.readlines()
-                for line in lines:
-                    data = json.loads(line)
-                    if data["task_id"] == "0-0-0-0-0":
-                        continue
-                    if data["file_name"]:
-                        data["file_name"] = path / data["file_name"]
-                    self._data[label].append(data)
+            snapshot = path / "metadata.arrow"
+            if force_download or not snapshot.exists():
+                snapshot_gaia_split(path)
+
+            def _resolve(row: Dict[str, Any], path: Path = path) -> Dict[str, Any]:
+                if row.get("file_name"):
+                    row["file_name"] = path / row["file_name"]
+                return row
+
+            data = BenchmarkTable.open(snapshot, row_fn=_resolve)
+            # Drop the placeholder task without materializing the split
+            task_ids = data.table.column("task_id")
+            self._data[label] = BenchmarkTable(
+                data.table.filter(pc.not_equal(task_ids, "0-0-0-0-0")), _resolve
+            )
         return self
 
     @property
@@ -167,7 +189,18 @@ class GAIABenchmark(BaseBenchmark):
                 f"Invalid value for `level`: {level}, expected 1, 2, 3 " "or 'all'."
             )
         logger.info(f"Running benchmark on {on} set at levels {levels}.")
-        datas = [data for data in self._data[on] if data["Level"] in levels]
+        split = self._data[on]
+        if isinstance(split, BenchmarkTable):
+            # Filter on the Arrow table; only the selected tasks become dicts
+            level_col = split.table.column("Level")
+            if pa.types.is_integer(level_col.type):
+                datas = split.where_in("Level", levels).records()
+            else:
+                datas = split.where_in("Level", [str(lv) for lv in levels]).records()
+                for data in datas:
+                    data["Level"] = int(data["Level"])
+        else:
+            datas = [data for data in split if data["Level"] in levels]
         # Shuffle and subset data if necessary
         if randomize:
             random.shuffle(datas)
@@ -327,55 +360,17 @@ class GAIABenchmark(BaseBenchmark):
         Returns:
             bool: The score of the model
         """
+        logger.info(f"Evaluating {model_answer} against {ground_truth}.")
+        return gaia_scorer.score_answer(model_answer, ground_truth)
 
-        def is_float(element: Any) -> bool:
-            try:
-                float(element)
-                return True
-            except ValueError:
-                return False
-
-        if is_float(ground_truth):
-            logger.info(f"Evaluating {model_answer} as a number.")
-            normalized_answer = self.normalize_number_str(model_answer)
-            return normalized_answer == float(ground_truth)
-
-        elif any(char in ground_truth for char in [",", ";"]):
-            logger.info(f"Evaluating {model_answer} as a comma separated list.")
-            gt_elems = self.split_string(ground_truth)
-            ma_elems = self.split_string(model_answer)
-
-            if len(gt_elems) != len(ma_elems):
-                logger.warning(
-                    "Answer lists have different lengths, returning False.",
-                    UserWarning,
-                )
-                return False
-
-            comparisons = []
-            for ma_elem, gt_elem in zip(ma_elems, gt_elems):
-                if is_float(gt_elem):
-                    normalized_ma_elem = self.normalize_number_str(ma_elem)
-                    comparisons.append(normalized_ma_elem == float(gt_elem))
-                else:
-                    ma_elem = self.normalize_str(ma_elem, remove_punct=False)
-                    gt_elem = self.normalize_str(gt_elem, remove_punct=False)
-                    comparisons.append(ma_elem == gt_elem)
-            return all(comparisons)
-        else:
-            logger.info(f"Evaluating {model_answer} as a string.")
-            ma_elem = self.normalize_str(model_answer)
-            gt_elem = self.normalize_str(ground_truth)
-            return ma_elem == gt_elem
+    def score_results(self, results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        r"""Re-score result records in batch (the current results by
+        default) and return accuracy broken down by level and answer type.
+        """
+        return gaia_scorer.rescore_results(self._results if results is None else results)
 
     def normalize_number_str(self, number_str: str) -> float:
-        for char in ["$", "%", ","]:
-            number_str = number_str.replace(char, "")
-        try:
-            return float(number_str)
-        except ValueError:
-            logger.error(f"String {number_str} cannot be normalized to number str.")
-            return float("inf")
+        return gaia_scorer.normalize_number_str(number_str)
 
     def split_string(self, s: str, char_list: Optional[List[str]] = None) -> list[str]:
         r"""Split a string based on a list of characters.
@@ -386,10 +381,7 @@ class GAIABenchmark(BaseBenchmark):
                 he list of characters to split on.
                 (default: :obj:`None`)
         """
-        if char_list is None:
-            char_list = [",", ";"]
-        pattern = f"[{''.join(char_list)}]"
-        return re.split(pattern, s)
+        return gaia_scorer.split_string(s, char_list)
 
     def normalize_str(self, input_str, remove_punct=True) -> str:
         r"""Normalize a string.
@@ -401,9 +393,4 @@ class GAIABenchmark(BaseBenchmark):
         Returns:
             str: The normalized string.
         """
-        no_spaces = re.sub(r"\s", "", input_str)
-        if remove_punct:
-            translator = str.maketrans("", "", string.punctuation)
-            return no_spaces.lower().translate(translator)
-        else:
-            return no_spaces.lower()
+        return gaia_scorer.normalize_str(input_str, remove_punct)
@@ -0,0 +1,196 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+r"""Batch scorer for GAIA answers.
+
+Implements the same rules as the official GAIA scorer
+(https://huggingface.co/spaces/gaia-benchmark/leaderboard/blob/main/scorer.py)
+with precompiled regexes and translation tables, ground truths normalized
+once per distinct value, and `None` answers scored as wrong instead of
+crashing.
+"""
+import argparse
+import json
+import re
+import string
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_WS_RE = re.compile(r"\s")
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+_NUMBER_TABLE = str.maketrans("", "", "$%,")
+_DEFAULT_SPLIT = ",;"
+
+NUMBER, LIST, STRING = "number", "list", "string"
+
+
+def is_float(element: Any) -> bool:
+    try:
+        float(element)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def normalize_number_str(number_str: Optional[str]) -> float:
+    if number_str is None:
+        return float("inf")
+    try:
+        return float(str(number_str).translate(_NUMBER_TABLE))
+    except ValueError:
+        return float("inf")
+
+
+@lru_cache(maxsize=None)
+def _split_re(char_list: str) -> "re.Pattern":
+    return re.compile(f"[{char_list}]")
+
+
+def split_string(s: Optional[str], char_list: Optional[List[str]] = None) -> List[str]:
+    if s is None:
+        return []
+    chars = "".join(char_list) if char_list else _DEFAULT_SPLIT
+    return _split_re(chars).split(s)
+
+
+def normalize_str(input_str: Optional[str], remove_punct: bool = True) -> str:
+    if input_str is None:
+        return ""
+    no_spaces = _WS_RE.sub("", input_str).lower()
+    return no_spaces.translate(_PUNCT_TABLE) if remove_punct else no_spaces
+
+
+def _normalize_list_elem(elem: str) -> Tuple[bool, Any]:
+    if is_float(elem):
+        return True, float(elem)
+    return False, normalize_str(elem, remove_punct=False)
+
+
+@lru_cache(maxsize=65536)
+def prepare_ground_truth(ground_truth: str) -> Tuple[str, Any]:
+    r"""Normalize a ground truth once: returns its answer type and the
+    normalized value(s) model answers are compared against."""
+    if is_float(ground_truth):
+        return NUMBER, float(ground_truth)
+    if any(char in ground_truth for char in [",", ";"]):
+        return LIST, tuple(_normalize_list_elem(e) for e in split_string(ground_truth))
+    return STRING, normalize_str(ground_truth)
+
+
+def score_answer(model_answer: Optional[str], ground_truth: Optional[str]) -> bool:
+    r"""Score one answer; see :func:`prepare_ground_truth` for the rules."""
+    if ground_truth is None or model_answer is None:
+        return False
+    kind, gt = prepare_ground_truth(str(ground_truth))
+    model_answer = str(model_answer)
+    if kind == NUMBER:
+        return normalize_number_str(model_answer) == gt
+    if kind == LIST:
+        ma_elems = split_string(model_answer)
+        if len(ma_elems) != len(gt):
+            return False
+        for ma_elem, (gt_is_num, gt_elem) in zip(ma_elems, gt):
+            if gt_is_num:
+                if normalize_number_str(ma_elem) != gt_elem:
+                    return False
+            elif normalize_str(ma_elem, remove_punct=False) != gt_elem:
+                return False
+        return True
+    return normalize_str(model_answer) == gt
+
+
+def score_batch(
+    model_answers: Iterable[Optional[str]], ground_truths: Iterable[Optional[str]]
+) -> List[bool]:
+    r"""Score answers pairwise against ground truths."""
+    return [score_answer(ma, gt) for ma, gt in zip(model_answers, ground_truths)]
+
+
+def answer_type(ground_truth: Optional[str]) -> str:
+    if ground_truth is None:
+        return "missing"
+    return prepare_ground_truth(str(ground_truth))[0]
+
+
+def _accuracy(rows: List[bool]) -> Dict[str, Any]:
+    correct = sum(rows)
+    return {
+        "total": len(rows),
+        "correct": correct,
+        "accuracy": correct / len(rows) if rows else 0,
+    }
+
+
+def rescore_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    r"""Re-score the records of a `GAIABenchmark.run` result file in place
+    and summarize them.
+
+    Args:
+        results (List[Dict[str, Any]]): Records with `model_answer`,
+            `ground_truth` and `level`.
+
+    Returns:
+        Dict[str, Any]: Overall accuracy plus `by_level` and `by_type`
+            breakdowns, and the number of `changed` scores.
+    """
+    by_level: Dict[Any, List[bool]] = defaultdict(list)
+    by_type: Dict[str, List[bool]] = defaultdict(list)
+    scores, changed = [], 0
+    for r in results:
+        score = score_answer(r.get("model_answer"), r.get("ground_truth"))
+        if bool(r.get("score")) != score:
+            changed += 1
+        r["score"] = score
+        scores.append(score)
+        by_level[r.get("level")].append(score)
+        by_type[answer_type(r.get("ground_truth"))].append(score)
+
+    summary = _accuracy(scores)
+    summary["changed"] = changed
+    summary["by_level"] = {str(k): _accuracy(v) for k, v in sorted(by_level.items(), key=lambda kv: str(kv[0]))}
+    summary["by_type"] = {k: _accuracy(v) for k, v in sorted(by_type.items())}
+    return summary
+
+
+def rescore_file(path: str, save_to: Optional[str] = None) -> Dict[str, Any]:
+    r"""Re-score a result file written by `GAIABenchmark.run`.
+
+    Args:
+        path (str): The result JSON file.
+        save_to (str, optional): Where to write the re-scored records.
+            Nothing is written if omitted. (default: :obj:`None`)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    summary = rescore_results(results)
+    if save_to:
+        with open(save_to, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score GAIA result files")
+    parser.add_argument("files", nargs="+", help="result.json files written by GAIABenchmark.run")
+    parser.add_argument("--write", action="store_true", help="write the new scores back to each file")
+    args = parser.parse_args()
+
+    for file in args.files:
+        summary = rescore_file(file, save_to=file if args.write else None)
+        print(f"{file}: {summary['correct']}/{summary['total']} "
+              f"({summary['accuracy']:.2%}), {summary['changed']} changed")
+        for level, s in summary["by_level"].items():
+            print(f"  level {level}: {s['correct']}/{s['total']} ({s['accuracy']:.2%})")
+        for kind, s in summary["by_type"].items():
+            print(f"  {kind}: {s['correct']}/{s['total']} ({s['accuracy']:.2%})")
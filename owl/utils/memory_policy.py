@@ -0,0 +1,143 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from camel.agents import ChatAgent
+from camel.logger import get_logger
+from camel.memories import MemoryRecord
+from camel.messages import FunctionCallingMessage
+from camel.types import OpenAIBackendRole
+
+from .tool_output_store import ToolOutputStore
+
+logger = get_logger(__name__)
+
+_ELIDED = "were elided to save context"
+
+
+class MemoryPolicy:
+    r"""Bounds what a :class:`ChatAgent` sends to the model as a society
+    runs for many rounds.
+
+    The system message and the last `keep_rounds` rounds stay verbatim.
+    In older rounds every tool result longer than `summary_chars` is
+    replaced by its head and a note of how much was elided. If the memory
+    is still above `max_tokens`, the oldest rounds are dropped whole (so
+    tool calls and their results stay paired) until it fits; the latest
+    round is always kept.
+
+    A round starts at each message the agent received (backend role
+    `user`).
+
+    Args:
+        keep_rounds (int): The number of most recent rounds kept verbatim.
+            (default: :obj:`3`)
+        max_tokens (int, optional): The hard token budget of the memory.
+            (default: :obj:`None`)
+        summary_chars (int): How much of an old tool result to keep.
+            (default: :obj:`300`)
+        store (ToolOutputStore, optional): If given, elided tool results
+            are kept there and the summary carries a handle for
+            `read_tool_output`; the assistant needs that tool (see
+            :func:`cap_tool_outputs`). Results already capped by
+            :func:`cap_tool_outputs` always keep their original handle.
+            (default: :obj:`None`)
+    """
+
+    def __init__(
+        self,
+        keep_rounds: int = 3,
+        max_tokens: Optional[int] = None,
+        summary_chars: int = 300,
+        store: Optional[ToolOutputStore] = None,
+    ):
+        self.keep_rounds = keep_rounds
+        self.max_tokens = max_tokens
+        self.summary_chars = summary_chars
+        self.store = store
+
+    @staticmethod
+    def _rounds(records: List[MemoryRecord]) -> List[List[MemoryRecord]]:
+        rounds: List[List[MemoryRecord]] = []
+        for record in records:
+            if record.role_at_backend == OpenAIBackendRole.USER or not rounds:
+                rounds.append([])
+            rounds[-1].append(record)
+        return rounds
+
+    def _summarize(self, record: MemoryRecord) -> MemoryRecord:
+        msg = record.message
+        if not isinstance(msg, FunctionCallingMessage) or msg.result is None:
+            return record
+        result = str(msg.result)
+        # 已经摘要过的结果不再重复处理
+        if len(result) <= self.summary_chars or _ELIDED in result:
+            return record
+        summary = (
+            f"{result[: self.summary_chars]}\n"
+            f"[... {len(result) - self.summary_chars} more characters of this "
+            f"earlier `{msg.func_name}` result {_ELIDED} ...]"
+        )
+        # 已被 cap 截断过的结果：沿用截断说明里原始完整输出的 handle，
+        # 不把截断后的文本再存一份（那样会丢掉原 handle，且新 handle 指向的内容不完整）
+        handle = ToolOutputStore.handle_of(result)
+        if handle is None and self.store is not None:
+            handle = self.store.put(result)
+        if handle is not None:
+            summary += (
+                f"\n[Full result stored as handle `{handle}`; call "
+                f"read_tool_output(handle=\"{handle}\", offset={self.summary_chars}) to read it.]"
+            )
+        return record.model_copy(update={"message": replace(msg, result=summary)})
+
+    @staticmethod
+    def count_tokens(agent: ChatAgent, records: List[MemoryRecord]) -> int:
+        messages = [r.to_openai_message() for r in records]
+        return agent.model_backend.token_counter.count_tokens_from_messages(messages)
+
+    def apply(self, agent: ChatAgent) -> Dict[str, Any]:
+        r"""Rewrite `agent`'s memory in place.
+
+        Returns:
+            Dict[str, Any]: Prompt size in tokens and records before and
+                after the policy.
+        """
+        records = [cr.memory_record for cr in agent.memory.retrieve()]
+        system = [r for r in records if r.role_at_backend == OpenAIBackendRole.SYSTEM]
+        rounds = self._rounds([r for r in records if r.role_at_backend != OpenAIBackendRole.SYSTEM])
+        tokens_before = self.count_tokens(agent, records)
+
+        cutoff = max(0, len(rounds) - self.keep_rounds)
+        rounds = [
+            [self._summarize(r) for r in rnd] if i < cutoff else rnd
+            for i, rnd in enumerate(rounds)
+        ]
+        kept = system + [r for rnd in rounds for r in rnd]
+        tokens_after = self.count_tokens(agent, kept)
+        if self.max_tokens is not None:
+            while tokens_after > self.max_tokens and len(rounds) > 1:
+                rounds.pop(0)
+                kept = system + [r for rnd in rounds for r in rnd]
+                tokens_after = self.count_tokens(agent, kept)
+
+        if len(kept) != len(records) or tokens_after != tokens_before:
+            agent.memory.clear()
+            agent.memory.write_records(kept)
+        return {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "records_before": len(records),
+            "records_after": len(kept),
+        }
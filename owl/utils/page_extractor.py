@@ -1,37 +1,28 @@
-import hashlib
 import os
 from urllib.parse import urljoin
-from xml.dom.minidom import Document
 
-import aiofiles, mimetypes, pathlib, asyncio
+import asyncio
 from bs4 import BeautifulSoup
+from readability import Document
+
+from owl.utils.download_manager import DownloadManager
 
 
 class PageExtractor:
     IMG_ATTRS = ["src", "data-src", "data-original", "data-lazy-src"]
 
-    def __init__(self, img_dir: str, img_toolkit):
+    def __init__(self, img_dir: str, img_toolkit, downloader: DownloadManager = None,
+                 max_images: int = 50):
         self.img_dir = img_dir
         self.img_toolkit = img_toolkit
+        self.max_images = max_images
         os.makedirs(img_dir, exist_ok=True)
+        # 下载交给 DownloadManager：有并发上限、流式落盘、大小限制和 in-flight 去重
+        self.downloader = downloader or DownloadManager(out_dir=img_dir)
 
     async def _download_img(self, session, url) -> str:
-        # 1) 依据 URL 生成本地文件名（md5 + 后缀）
-        # 2) 如果已下载，直接复用
-        # 3) 否则异步 GET，确认 Content-Type 是 image，再保存到本地
-        # 4) 返回本地路径，失败返回空串
-        fname = hashlib.md5(url.encode()).hexdigest() + pathlib.Path(url).suffix
-        path = os.path.join(self.img_dir, fname)
-        if os.path.exists(path):
-            return path
-        try:
-            async with session.get(url) as r:
-                if r.status == 200 and r.headers.get("Content-Type", "").startswith("image"):
-                    async with aiofiles.open(path, "wb") as f:
-                        await f.write(await r.read())
-                    return path
-        except: ...
-        return ""
+        # 返回本地路径，失败返回空串
+        return await self.downloader.fetch(session, url)
 
     async def parse_page(self, page, session) -> str:
         # 1) 用 readability.Document 提取“主要内容” HTML 片段
@@ -50,13 +41,17 @@ class PageExtractor:
         soup = BeautifulSoup(main_html, "html.parser")
 
         # ── 1. 收集图片链接 ──
-        img_tasks = []
+        img_urls = []
         for tag in soup.find_all("img"):
             for attr in self.IMG_ATTRS:
                 if tag.get(attr):
                     img_url = urljoin(page["url"], tag[attr])
-                    img_tasks.append(asyncio.create_task(self._download_img(session, img_url)))
+                    if img_url not in img_urls:
+                        img_urls.append(img_url)
                     break
+            if len(img_urls) >= self.max_images:
+                break
+        img_tasks = [asyncio.create_task(self._download_img(session, u)) for u in img_urls]
 
         local_paths = [p for p in await asyncio.gather(*img_tasks) if p]
 
@@ -64,7 +59,8 @@ class PageExtractor:
         captions = []
         for pth in local_paths[:20]:
             prompt = "请识别图片中的文字并用一句话描述关键信息。"
-            cap = self.img_toolkit.ask_question_about_image(pth, prompt)
+            # 同步的多模态调用放到线程里，多个页面并发解析时互不阻塞事件循环
+            cap = await asyncio.to_thread(self.img_toolkit.ask_question_about_image, pth, prompt)
             if cap and cap.lower() != "none":
                 captions.append(f"![img]({pth})\n*{cap}*")
 
@@ -0,0 +1,380 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+r"""Record-and-replay model backends.
+
+`RecordingModel` wraps a real backend and appends every request/response
+pair to a JSONL recording. `ReplayModel` serves those responses locally,
+keyed by a hash of the normalized request, with optional synthetic
+latency, so societies can be re-run with no network and no API keys.
+
+Set `OWL_MODEL_MODE=record|replay` and `OWL_RECORDING=<path>` to switch
+any `construct_society` that builds its models through
+:func:`resolve_models` (and its tools through :func:`resolve_tools`).
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from camel.logger import get_logger
+from camel.messages import OpenAIMessage
+from camel.models import BaseModelBackend
+from camel.toolkits import FunctionTool
+from camel.utils import BaseTokenCounter
+from openai.types.chat import ChatCompletion
+
+logger = get_logger(__name__)
+
+MODE_ENV = "OWL_MODEL_MODE"
+RECORDING_ENV = "OWL_RECORDING"
+
+
+def _canonical_arguments(arguments: Any) -> Any:
+    if isinstance(arguments, str):
+        try:
+            return json.loads(arguments)
+        except json.JSONDecodeError:
+            return arguments.strip()
+    return arguments
+
+
+def normalize_messages(messages: Sequence[OpenAIMessage]) -> List[Dict[str, Any]]:
+    r"""Reduce messages to what determines the response: role, stripped
+    content and tool calls by name and parsed arguments. Provider-assigned
+    tool call ids are dropped."""
+    normalized = []
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, str):
+            content = content.strip()
+        item = {"role": m.get("role"), "content": content}
+        if m.get("name"):
+            item["name"] = m["name"]
+        if m.get("tool_calls"):
+            item["tool_calls"] = [
+                {
+                    "name": c["function"]["name"],
+                    "arguments": _canonical_arguments(c["function"].get("arguments")),
+                }
+                for c in m["tool_calls"]
+            ]
+        normalized.append(item)
+    return normalized
+
+
+def request_key(
+    messages: Sequence[OpenAIMessage],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    response_format: Any = None,
+) -> str:
+    r"""The recording key of a request: a sha256 over the normalized
+    messages, the names of the offered tools and the response format."""
+    payload = {
+        "messages": normalize_messages(messages),
+        "tools": sorted(t.get("function", {}).get("name", "") for t in tools or []),
+        "response_format": getattr(response_format, "__name__", None),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ModelRecording:
+    r"""An append-only JSONL file of request/response pairs.
+
+    A request seen several times keeps all its responses; replay serves
+    them in recorded order and repeats the last one afterwards.
+
+    Args:
+        path (str): The recording file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._responses[record["key"]].append(record)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._responses.values())
+
+    def append(self, key: str, record: Dict[str, Any]) -> None:
+        record = {"key": key, **record}
+        with self._lock:
+            self._responses[key].append(record)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            records = self._responses.get(key)
+            if not records:
+                return None
+            i = self._served[key]
+            self._served[key] = i + 1
+            return records[min(i, len(records) - 1)]
+
+    def rewind(self) -> None:
+        with self._lock:
+            self._served.clear()
+
+
+class ApproxTokenCounter(BaseTokenCounter):
+    r"""A tokenizer-free counter (about four characters per token), so the
+    replay backend needs no tokenizer download."""
+
+    def count_tokens_from_messages(self, messages: List[OpenAIMessage]) -> int:
+        return sum(len(str(m.get("content") or "")) for m in messages) // 4 + 3 * len(messages)
+
+    def encode(self, text: str) -> List[int]:
+        return [0] * (len(text) // 4)
+
+    def decode(self, token_ids: List[int]) -> str:
+        return ""
+
+
+class RecordingModel(BaseModelBackend):
+    r"""Delegate to a real backend and record every completed response.
+
+    Args:
+        model (BaseModelBackend): The backend that actually answers.
+        recording (ModelRecording): Where to record.
+    """
+
+    def __init__(self, model: BaseModelBackend, recording: ModelRecording):
+        super().__init__(
+            model.model_type, model.model_config_dict, token_counter=model.token_counter
+        )
+        self.model = model
+        self.recording = recording
+
+    @property
+    def token_counter(self) -> BaseTokenCounter:
+        return self.model.token_counter
+
+    def check_model_config(self):
+        pass
+
+    def _record(self, messages, response_format, tools, response, start: float):
+        if isinstance(response, ChatCompletion):
+            self.recording.append(request_key(messages, tools, response_format), {
+                "messages": normalize_messages(messages),
+                "response": response.model_dump(mode="json"),
+                "latency_s": time.perf_counter() - start,
+            })
+        else:
+            logger.warning("Streaming responses are not recorded")
+        return response
+
+    def _run(self, messages, response_format=None, tools=None):
+        start = time.perf_counter()
+        response = self.model.run(messages, response_format, tools)
+        return self._record(messages, response_format, tools, response, start)
+
+    async def _arun(self, messages, response_format=None, tools=None):
+        start = time.perf_counter()
+        response = await self.model.arun(messages, response_format, tools)
+        return self._record(messages, response_format, tools, response, start)
+
+
+class ReplayModel(BaseModelBackend):
+    r"""Serve recorded responses without any network access.
+
+    Args:
+        recording (ModelRecording): The recording to serve from.
+        latency (float): Synthetic latency added to every response, in
+            seconds. (default: :obj:`0.0`)
+        latency_scale (float, optional): If set, sleep for the recorded
+            latency times this factor instead of `latency`.
+            (default: :obj:`None`)
+        model_type (str): The model type reported to agents.
+            (default: :obj:`"replay"`)
+    """
+
+    def __init__(
+        self,
+        recording: ModelRecording,
+        latency: float = 0.0,
+        latency_scale: Optional[float] = None,
+        model_type: str = "replay",
+        model_config_dict: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(model_type, model_config_dict or {}, token_counter=ApproxTokenCounter())
+        self.recording = recording
+        self.latency = latency
+        self.latency_scale = latency_scale
+
+    @property
+    def token_counter(self) -> BaseTokenCounter:
+        return self._token_counter
+
+    def check_model_config(self):
+        pass
+
+    def _lookup(self, messages, response_format, tools):
+        key = request_key(messages, tools, response_format)
+        record = self.recording.next(key)
+        if record is None:
+            raise KeyError(
+                f"No recorded response for request {key[:12]} "
+                f"({len(messages)} messages) in {self.recording.path}"
+            )
+        if self.latency_scale is not None:
+            delay = record.get("latency_s", 0.0) * self.latency_scale
+        else:
+            delay = self.latency
+        return ChatCompletion.model_validate(record["response"]), delay
+
+    def _run(self, messages, response_format=None, tools=None):
+        response, delay = self._lookup(messages, response_format, tools)
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    async def _arun(self, messages, response_format=None, tools=None):
+        response, delay = self._lookup(messages, response_format, tools)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return response
+
+
+def tool_key(name: str, kwargs: Dict[str, Any]) -> str:
+    blob = json.dumps({"tool": name, "arguments": kwargs}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _wrap_tool(tool: FunctionTool, recording: ModelRecording, replay: bool) -> FunctionTool:
+    func = tool.func
+    name = tool.get_function_name()
+
+    def _bind(args, kwargs) -> Dict[str, Any]:
+        return dict(inspect.signature(func).bind(*args, **kwargs).arguments)
+
+    def _replayed(key: str):
+        record = recording.next(key)
+        if record is None:
+            raise KeyError(f"No recorded result for tool {name} ({key[:12]}) in {recording.path}")
+        return record["result"]
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = tool_key(name, _bind(args, kwargs))
+            if replay:
+                return _replayed(key)
+            result = await func(*args, **kwargs)
+            recording.append(key, {"tool": name, "result": result})
+            return result
+
+    else:
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = tool_key(name, _bind(args, kwargs))
+            if replay:
+                return _replayed(key)
+            result = func(*args, **kwargs)
+            recording.append(key, {"tool": name, "result": result})
+            return result
+
+    return FunctionTool(wrapper, openai_tool_schema=tool.get_openai_tool_schema())
+
+
+_recordings: Dict[str, ModelRecording] = {}
+
+
+def get_recording(path: str) -> ModelRecording:
+    r"""Return the process-wide :class:`ModelRecording` for `path`, so all
+    societies of a run share one file and one replay position."""
+    path = os.path.abspath(path)
+    if path not in _recordings:
+        _recordings[path] = ModelRecording(path)
+    return _recordings[path]
+
+
+def resolve_models(
+    create_models: Callable[[], Dict[str, BaseModelBackend]],
+    roles: Sequence[str] = ("user", "assistant"),
+    mode: Optional[str] = None,
+    path: Optional[str] = None,
+) -> Dict[str, BaseModelBackend]:
+    r"""Build the models of a society, honouring record/replay mode.
+
+    Args:
+        create_models (Callable): Creates the real models, keyed by role.
+            Not called in replay mode.
+        roles (Sequence[str]): The roles to create replay models for.
+            (default: :obj:`("user", "assistant")`)
+        mode (str, optional): `"record"`, `"replay"` or `"live"`.
+            (default: the `OWL_MODEL_MODE` environment variable, else
+            `"live"`)
+        path (str, optional): The recording file. (default: the
+            `OWL_RECORDING` environment variable, else
+            `"recordings/models.jsonl"`)
+
+    Returns:
+        Dict[str, BaseModelBackend]: The models keyed by role.
+    """
+    mode = (mode or os.getenv(MODE_ENV) or "live").lower()
+    if mode == "live":
+        return create_models()
+    path = path or os.getenv(RECORDING_ENV) or "recordings/models.jsonl"
+    recording = get_recording(path)
+    if mode == "replay":
+        latency = float(os.getenv("OWL_REPLAY_LATENCY", "0"))
+        scale = os.getenv("OWL_REPLAY_LATENCY_SCALE")
+        logger.info(f"Replaying {len(recording)} recorded responses from {path}")
+        return {
+            role: ReplayModel(recording, latency, float(scale) if scale else None)
+            for role in roles
+        }
+    if mode == "record":
+        return {role: RecordingModel(m, recording) for role, m in create_models().items()}
+    raise ValueError(f"Unknown model mode: {mode}")
+
+
+def resolve_tools(
+    tools: Sequence[Any],
+    mode: Optional[str] = None,
+    path: Optional[str] = None,
+) -> List[Any]:
+    r"""Record or replay tool results, the counterpart of
+    :func:`resolve_models`: replayed transcripts only match the model
+    recording if the tools return what they returned when recording.
+
+    Tool results are kept in `<recording>.tools.jsonl`. Callables that are
+    not yet :class:`FunctionTool` are wrapped first.
+    """
+    mode = (mode or os.getenv(MODE_ENV) or "live").lower()
+    if mode == "live":
+        return list(tools)
+    path = path or os.getenv(RECORDING_ENV) or "recordings/models.jsonl"
+    recording = get_recording(os.path.splitext(path)[0] + ".tools.jsonl")
+    return [
+        _wrap_tool(t if isinstance(t, FunctionTool) else FunctionTool(t), recording, mode == "replay")
+        for t in tools
+    ]
@@ -0,0 +1,331 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+r"""Columnar store for accumulated benchmark results.
+
+Result files from `GAIABenchmark.run` (`result.json`) and from the FRAMES
+scripts (`evaluation_results_*.json`) are ingested once into one Parquet
+file per run, with a `tasks` table (one row per task) and a `tools` table
+(one row per tool call). Queries read only the columns and runs they
+need, so comparing many runs does not reload or rescan the raw JSON.
+
+Usage::
+
+    python -m owl.utils.results_store ingest results/result.json --model gpt-4o
+    python -m owl.utils.results_store accuracy --by run_id level
+    python -m owl.utils.results_store cost
+    python -m owl.utils.results_store tools
+    python -m owl.utils.results_store compare run_a run_b
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .gaia_scorer import score_answer
+
+TASK_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("benchmark", pa.string()),
+    ("model", pa.string()),
+    ("task_id", pa.string()),
+    ("level", pa.int64()),
+    ("reasoning_type", pa.string()),
+    ("correct", pa.bool_()),
+    ("prompt_tokens", pa.int64()),
+    ("completion_tokens", pa.int64()),
+    ("rounds", pa.int64()),
+    ("tool_calls", pa.int64()),
+    ("ingested_at", pa.float64()),
+])
+
+TOOL_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("task_id", pa.string()),
+    ("tool_name", pa.string()),
+    ("latency_s", pa.float64()),
+    ("result_chars", pa.int64()),
+])
+
+
+def _detect_benchmark(records: List[Dict[str, Any]]) -> str:
+    if records and "evaluation_decision" in records[0]:
+        return "frames"
+    return "gaia"
+
+
+def _task_rows(records: List[Dict[str, Any]], run_id: str, benchmark: str, model: str):
+    now = time.time()
+    tasks, tools = [], []
+    for r in records:
+        if benchmark == "frames":
+            task_id = str(r.get("index"))
+            correct = str(r.get("evaluation_decision", "")).upper() == "TRUE"
+            level = None
+            reasoning_type = r.get("reasoning_type")
+        else:
+            task_id = str(r.get("task_id"))
+            # 以当前评分规则为准，而不是文件里可能过时的 score
+            correct = score_answer(r.get("model_answer"), r.get("ground_truth"))
+            level = r.get("level")
+            reasoning_type = None
+        token_info = r.get("token_info") or {}
+        history = r.get("history") or r.get("chat_history") or []
+        n_tool_calls = 0
+        for round_ in history:
+            for call in round_.get("tool_calls") or []:
+                n_tool_calls += 1
+                result = call.get("result")
+                tools.append({
+                    "run_id": run_id,
+                    "task_id": task_id,
+                    "tool_name": call.get("tool_name") or call.get("func_name"),
+                    "latency_s": call.get("latency_s"),
+                    "result_chars": len(str(result)) if result is not None else None,
+                })
+        tasks.append({
+            "run_id": run_id,
+            "benchmark": benchmark,
+            "model": model,
+            "task_id": task_id,
+            "level": int(level) if level is not None else None,
+            "reasoning_type": reasoning_type,
+            "correct": correct,
+            "prompt_tokens": token_info.get("prompt_token_count"),
+            "completion_tokens": token_info.get("completion_token_count"),
+            "rounds": len(history) if history else None,
+            "tool_calls": n_tool_calls,
+            "ingested_at": now,
+        })
+    return tasks, tools
+
+
+class ResultsStore:
+    r"""A directory of per-run Parquet files.
+
+    Args:
+        root (str): The store directory. (default: :obj:`"results_store"`)
+    """
+
+    def __init__(self, root: str = "results_store"):
+        self.root = Path(root)
+        (self.root / "tasks").mkdir(parents=True, exist_ok=True)
+        (self.root / "tools").mkdir(parents=True, exist_ok=True)
+
+    # ── ingest ──
+    def ingest(
+        self,
+        path: str,
+        run_id: Optional[str] = None,
+        model: Optional[str] = None,
+        benchmark: Optional[str] = None,
+    ) -> str:
+        r"""Ingest one result file as a run, replacing a run with the same id.
+
+        Returns:
+            str: The run id.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        stem = Path(path).stem
+        run_id = run_id or stem
+        benchmark = benchmark or _detect_benchmark(records)
+        if model is None and stem.startswith("evaluation_results_"):
+            model = stem[len("evaluation_results_"):]
+        tasks, tools = _task_rows(records, run_id, benchmark, model or "unknown")
+        pq.write_table(pa.Table.from_pylist(tasks, schema=TASK_SCHEMA),
+                       self.root / "tasks" / f"{run_id}.parquet")
+        pq.write_table(pa.Table.from_pylist(tools, schema=TOOL_SCHEMA),
+                       self.root / "tools" / f"{run_id}.parquet")
+        return run_id
+
+    # ── read ──
+    def _read(self, kind: str, columns: Sequence[str], runs: Optional[Sequence[str]] = None) -> pa.Table:
+        schema = TASK_SCHEMA if kind == "tasks" else TOOL_SCHEMA
+        if not any((self.root / kind).glob("*.parquet")):
+            return schema.empty_table().select(list(columns))
+        dataset = ds.dataset(str(self.root / kind), format="parquet", schema=schema)
+        flt = pc.field("run_id").isin(list(runs)) if runs else None
+        return dataset.to_table(columns=list(columns), filter=flt)
+
+    def runs(self) -> List[str]:
+        return sorted(p.stem for p in (self.root / "tasks").glob("*.parquet"))
+
+    # ── queries ──
+    def accuracy(self, by: Sequence[str] = ("run_id",), runs: Optional[Sequence[str]] = None) -> List[Dict]:
+        r"""Accuracy grouped by any of `run_id`, `model`, `benchmark`,
+        `level` and `reasoning_type`. Multi-label FRAMES reasoning types
+        (`"A | B"`) count towards each label."""
+        table = self._read("tasks", list(dict.fromkeys([*by, "correct"])), runs)
+        if "reasoning_type" in by:
+            labels = pc.split_pattern(table["reasoning_type"], " | ")
+            parents = pc.list_parent_indices(labels)
+            table = table.take(parents).set_column(
+                table.schema.get_field_index("reasoning_type"),
+                "reasoning_type",
+                pc.utf8_trim_whitespace(pc.list_flatten(labels)),
+            )
+        table = table.append_column("hit", pc.cast(table["correct"], pa.int64()))
+        grouped = table.group_by(list(by)).aggregate([("hit", "sum"), ("hit", "count")])
+        rows = grouped.to_pylist()
+        for row in rows:
+            row["correct"] = row.pop("hit_sum")
+            row["total"] = row.pop("hit_count")
+            row["accuracy"] = row["correct"] / row["total"] if row["total"] else 0.0
+        return sorted(rows, key=lambda r: tuple(str(r[k]) for k in by))
+
+    def cost(self, runs: Optional[Sequence[str]] = None) -> List[Dict]:
+        r"""Token usage per run and per correct answer. Token figures are
+        :obj:`None` for runs that recorded no token counts, rather than 0."""
+        table = self._read("tasks", ["run_id", "correct", "prompt_tokens", "completion_tokens"], runs)
+        table = table.append_column("hit", pc.cast(table["correct"], pa.int64()))
+        grouped = table.group_by("run_id").aggregate([
+            ("hit", "sum"), ("hit", "count"),
+            ("prompt_tokens", "sum"), ("completion_tokens", "sum"),
+        ]).to_pylist()
+        rows = []
+        for g in grouped:
+            prompt, completion = g["prompt_tokens_sum"], g["completion_tokens_sum"]
+            tokens = None if prompt is None and completion is None else (prompt or 0) + (completion or 0)
+            rows.append({
+                "run_id": g["run_id"],
+                "correct": g["hit_sum"],
+                "total": g["hit_count"],
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "total_tokens": tokens,
+                "tokens_per_correct": tokens / g["hit_sum"] if tokens is not None and g["hit_sum"] else None,
+            })
+        return sorted(rows, key=lambda r: r["run_id"])
+
+    def tools(self, runs: Optional[Sequence[str]] = None) -> List[Dict]:
+        r"""Call count, latency and result size per tool and run. Latency
+        comes from the `latency_s` that tools wrapped by
+        :func:`cap_tool_outputs` attach to their call records; it is
+        :obj:`None` for runs recorded without it."""
+        table = self._read("tools", ["run_id", "tool_name", "latency_s", "result_chars"], runs)
+        grouped = table.group_by(["run_id", "tool_name"]).aggregate([
+            ("tool_name", "count"), ("latency_s", "mean"), ("latency_s", "max"),
+            ("result_chars", "mean"), ("result_chars", "max"),
+        ]).to_pylist()
+        rows = [{
+            "run_id": g["run_id"],
+            "tool_name": g["tool_name"],
+            "calls": g["tool_name_count"],
+            "mean_latency_s": g["latency_s_mean"],
+            "max_latency_s": g["latency_s_max"],
+            "mean_result_chars": g["result_chars_mean"],
+            "max_result_chars": g["result_chars_max"],
+        } for g in grouped]
+        return sorted(rows, key=lambda r: (r["run_id"], -r["calls"]))
+
+    def compare(self, base_run: str, new_run: str) -> Dict[str, Any]:
+        r"""Tasks that regressed (right in `base_run`, wrong in `new_run`)
+        and that were fixed, over the tasks both runs attempted."""
+        base = self._read("tasks", ["task_id", "correct"], [base_run])
+        new = self._read("tasks", ["task_id", "correct"], [new_run])
+        joined = base.join(new, keys="task_id", join_type="inner",
+                           left_suffix="_base", right_suffix="_new")
+        b, n = joined["correct_base"], joined["correct_new"]
+        regressed = joined.filter(pc.and_(b, pc.invert(n)))["task_id"].to_pylist()
+        fixed = joined.filter(pc.and_(pc.invert(b), n))["task_id"].to_pylist()
+        return {
+            "common": joined.num_rows,
+            "base_accuracy": pc.mean(pc.cast(b, pa.float64())).as_py() if joined.num_rows else 0.0,
+            "new_accuracy": pc.mean(pc.cast(n, pa.float64())).as_py() if joined.num_rows else 0.0,
+            "regressed": sorted(regressed),
+            "fixed": sorted(fixed),
+        }
+
+
+def _print_rows(rows: List[Dict]) -> None:
+    if not rows:
+        print("(no rows)")
+        return
+    cols = list(rows[0].keys())
+
+    def fmt(v):
+        return f"{v:.4f}" if isinstance(v, float) else str(v)
+
+    widths = [max(len(c), *(len(fmt(r[c])) for r in rows)) for c in cols]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for r in rows:
+        print("  ".join(fmt(r[c]).ljust(w) for c, w in zip(cols, widths)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query accumulated benchmark results")
+    parser.add_argument("--store", default=os.getenv("OWL_RESULTS_STORE", "results_store"))
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("ingest", help="ingest result files, one run per file")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--run-id", default=None, help="run id (default: file name); only with one file")
+    p.add_argument("--model", default=None)
+    p.add_argument("--benchmark", choices=["gaia", "frames"], default=None)
+
+    p = sub.add_parser("accuracy", help="accuracy grouped by columns")
+    p.add_argument("--by", nargs="+", default=["run_id"],
+                   choices=["run_id", "model", "benchmark", "level", "reasoning_type"])
+    p.add_argument("--runs", nargs="+", default=None)
+
+    p = sub.add_parser("cost", help="token cost per correct answer")
+    p.add_argument("--runs", nargs="+", default=None)
+
+    p = sub.add_parser("tools", help="per-tool call count, latency and result size")
+    p.add_argument("--runs", nargs="+", default=None)
+
+    p = sub.add_parser("compare", help="regressions between two runs")
+    p.add_argument("base_run")
+    p.add_argument("new_run")
+
+    sub.add_parser("runs", help="list ingested runs")
+
+    args = parser.parse_args(argv)
+    store = ResultsStore(args.store)
+
+    if args.cmd == "ingest":
+        if args.run_id and len(args.files) > 1:
+            parser.error("--run-id can only be used with a single file")
+        out = [{"run_id": store.ingest(f, args.run_id, args.model, args.benchmark), "file": f}
+               for f in args.files]
+    elif args.cmd == "accuracy":
+        out = store.accuracy(args.by, args.runs)
+    elif args.cmd == "cost":
+        out = store.cost(args.runs)
+    elif args.cmd == "tools":
+        out = store.tools(args.runs)
+    elif args.cmd == "compare":
+        out = store.compare(args.base_run, args.new_run)
+    else:
+        out = [{"run_id": r} for r in store.runs()]
+
+    if args.json:
+        print(json.dumps(out, indent=2, ensure_ascii=False))
+    elif isinstance(out, dict):
+        for k, v in out.items():
+            print(f"{k}: {v}")
+    else:
+        _print_rows(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+import functools
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Union
+
+from camel.logger import get_logger
+from camel.toolkits import BaseToolkit, FunctionTool
+
+logger = get_logger(__name__)
+
+_TRUNCATED = "[Output truncated:"
+_NOTE_HANDLE = re.compile(r"handle `([0-9a-f]{16})`")
+
+# Durations of wrapped tool calls, keyed by tool name and arguments, waiting
+# to be attached to the tool call records of the society history.
+_MAX_PENDING_LATENCIES = 10000
+_latencies: "OrderedDict[str, Deque[float]]" = OrderedDict()
+_latencies_lock = threading.Lock()
+
+
+def _call_key(name: str, arguments: Dict[str, Any]) -> str:
+    return json.dumps({"tool": name, "arguments": arguments}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _record_latency(name: str, arguments: Dict[str, Any], seconds: float) -> None:
+    key = _call_key(name, arguments)
+    with _latencies_lock:
+        _latencies.setdefault(key, deque()).append(seconds)
+        _latencies.move_to_end(key)
+        while len(_latencies) > _MAX_PENDING_LATENCIES:
+            _latencies.popitem(last=False)
+
+
+def with_latency(record: Dict[str, Any]) -> Dict[str, Any]:
+    r"""Add `latency_s` to a tool call record (:meth:`ToolCallingRecord.as_dict`)
+    if the call went through a tool wrapped by :func:`cap_tool_outputs`.
+
+    Args:
+        record (Dict[str, Any]): The tool call record.
+
+    Returns:
+        Dict[str, Any]: The same record.
+    """
+    name = record.get("tool_name") or record.get("func_name")
+    key = _call_key(name, record.get("args") or {})
+    with _latencies_lock:
+        pending = _latencies.get(key)
+        if pending:
+            record["latency_s"] = round(pending.popleft(), 4)
+            if not pending:
+                del _latencies[key]
+    return record
+
+
+class ToolOutputStore:
+    r"""A content-addressed blob store for full tool outputs.
+
+    Args:
+        root (str): The directory to store outputs in.
+            (default: :obj:`"tmp/tool_outputs"`)
+        max_chars (int): Tool results longer than this are capped and
+            spilled to the store. (default: :obj:`8000`)
+    """
+
+    def __init__(self, root: str = "tmp/tool_outputs", max_chars: int = 8000):
+        self.root = root
+        self.max_chars = max_chars
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, handle: str) -> str:
+        return os.path.join(self.root, f"{handle}.txt")
+
+    def put(self, text: str) -> str:
+        r"""Store `text` and return its handle; identical outputs share one
+        blob."""
+        handle = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        path = self._path(handle)
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        r"""Return the full output stored as `handle`, or :obj:`None`."""
+        if not all(c in "0123456789abcdef" for c in handle):
+            return None
+        try:
+            with open(self._path(handle), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def read(self, handle: str, offset: int = 0, length: Optional[int] = None) -> Optional[str]:
+        if offset < 0:
+            raise ValueError(f"offset must be non-negative, got {offset}")
+        text = self.get(handle)
+        if text is None:
+            return None
+        end = len(text) if length is None else offset + length
+        return text[offset:end]
+
+    def size(self, handle: str) -> int:
+        text = self.get(handle)
+        return len(text) if text is not None else 0
+
+    @staticmethod
+    def handle_of(text: str) -> Optional[str]:
+        r"""Return the handle named in the truncation note that :meth:`cap`
+        appended to `text`, or :obj:`None` if `text` was not capped."""
+        start = text.rfind(_TRUNCATED)
+        if start == -1:
+            return None
+        match = _NOTE_HANDLE.search(text, start)
+        return match.group(1) if match else None
+
+    def cap(self, name: str, result: Any) -> Any:
+        r"""Return `result` unchanged if it is small, else its first
+        `max_chars` characters plus a handle to the rest."""
+        text = result if isinstance(result, str) else str(result)
+        if len(text) <= self.max_chars:
+            return result
+        handle = self.put(text)
+        logger.info(f"Capped {name} output of {len(text)} characters as {handle}")
+        return (
+            f"{text[: self.max_chars]}\n\n"
+            f"{_TRUNCATED} showing characters 0-{self.max_chars} of {len(text)}. "
+            f"The full output is stored as handle `{handle}`; call "
+            f"read_tool_output(handle=\"{handle}\", offset={self.max_chars}) to read more.]"
+        )
+
+
+class ToolOutputToolkit(BaseToolkit):
+    r"""Lets the agent page through tool outputs that were capped by
+    :func:`cap_tool_outputs`.
+
+    Args:
+        store (ToolOutputStore): The store the outputs were spilled to.
+    """
+
+    def __init__(self, store: ToolOutputStore):
+        self.store = store
+
+    def read_tool_output(self, handle: str, offset: int = 0, length: int = 8000) -> str:
+        r"""Read part of a tool output that was truncated because it was too
+        long.
+
+        Args:
+            handle (str): The handle given in the truncation note.
+            offset (int): The character offset to start reading from.
+                (default: :obj:`0`)
+            length (int): The number of characters to read, at most the
+                store's cap. (default: :obj:`8000`)
+
+        Returns:
+            str: The requested part of the output.
+        """
+        if offset < 0:
+            return f"Invalid offset {offset}: it must be 0 or greater."
+        length = max(1, min(length, self.store.max_chars))
+        text = self.store.get(handle)
+        if text is None:
+            return f"No stored tool output with handle `{handle}`."
+        total = len(text)
+        part = text[offset:offset + length]
+        end = offset + len(part)
+        note = f"[characters {offset}-{end} of {total}"
+        note += f"; call again with offset={end} to continue]" if end < total else "; end of output]"
+        return f"{part}\n\n{note}"
+
+    def get_tools(self) -> List[FunctionTool]:
+        return [FunctionTool(self.read_tool_output)]
+
+
+def _capped(tool: FunctionTool, store: ToolOutputStore) -> FunctionTool:
+    func = tool.func
+    name = tool.get_function_name()
+
+    def _arguments(args, kwargs) -> Dict[str, Any]:
+        try:
+            return dict(inspect.signature(func).bind(*args, **kwargs).arguments)
+        except TypeError:
+            return kwargs
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            finally:
+                _record_latency(name, _arguments(args, kwargs), time.perf_counter() - start)
+            return store.cap(name, result)
+
+    else:
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _record_latency(name, _arguments(args, kwargs), time.perf_counter() - start)
+            return store.cap(name, result)
+
+    return FunctionTool(wrapper, openai_tool_schema=tool.get_openai_tool_schema())
+
+
+def cap_tool_outputs(
+    tools: Sequence[Union[FunctionTool, Callable]],
+    store: Optional[ToolOutputStore] = None,
+) -> List[FunctionTool]:
+    r"""Cap the results of `tools` and add the `read_tool_output` tool.
+
+    Results longer than `store.max_chars` reach the agent as their head
+    plus a handle; the full payload stays in `store` and can be paged
+    through with `read_tool_output(handle, offset, length)`. The duration
+    of every call is recorded and attached to the society history's tool
+    call records as `latency_s` (see :func:`with_latency`).
+
+    Args:
+        tools (Sequence): The assistant's tools.
+        store (ToolOutputStore, optional): Where to spill long outputs.
+            (default: a :class:`ToolOutputStore` with default settings)
+
+    Returns:
+        List[FunctionTool]: The wrapped tools followed by the reader tool.
+    """
+    store = store or ToolOutputStore()
+    wrapped = [_capped(t if isinstance(t, FunctionTool) else FunctionTool(t), store) for t in tools]
+    return wrapped + ToolOutputToolkit(store).get_tools()
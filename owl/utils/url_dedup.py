@@ -0,0 +1,160 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+import hashlib
+import math
+import posixpath
+from typing import Iterable, List, Protocol
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# 常见的追踪参数，规范化 URL 时去掉；ref / from 等常被站点当作真实参数
+# （分支名、分页起点）使用，不在此列
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "dclid", "yclid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "igshid", "spm", "ref_src",
+}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    r"""把 URL 规范化为去重用的标准形式。
+
+    结果只用作去重键，不用于请求：请求始终使用原始 URL。
+
+    - scheme / host 小写，去掉默认端口
+    - 去掉 fragment 与追踪参数，其余参数按 key 排序
+    - 解析 ``.`` / ``..`` 路径段，去掉非根路径的末尾斜杠
+
+    Args:
+        url (str): 原始 URL。
+
+    Returns:
+        str: 规范化后的 URL。
+    """
+    parts = urlparse(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        # IPv6 字面量：hostname 去掉了方括号，重建 netloc 时要加回
+        host = f"[{host}]"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        auth = parts.username + (f":{parts.password}" if parts.password else "")
+        host = f"{auth}@{host}"
+
+    path = parts.path or "/"
+    if path != "/":
+        trailing = path.endswith("/")
+        path = posixpath.normpath(path)
+        # normpath 会保留开头的 "//"，统一成单斜杠
+        path = "/" + path.lstrip("/")
+        if trailing and path != "/":
+            path = path.rstrip("/")
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunparse((scheme, host, path, parts.params, urlencode(query), ""))
+
+
+class SeenSet(Protocol):
+    r"""爬虫去重集合的接口，``AsyncCrawler`` 只依赖 ``add`` 和 ``in``。"""
+
+    def add(self, item: str) -> None: ...
+
+    def __contains__(self, item: str) -> bool: ...
+
+
+class ExactSeenSet(set):
+    r"""精确去重：普通 ``set``，适合单次几十到几万页的爬取。"""
+
+
+class BloomFilter:
+    r"""固定容量的 Bloom filter（bytearray 位图 + 双重哈希）。
+
+    Args:
+        capacity (int): 预期元素个数。
+        error_rate (float): 达到容量时的目标误判率。
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class ScalableBloomFilter:
+    r"""可扩容的 Bloom filter：写满一层就追加一层更大、误判率更低的 filter，
+    总误判率收敛到 ``error_rate / (1 - tightening)``，内存随实际 URL 数增长。
+
+    Args:
+        initial_capacity (int): 第一层容量。(default: :obj:`10000`)
+        error_rate (float): 第一层误判率。(default: :obj:`1e-4`)
+        growth (int): 每层容量的放大倍数。(default: :obj:`2`)
+        tightening (float): 每层误判率的收紧系数。(default: :obj:`0.5`)
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 10000,
+        error_rate: float = 1e-4,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        self.growth = growth
+        self.tightening = tightening
+        self.filters: List[BloomFilter] = [BloomFilter(initial_capacity, error_rate)]
+
+    def add(self, item: str) -> None:
+        if item in self:
+            return
+        cur = self.filters[-1]
+        if cur.count >= cur.capacity:
+            cur = BloomFilter(cur.capacity * self.growth, cur.error_rate * self.tightening)
+            self.filters.append(cur)
+        cur.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in reversed(self.filters))
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(f.bits) for f in self.filters)
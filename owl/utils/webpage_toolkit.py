@@ -1,27 +1,107 @@
+import asyncio
 import os
+from typing import Optional
 
 import aiohttp
+from camel.logger import get_logger
 from camel.toolkits import BaseToolkit, ImageAnalysisToolkit, FunctionTool
 from camel.utils import retry_on_error
 
 from owl.utils.async_crawler import AsyncCrawler
 from owl.utils.page_extractor import PageExtractor
 
+logger = get_logger(__name__)
+
 
 class WebPageToolkit(BaseToolkit):
-    def __init__(self, model=None, cache_dir="tmp/"):
+    def __init__(self, model=None, cache_dir="tmp/",
+                 max_connections: int = 64,
+                 max_connections_per_host: int = 8,
+                 dns_cache_ttl: int = 300,
+                 keepalive_timeout: float = 30):
         self.crawler = AsyncCrawler(cache_dir=cache_dir)
         self.image_tool = ImageAnalysisToolkit(model=model)
         self.extractor = PageExtractor(img_dir=os.path.join(cache_dir, "imgs"),
                                        img_toolkit=self.image_tool)
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # 爬取与图片下载共用一个长连接池；session 绑定事件循环，循环变了就重建
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            await self._discard_session()
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  headers=AsyncCrawler.HEADERS)
+            self._session_loop = loop
+        return self._session
+
+    async def _discard_session(self):
+        # session 只能在创建它的事件循环里关闭
+        session, loop = self._session, self._session_loop
+        self._session = None
+        self._session_loop = None
+        if session is None or session.closed:
+            return
+        if loop is asyncio.get_running_loop():
+            await session.close()
+        elif loop is not None and loop.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+        else:
+            # 旧循环已结束，连接池里的连接无法再由它关闭；调用方应在循环结束前 close()
+            logger.warning("HTTP session outlived its event loop; call close() before the loop ends")
+            connector = session.connector
+            session.detach()
+            if connector is not None:
+                await connector.close()
+
+    async def close(self):
+        r"""Close the shared HTTP session and its connection pool. Call it
+        on the event loop that used the toolkit, before that loop ends."""
+        await self._discard_session()
 
     @retry_on_error()
     async def crawl_and_extract(self, url: str,
                                 max_depth: int = 1,
-                                limit: int = 20) -> str:
-        pages = await self.crawler.crawl(url)
-        async with aiohttp.ClientSession() as sess:
-            md_chunks = [await self.extractor.parse_page(p, sess) for p in pages]
+                                limit: int = 20,
+                                query: Optional[str] = None,
+                                time_budget: Optional[float] = None) -> str:
+        r"""Crawl a web page (and the pages it links to) and extract the main
+        text plus captions of the images it contains.
+
+        Args:
+            url (str): The URL to start crawling from.
+            max_depth (int): How many link hops to follow from `url`.
+                (default: :obj:`1`)
+            limit (int): The maximum number of pages to extract.
+                (default: :obj:`20`)
+            query (str, optional): What you are looking for. When given,
+                links whose anchor text or URL best match the query are
+                followed first, so the relevant pages are reached with
+                fewer fetches. (default: :obj:`None`)
+            time_budget (float, optional): Stop crawling after this many
+                seconds. (default: :obj:`None`)
+
+        Returns:
+            str: The extracted pages in Markdown, separated by `---`.
+        """
+        sess = await self._get_session()
+        pages = await self.crawler.crawl(url, session=sess,
+                                         max_depth=max_depth, limit=limit,
+                                         query=query, time_budget=time_budget)
+        md_chunks = await asyncio.gather(
+            *(self.extractor.parse_page(p, sess) for p in pages)
+        )
         return "\n\n---\n\n".join(md_chunks)
 
     def get_tools(self):
@@ -0,0 +1,251 @@
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
+import ast
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Union
+from urllib.parse import unquote, urlparse
+
+import aiohttp
+from camel.logger import get_logger
+from camel.toolkits import BaseToolkit, FunctionTool
+
+logger = get_logger(__name__)
+
+
+def parse_wiki_links(wiki_links: Union[str, List[str], None]) -> List[str]:
+    r"""Parse the `wiki_links` field of a FRAMES item, which is stored as
+    the string repr of a Python list in the dataset."""
+    if not wiki_links:
+        return []
+    if isinstance(wiki_links, str):
+        try:
+            wiki_links = ast.literal_eval(wiki_links)
+        except (ValueError, SyntaxError):
+            wiki_links = [wiki_links]
+    return [link.strip() for link in wiki_links if link and link.strip()]
+
+
+def collect_wiki_links(items: Iterable[Dict]) -> List[str]:
+    r"""Return the deduplicated union of `wiki_links` over FRAMES items,
+    in first-seen order."""
+    seen, links = set(), []
+    for item in items:
+        for link in parse_wiki_links(item.get("wiki_links")):
+            key = article_key(link)
+            if key not in seen:
+                seen.add(key)
+                links.append(link)
+    return links
+
+
+def article_key(url_or_title: str, default_lang: str = "en") -> str:
+    r"""Map a Wikipedia URL or a bare title to a stable key `lang:Title`.
+
+    `https://en.m.wikipedia.org/wiki/Ada_Lovelace#Life` and `Ada Lovelace`
+    both map to `en:Ada Lovelace`.
+    """
+    text = url_or_title.strip()
+    parts = urlparse(text)
+    if parts.scheme in ("http", "https") and "/wiki/" in parts.path:
+        lang = parts.netloc.split(".")[0] or default_lang
+        title = unquote(parts.path.split("/wiki/", 1)[1])
+    else:
+        lang, title = default_lang, text
+    title = title.replace("_", " ").strip()
+    if title:
+        title = title[0].upper() + title[1:]
+    return f"{lang}:{title}"
+
+
+class WikiArticleStore:
+    r"""A local, zlib-compressed Wikipedia article store backed by SQLite.
+
+    Args:
+        path (str): The SQLite file to store articles in.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "key TEXT PRIMARY KEY, url TEXT, title TEXT, content BLOB, fetched_at REAL)"
+        )
+        self._conn.commit()
+
+    def __contains__(self, url_or_title: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM articles WHERE key = ?", (article_key(url_or_title),)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def get(self, url_or_title: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, title, content FROM articles WHERE key = ?",
+                (article_key(url_or_title),),
+            ).fetchone()
+        if row is None:
+            return None
+        url, title, content = row
+        return {"url": url, "title": title, "content": zlib.decompress(content).decode("utf-8")}
+
+    def put(self, url: str, title: str, content: str) -> None:
+        blob = zlib.compress(content.encode("utf-8"), 9)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?)",
+                (article_key(url), url, title, blob, time.time()),
+            )
+            self._conn.commit()
+
+    def missing(self, urls: Iterable[str]) -> List[str]:
+        r"""Return the URLs (deduplicated by article key) not yet stored."""
+        pending: Dict[str, str] = {}
+        for url in urls:
+            key = article_key(url)
+            if key not in pending and url not in self:
+                pending[key] = url
+        return list(pending.values())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+async def _fetch_article(
+    session: aiohttp.ClientSession, url: str
+) -> Optional[Dict[str, str]]:
+    lang, title = article_key(url).split(":", 1)
+    params = {
+        "action": "query",
+        "prop": "extracts",
+        "explaintext": 1,
+        "redirects": 1,
+        "format": "json",
+        "titles": title,
+    }
+    api = f"https://{lang}.wikipedia.org/w/api.php"
+    async with session.get(api, params=params) as r:
+        if r.status != 200:
+            logger.warning(f"Failed to fetch {url}: HTTP {r.status}")
+            return None
+        data = await r.json()
+    for page in data.get("query", {}).get("pages", {}).values():
+        if "extract" in page:
+            return {"title": page.get("title", title), "content": page["extract"]}
+    logger.warning(f"No article found for {url}")
+    return None
+
+
+async def prefetch_articles(
+    store: WikiArticleStore, urls: Iterable[str], concurrency: int = 8
+) -> Dict[str, int]:
+    r"""Download every article in `urls` that is not yet in `store`.
+
+    Args:
+        store (WikiArticleStore): The local article store.
+        urls (Iterable[str]): Wikipedia URLs, duplicates are fetched once.
+        concurrency (int): The number of concurrent requests.
+            (default: :obj:`8`)
+
+    Returns:
+        Dict[str, int]: Counts of `cached`, `fetched` and `failed` articles.
+    """
+    urls = list(urls)
+    pending = store.missing(urls)
+    stats = {"cached": len({article_key(u) for u in urls}) - len(pending), "fetched": 0, "failed": 0}
+    sem = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(
+        timeout=timeout, headers={"User-Agent": "owl-frames-prefetch/0.1"}
+    ) as session:
+
+        async def _one(url: str):
+            async with sem:
+                try:
+                    article = await _fetch_article(session, url)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Failed to fetch {url}: {e}")
+                    article = None
+            if article is None:
+                stats["failed"] += 1
+                return
+            store.put(url, article["title"], article["content"])
+            stats["fetched"] += 1
+
+        await asyncio.gather(*(_one(u) for u in pending))
+
+    logger.info(f"Wikipedia prefetch finished: {stats}")
+    return stats
+
+
+class WikiLookupToolkit(BaseToolkit):
+    r"""A toolkit that serves Wikipedia articles from a local
+    :class:`WikiArticleStore` instead of the network.
+
+    Args:
+        store (WikiArticleStore): The local article store.
+        max_chars (int): The maximum number of characters returned per call.
+            (default: :obj:`8000`)
+    """
+
+    def __init__(self, store: WikiArticleStore, max_chars: int = 8000):
+        self.store = store
+        self.max_chars = max_chars
+
+    def lookup_wikipedia_article(self, url_or_title: str, offset: int = 0) -> str:
+        r"""Read a Wikipedia article from the local snapshot. Use this before
+        searching or browsing the web for any Wikipedia article.
+
+        Args:
+            url_or_title (str): The Wikipedia URL or the article title.
+            offset (int): The character offset to start reading from; use it
+                to read the next part of a long article. (default: :obj:`0`)
+
+        Returns:
+            str: The plain text of the article (or of the requested part).
+        """
+        article = self.store.get(url_or_title)
+        if article is None:
+            return (
+                f"The article `{url_or_title}` is not in the local Wikipedia "
+                f"snapshot. Use the other tools to find it online."
+            )
+        content = article["content"]
+        part = content[offset : offset + self.max_chars]
+        end = offset + len(part)
+        header = f"# {article['title']}\nSource: {article['url']}\n"
+        if end < len(content):
+            header += (
+                f"(showing characters {offset}-{end} of {len(content)}; "
+                f"call again with offset={end} to continue)\n"
+            )
+        return f"{header}\n{part}"
+
+    def get_tools(self) -> List[FunctionTool]:
+        return [FunctionTool(self.lookup_wikipedia_article)]